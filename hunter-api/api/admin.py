@@ -1,4 +1,12 @@
-from api.models import Dungeon, Guild, Hunter, Raid, RaidParticipation, Skill
+from api.models import (
+    Dungeon,
+    EmailOutbox,
+    Guild,
+    Hunter,
+    Raid,
+    RaidParticipation,
+    Skill,
+)
 from django.contrib import admin
 
 
@@ -27,3 +35,4 @@ admin.site.register(Skill)
 admin.site.register(Dungeon)
 admin.site.register(Raid, RaidAdmin)
 admin.site.register(RaidParticipation)
+admin.site.register(EmailOutbox)
@@ -6,4 +6,6 @@ class ApiConfig(AppConfig):
     name = "api"
 
     def ready(self):
+        import api.db
+        import api.instrumentation
         import api.signals
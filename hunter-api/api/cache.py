@@ -0,0 +1,403 @@
+import asyncio
+import hashlib
+import json
+import time
+import weakref
+from collections import defaultdict
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from urllib.parse import urlencode
+
+from api.db import use_primary
+from api.instrumentation import TimedAsyncConnectionPool
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from django_redis import get_redis_connection
+from redis.asyncio import Redis as AsyncRedis
+
+LIST_CACHE_TIMEOUT = 60 * 15
+DETAIL_CACHE_TIMEOUT = 60 * 15
+
+
+def _generation_key(namespace):
+    return cache.make_key(f"generation:{namespace}")
+
+
+def _modified_key(namespace):
+    return cache.make_key(f"modified:{namespace}")
+
+
+def _initial_generation():
+    # Seeded from the clock so a counter that was evicted never restarts at a
+    # value whose entries may still be alive.
+    return time.time_ns() // 1_000_000
+
+
+def get_namespace_state(namespace):
+    """
+    Generation and last-modified time (epoch seconds) of a cache namespace.
+
+    Both are read with one MGET. A namespace that was never invalidated, or
+    whose counters were evicted, counts as modified now.
+    """
+    redis = get_redis_connection("default")
+    keys = (_generation_key(namespace), _modified_key(namespace))
+    generation, modified = redis.mget(keys)
+    if generation is None or modified is None:
+        now = _initial_generation()
+        pipe = redis.pipeline(transaction=False)
+        pipe.set(keys[0], now, nx=True)
+        pipe.set(keys[1], now // 1000, nx=True)
+        pipe.mget(keys)
+        generation, modified = pipe.execute()[-1]
+    return int(generation), int(modified)
+
+
+async def aget_namespace_state(namespace):
+    """get_namespace_state() for async views."""
+    redis = get_async_redis()
+    keys = (_generation_key(namespace), _modified_key(namespace))
+    generation, modified = await redis.mget(keys)
+    if generation is None or modified is None:
+        now = _initial_generation()
+        pipe = redis.pipeline(transaction=False)
+        pipe.set(keys[0], now, nx=True)
+        pipe.set(keys[1], now // 1000, nx=True)
+        pipe.mget(keys)
+        generation, modified = (await pipe.execute())[-1]
+    return int(generation), int(modified)
+
+
+def get_generation(namespace):
+    """Current generation of a cache namespace; part of every key in it."""
+    return get_namespace_state(namespace)[0]
+
+
+class _Invalidations:
+    def __init__(self):
+        self.namespaces = set()
+        self.details = defaultdict(set)
+
+    def __bool__(self):
+        return bool(self.namespaces or self.details)
+
+    def update(self, other):
+        self.namespaces |= other.namespaces
+        for namespace, pks in other.details.items():
+            self.details[namespace] |= pks
+
+
+class _PendingInvalidations(_Invalidations):
+    """
+    Invalidations made in one transaction, or savepoint, that has not
+    committed yet: registered with on_commit(), so a rollback discards them
+    together with the rest of its callbacks.
+    """
+
+    def __call__(self):
+        deferred = _deferred.get()
+        if deferred is not None:
+            deferred.update(self)
+        else:
+            _flush(self)
+
+
+# Committed invalidations held back until the end of deferred_invalidation()
+_deferred = ContextVar("deferred_invalidations", default=None)
+
+
+def _pending():
+    """The pending invalidations of the current savepoint, if any yet."""
+    connection = transaction.get_connection()
+    if not connection.in_atomic_block:
+        return None
+    savepoint = set(connection.savepoint_ids)
+    for sids, func, robust in reversed(connection.run_on_commit):
+        if sids == savepoint and isinstance(func, _PendingInvalidations):
+            return func
+    return None
+
+
+def _schedule(namespaces=(), namespace=None, pks=()):
+    pending = _pending()
+    register = pending is None
+    if register:
+        pending = _PendingInvalidations()
+    pending.namespaces.update(namespaces)
+    if pks:
+        pending.details[namespace].update(pks)
+    if register:
+        # Runs at once outside a transaction
+        transaction.on_commit(pending)
+
+
+def _flush(invalidations):
+    if not invalidations:
+        return
+    namespaces = sorted(invalidations.namespaces)
+    details = {ns: sorted(pks) for ns, pks in invalidations.details.items()}
+    if settings.CACHE_INVALIDATION_ASYNC:
+        from api.tasks import apply_cache_invalidations
+
+        apply_cache_invalidations.delay(namespaces, details)
+    else:
+        apply_invalidations(namespaces, details)
+
+
+@contextmanager
+def deferred_invalidation():
+    """
+    Coalesce every invalidation made inside the block into one flush.
+
+    Invalidations still only take effect once their transaction commits;
+    those from rolled-back transactions are dropped.
+    """
+    if _deferred.get() is not None:
+        yield
+        return
+    token = _deferred.set(_Invalidations())
+    try:
+        yield
+    finally:
+        deferred = _deferred.get()
+        _deferred.reset(token)
+        _flush(deferred)
+
+
+@asynccontextmanager
+async def adeferred_invalidation():
+    """deferred_invalidation() for async code; flushes from a thread."""
+    if _deferred.get() is not None:
+        yield
+        return
+    token = _deferred.set(_Invalidations())
+    try:
+        yield
+    finally:
+        deferred = _deferred.get()
+        _deferred.reset(token)
+        if deferred:
+            await sync_to_async(_flush)(deferred)
+
+
+def invalidate_cache(*namespaces):
+    """
+    Invalidate every entry in the given namespaces once the current
+    transaction commits.
+
+    Requests from the same transaction, or from one deferred_invalidation()
+    block, are deduplicated and applied together by apply_invalidations().
+    """
+    if namespaces:
+        _schedule(namespaces=namespaces)
+
+
+def apply_invalidations(namespaces, details=None):
+    """
+    Bump the generation of each namespace and delete detail entries, in one
+    pipeline.
+
+    Entries keyed with an older generation are never read again and expire
+    through their own TTL.
+    """
+    now = _initial_generation()
+    pipe = get_redis_connection("default").pipeline(transaction=False)
+    for namespace in namespaces:
+        key = _generation_key(namespace)
+        pipe.set(key, now, nx=True)
+        pipe.incr(key)
+        pipe.set(_modified_key(namespace), now // 1000)
+    detail_keys = [
+        cache.make_key(detail_cache_key(namespace, pk))
+        for namespace, pks in (details or {}).items()
+        for pk in pks
+    ]
+    if detail_keys:
+        pipe.delete(*detail_keys)
+    pipe.execute()
+
+
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_redis():
+    """
+    redis.asyncio client for the default cache's server, for async views.
+
+    Its connections belong to the event loop that opened them, so each loop
+    gets its own client; under ASGI that is one per process.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        pool = TimedAsyncConnectionPool.from_url(settings.CACHES["default"]["LOCATION"])
+        client = _async_clients[loop] = AsyncRedis(connection_pool=pool)
+    return client
+
+
+async def acache_get(key):
+    """cache.get() through the async client; None when missing."""
+    value = await get_async_redis().get(cache.make_key(key))
+    return None if value is None else cache.client.decode(value)
+
+
+async def acache_set(key, value, timeout):
+    """cache.set() through the async client."""
+    await get_async_redis().set(
+        cache.make_key(key), cache.client.encode(value), ex=timeout
+    )
+
+
+def response_cache_key(namespace, view, request, scope=None, generation=None):
+    """
+    Key for a cached response, shared by every user allowed to see it.
+
+    The key is built from the permission classes guarding the view and the
+    normalized URL rather than the raw Authorization header, so one entry
+    serves every token. ``scope(request)`` adds a per-user component
+    for views whose payload actually differs between users.
+    """
+    parts = [
+        # Paginated payloads hold absolute links built from these
+        request.scheme,
+        request.get_host(),
+        request.path,
+        urlencode(sorted(request.query_params.lists()), doseq=True),
+        request.accepted_renderer.format,
+        ",".join(sorted(type(p).__qualname__ for p in view.get_permissions())),
+        scope(request) if scope else "",
+    ]
+    digest = hashlib.sha256("\n".join(parts).encode()).hexdigest()
+    if generation is None:
+        generation = get_generation(namespace)
+    return f"response:{namespace}:{generation}:{digest}"
+
+
+def set_validators(response, etag, last_modified):
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(last_modified)
+    return response
+
+
+def _store_response(key, response, timeout):
+    # Post-render callbacks must return None or they replace the response
+    cache.set(
+        key, (response.content, response.status_code, list(response.items())), timeout
+    )
+
+
+def _cached_response(cached):
+    content, status, headers = cached
+    response = HttpResponse(content, status=status)
+    for header, value in headers:
+        response[header] = value
+    return response
+
+
+def _store_on_render(response, key, timeout, etag, modified):
+    if response.status_code == 200:
+        set_validators(response, etag, modified)
+        response.add_post_render_callback(
+            lambda rendered: _store_response(key, rendered, timeout)
+        )
+    return response
+
+
+def cache_response(namespace, timeout=LIST_CACHE_TIMEOUT, scope=None):
+    """
+    Cache a DRF view method's rendered response under a namespaced key.
+
+    Replaces cache_page(key_prefix=...): the key embeds the namespace
+    generation, so invalidate_cache(namespace) drops every variant at once.
+    Permission checks still run before the cache is consulted.
+
+    The ETag is derived from the key and Last-Modified is the namespace's
+    last invalidation, so a matching If-None-Match or If-Modified-Since is
+    answered with a 304 from Redis alone, before the cache entry is read.
+
+    Async view methods read Redis through the async client. Either way the
+    response is stored when it is rendered, which Django does off the event
+    loop.
+
+    A miss reads from the primary: every user gets the stored response until
+    the next invalidation, so it must not come from a replica that lags.
+    """
+
+    def validators(view, request, generation):
+        key = response_cache_key(namespace, view, request, scope, generation)
+        return key, quote_etag(hashlib.sha256(key.encode()).hexdigest()[:32])
+
+    def decorator(view_method):
+        if iscoroutinefunction(view_method):
+
+            @wraps(view_method)
+            async def async_wrapper(self, request, *args, **kwargs):
+                generation, modified = await aget_namespace_state(namespace)
+                key, etag = validators(self, request, generation)
+                response = get_conditional_response(
+                    request, etag=etag, last_modified=modified
+                )
+                if response is not None:
+                    return set_validators(response, etag, modified)
+
+                cached = await acache_get(key)
+                if cached is not None:
+                    return _cached_response(cached)
+                with use_primary():
+                    response = await view_method(self, request, *args, **kwargs)
+                return _store_on_render(response, key, timeout, etag, modified)
+
+            return async_wrapper
+
+        @wraps(view_method)
+        def wrapper(self, request, *args, **kwargs):
+            generation, modified = get_namespace_state(namespace)
+            key, etag = validators(self, request, generation)
+            response = get_conditional_response(
+                request, etag=etag, last_modified=modified
+            )
+            if response is not None:
+                return set_validators(response, etag, modified)
+
+            cached = cache.get(key)
+            if cached is not None:
+                return _cached_response(cached)
+            with use_primary():
+                response = view_method(self, request, *args, **kwargs)
+            return _store_on_render(response, key, timeout, etag, modified)
+
+        return wrapper
+
+    return decorator
+
+
+def detail_cache_key(namespace, pk):
+    return f"detail:{namespace}:{pk}"
+
+
+def detail_cache_entry(data):
+    """
+    Cache entry for a serialized object: the payload plus its validators.
+
+    The ETag is a hash of the payload and Last-Modified is the time it was
+    built, which is never earlier than the last change api.signals reacted to.
+    """
+    payload = json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True)
+    return {
+        "data": data,
+        "etag": hashlib.sha256(payload.encode()).hexdigest()[:32],
+        "modified": int(time.time()),
+    }
+
+
+def invalidate_detail(namespace, *pks):
+    """Drop the cached detail payloads of specific objects, on commit."""
+    if pks:
+        _schedule(namespace=namespace, pks=pks)
@@ -0,0 +1,181 @@
+import logging
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.utils.functional import SimpleLazyObject, empty
+
+# Log a saturated pool at most this often, in seconds, per alias and process
+SATURATION_LOG_INTERVAL = 60
+
+_saturation_logged = {}
+
+# Marks a user who wrote recently, so their reads go to the primary
+STICKY_KEY = "db:primary:{}"
+
+_read_from_primary = ContextVar("read_from_primary", default=False)
+_current_request = ContextVar("routed_request", default=None)
+
+logger = logging.getLogger(__name__)
+
+
+def pools():
+    """
+    The psycopg connection pool of each database alias that has one
+    (OPTIONS["pool"], PostgreSQL only), in this process.
+    """
+    result = {}
+    for connection in connections.all():
+        pool = getattr(connection, "pool", None)
+        if pool is not None:
+            result[connection.alias] = pool
+    return result
+
+
+def pool_stats():
+    """
+    psycopg_pool's get_stats() for each pool of this process: its size and idle
+    connections (pool_size, pool_available), the requests waiting for one
+    right now, and counters of requests served, queued, timed out
+    (requests_errors) and the time spent waiting (requests_wait_ms).
+    """
+    return {alias: pool.get_stats() for alias, pool in pools().items()}
+
+
+def is_saturated(stats):
+    """Whether a pool has no idle connection left and cannot open another."""
+    if stats.get("requests_waiting"):
+        return True
+    return stats["pool_available"] == 0 and stats["pool_size"] >= stats["pool_max"]
+
+
+@receiver(connection_created)
+def warn_on_saturation(sender, connection, **kwargs):
+    """
+    With a pool, Django checks a connection out for each request (and sends
+    connection_created); warn when that left the pool saturated, as the next
+    requests will queue for up to the pool's timeout.
+    """
+    pool = getattr(connection, "pool", None)
+    if pool is None:
+        return
+    stats = pool.get_stats()
+    if not is_saturated(stats):
+        return
+    now = time.monotonic()
+    if now - _saturation_logged.get(connection.alias, -SATURATION_LOG_INTERVAL) < (
+        SATURATION_LOG_INTERVAL
+    ):
+        return
+    _saturation_logged[connection.alias] = now
+    logger.warning(
+        "Database pool %r saturated: %s of %s connections in use, %s requests "
+        "waiting, %s timed out so far",
+        connection.alias,
+        stats["pool_size"] - stats["pool_available"],
+        stats["pool_max"],
+        stats.get("requests_waiting", 0),
+        stats.get("requests_errors", 0),
+    )
+
+
+def discard_inherited_pools():
+    """
+    Drop the connection pools a forked worker inherited from its parent,
+    without closing them: their threads did not survive the fork, and their
+    connections' sockets are still the parent's. Each pool is created again
+    on first use.
+    """
+    for connection in connections.all(initialized_only=True):
+        if getattr(connection, "pool", None) is not None:
+            type(connection)._connection_pools.pop(connection.alias, None)
+            connection.connection = None
+
+
+class PrimaryReplicaRouter:
+    """
+    Writes go to the primary ("default"), and so do reads outside a request:
+    management commands, Celery tasks and other code that may read what was
+    just written. The reads of a request go to one of DATABASE_REPLICAS,
+    picked at random, except reads that:
+
+    - run inside use_primary(), as those of unsafe requests and of cache
+      misses do;
+    - come from a user who wrote less than DATABASE_PRIMARY_STICKY_SECONDS
+      ago. That is known once the request has authenticated the user, so the
+      lookups of authentication itself go to a replica;
+    - follow an instance, e.g. to its related objects, which are read from
+      the database the instance came from.
+    """
+
+    def db_for_read(self, model, **hints):
+        if not settings.DATABASE_REPLICAS or reads_from_primary():
+            return DEFAULT_DB_ALIAS
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replicas hold the same rows as the primary
+        return True
+
+
+@contextmanager
+def use_primary():
+    """
+    Read from the primary inside the block, or the decorated function: for
+    code that reads what was just written, which a replica may not have yet.
+    """
+    token = _read_from_primary.set(True)
+    try:
+        yield
+    finally:
+        _read_from_primary.reset(token)
+
+
+@contextmanager
+def routing(request):
+    """Route the reads inside the block as those of ``request``."""
+    token = _current_request.set(request)
+    try:
+        yield
+    finally:
+        _current_request.reset(token)
+
+
+def reads_from_primary():
+    if _read_from_primary.get():
+        return True
+    request = _current_request.get()
+    # Outside routing(), i.e. outside a request
+    if request is None:
+        return True
+    if "_reads_from_primary" in request.__dict__:
+        return request._reads_from_primary
+
+    user = request.__dict__.get("user")
+    # Until authentication has run, the user is unknown
+    if user is None or isinstance(user, SimpleLazyObject) and user._wrapped is empty:
+        return False
+    request._reads_from_primary = (
+        user.is_authenticated and cache.get(STICKY_KEY.format(user.pk)) is not None
+    )
+    return request._reads_from_primary
+
+
+def stick_to_primary(user):
+    """Send the user's reads to the primary for DATABASE_PRIMARY_STICKY_SECONDS."""
+    if settings.DATABASE_REPLICAS and user is not None and user.is_authenticated:
+        cache.set(
+            STICKY_KEY.format(user.pk), 1, settings.DATABASE_PRIMARY_STICKY_SECONDS
+        )
@@ -0,0 +1,84 @@
+from api.models import Dungeon, Guild, Hunter, Raid, RaidParticipation, Skill
+
+# The model fields each cached payload serializes, read off the serializers in
+# api/serializers/. Filters, search and ordering of the list endpoints only use
+# fields that are in the payload as well. Primary keys and updated_at are left
+# out: the former never change and the latter changes on every save.
+
+# HunterSerializer: full_name, rank_display and guild_name are derived
+HUNTER_PAYLOAD = {
+    Hunter: {
+        "date_joined",
+        "first_name",
+        "last_name",
+        "rank",
+        "email",
+        "guild",
+        "skills",
+        "power_level",
+        "username",
+        "raid_count",
+    },
+    Guild: {"name"},
+}
+
+# GuildSerializer: leader_display and members through GuildMemberSerializer
+GUILD_PAYLOAD = {
+    Guild: {"name", "founded_date", "leader"},
+    Hunter: {"first_name", "last_name", "rank", "guild"},
+}
+
+SKILL_PAYLOAD = {
+    Skill: {"name", "element", "power"},
+}
+
+DUNGEON_PAYLOAD = {
+    Dungeon: {"name", "rank", "location", "is_open"},
+}
+
+# RaidParticipationSerializer: full_name and hunter_rank come from the hunter
+PARTICIPATION_PAYLOAD = {
+    RaidParticipation: {"raid", "hunter", "role"},
+    Hunter: {"first_name", "last_name", "rank"},
+}
+
+# RaidSerializer: dungeon_info, participations_info and team_strength, which
+# sums the participants' power levels
+RAID_PAYLOAD = {
+    Raid: {"name", "dungeon", "date", "success"},
+    Dungeon: {"name", "rank"},
+    RaidParticipation: {"raid", "hunter", "role"},
+    Hunter: {"first_name", "last_name", "rank", "power_level"},
+}
+
+# Cache namespace -> {model: fields its payload reads}
+CACHE_DEPENDENCIES = {
+    "hunter_list": HUNTER_PAYLOAD,
+    "hunter": HUNTER_PAYLOAD,
+    "guild_list": GUILD_PAYLOAD,
+    "guild": GUILD_PAYLOAD,
+    "skill_list": SKILL_PAYLOAD,
+    "skill": SKILL_PAYLOAD,
+    "dungeon_list": DUNGEON_PAYLOAD,
+    "dungeon": DUNGEON_PAYLOAD,
+    "raid_list": RAID_PAYLOAD,
+    "raid": RAID_PAYLOAD,
+    "participation_list": PARTICIPATION_PAYLOAD,
+}
+
+LIST_NAMESPACES = {ns for ns in CACHE_DEPENDENCIES if ns.endswith("_list")}
+
+
+def affected_namespaces(model, fields=None):
+    """
+    Namespaces whose payload reads any of ``fields`` of ``model``. ``None``
+    stands for every field, as when an object is created or deleted.
+    """
+    if fields is not None:
+        fields = {model._meta.get_field(name).name for name in fields}
+    return {
+        namespace
+        for namespace, dependencies in CACHE_DEPENDENCIES.items()
+        if model in dependencies
+        and (fields is None or not dependencies[model].isdisjoint(fields))
+    }
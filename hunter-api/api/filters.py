@@ -2,16 +2,32 @@ import django_filters
 from api.models import Dungeon, Guild, Hunter, Raid, RaidParticipation, Skill
 from rest_framework import filters
 
+# Weakest first; ranks are letters, so their alphabetical order is meaningless
+RANK_ORDER = [rank for rank, _ in Hunter.RankChoices.choices]
+
 
 class DungeonFilter(django_filters.FilterSet):
+    rank__gte = django_filters.ChoiceFilter(
+        choices=Hunter.RankChoices.choices, method="filter_rank_gte"
+    )
+    rank__lte = django_filters.ChoiceFilter(
+        choices=Hunter.RankChoices.choices, method="filter_rank_lte"
+    )
+
     class Meta:
         model = Dungeon
         fields = {
             "name": ["icontains"],
             "location": ["icontains"],
-            "rank": ["exact", "gte", "lte"],
+            "rank": ["exact"],
         }
 
+    def filter_rank_gte(self, queryset, name, value):
+        return queryset.filter(rank__in=RANK_ORDER[RANK_ORDER.index(value) :])
+
+    def filter_rank_lte(self, queryset, name, value):
+        return queryset.filter(rank__in=RANK_ORDER[: RANK_ORDER.index(value) + 1])
+
 
 class HunterFilter(django_filters.FilterSet):
     guild_isnull = django_filters.BooleanFilter(
@@ -23,6 +39,7 @@ class HunterFilter(django_filters.FilterSet):
         fields = {
             "rank": ["exact"],
             "guild": ["exact"],
+            "power_level": ["gte", "lte"],
         }
 
 
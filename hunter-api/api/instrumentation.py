@@ -0,0 +1,196 @@
+import logging
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from redis import Connection, ConnectionPool
+from redis import asyncio as aioredis
+
+# Server-Timing metrics, in the order they are reported
+METRICS = ("db", "cache", "serialize", "render")
+
+_current = ContextVar("request_metrics", default=None)
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class RequestMetrics:
+    """Time spent per metric, plus query and cache round-trip counts."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.seconds = defaultdict(float)
+        self.active = set()
+        self.queries = 0
+        self.cache_calls = 0
+
+    @property
+    def total(self):
+        return time.perf_counter() - self.started
+
+    def server_timing(self):
+        descriptions = {
+            "db": f"{self.queries} queries",
+            "cache": f"{self.cache_calls} calls",
+        }
+        entries = []
+        for name in METRICS:
+            entry = f"{name};dur={self.seconds[name] * 1000:.1f}"
+            if name in descriptions:
+                entry += f';desc="{descriptions[name]}"'
+            entries.append(entry)
+        entries.append(f"total;dur={self.total * 1000:.1f}")
+        return ", ".join(entries)
+
+
+def current():
+    """Metrics of the request being handled, or None outside one."""
+    return _current.get()
+
+
+@contextmanager
+def timed(name):
+    """
+    Add the time spent inside the block to a metric of the current request.
+    Nested blocks for the same metric are only counted once.
+    """
+    metrics = _current.get()
+    if metrics is None or name in metrics.active:
+        yield
+        return
+    metrics.active.add(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.seconds[name] += time.perf_counter() - started
+        metrics.active.discard(name)
+
+
+def check_query_budget(view, queries):
+    """
+    Compare the ``queries`` a view ran with its ``query_budget``: a number for
+    every action, or a dict by action. Going over it raises when
+    settings.QUERY_BUDGET_RAISE is set, as in tests, and is logged otherwise.
+    """
+    action = getattr(view, "action", None)
+    budget = getattr(view, "query_budget", None)
+    if isinstance(budget, dict):
+        budget = budget.get(action)
+    if budget is None or queries <= budget:
+        return
+    message = (
+        f"{type(view).__name__}{f'.{action}' if action else ''} ran "
+        f"{queries} queries, over its budget of {budget}"
+    )
+    if settings.QUERY_BUDGET_RAISE:
+        raise QueryBudgetExceeded(message)
+    logger.warning(message)
+
+
+def _is_profiler_query(sql):
+    # Silk's query plans and its own bookkeeping
+    return sql.startswith("EXPLAIN") or '"silk_' in sql
+
+
+def _count_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None or _is_profiler_query(sql):
+        return execute(sql, params, many, context)
+    metrics.queries += 1
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.seconds["db"] += time.perf_counter() - started
+
+
+@receiver(connection_created)
+def count_queries(sender, connection, **kwargs):
+    """
+    Count the queries of every connection into the current request's metrics.
+    Installed once per connection rather than per request, as async views
+    reach the database from threads other than the one handling the request.
+    First in line, so an execute_wrapper() block still pops its own wrapper.
+    """
+    if _count_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _count_query)
+
+
+@contextmanager
+def collect():
+    """Collect RequestMetrics for everything run inside the block."""
+    metrics = RequestMetrics()
+    token = _current.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current.reset(token)
+
+
+class _TimedConnectionMixin:
+    def send_packed_command(self, command, check_health=True):
+        with timed("cache"):
+            return super().send_packed_command(command, check_health)
+
+    def read_response(self, *args, **kwargs):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.cache_calls += 1
+        with timed("cache"):
+            return super().read_response(*args, **kwargs)
+
+
+_timed_classes = {}
+
+
+class TimedConnectionPool(ConnectionPool):
+    """
+    Redis connection pool whose connections report their round trips to the
+    current request's "cache" metric. Set as CONNECTION_POOL_CLASS of the
+    django-redis cache, so it covers both the cache API and raw clients from
+    get_redis_connection().
+    """
+
+    def __init__(self, connection_class=Connection, **kwargs):
+        if connection_class not in _timed_classes:
+            _timed_classes[connection_class] = type(
+                f"Timed{connection_class.__name__}",
+                (_TimedConnectionMixin, connection_class),
+                {},
+            )
+        super().__init__(connection_class=_timed_classes[connection_class], **kwargs)
+
+
+class _TimedAsyncConnectionMixin:
+    async def send_packed_command(self, command, check_health=True):
+        with timed("cache"):
+            return await super().send_packed_command(command, check_health)
+
+    async def read_response(self, *args, **kwargs):
+        metrics = _current.get()
+        if metrics is not None:
+            metrics.cache_calls += 1
+        with timed("cache"):
+            return await super().read_response(*args, **kwargs)
+
+
+class TimedAsyncConnectionPool(aioredis.ConnectionPool):
+    """TimedConnectionPool for the redis.asyncio client of async views."""
+
+    def __init__(self, connection_class=aioredis.Connection, **kwargs):
+        if connection_class not in _timed_classes:
+            _timed_classes[connection_class] = type(
+                f"Timed{connection_class.__name__}",
+                (_TimedAsyncConnectionMixin, connection_class),
+                {},
+            )
+        super().__init__(connection_class=_timed_classes[connection_class], **kwargs)
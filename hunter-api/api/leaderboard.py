@@ -0,0 +1,201 @@
+from api.models import Guild, Hunter
+from django.db.models import Sum
+from django_redis import get_redis_connection
+
+HUNTERS_KEY = "leaderboard:hunters"
+GUILDS_KEY = "leaderboard:guilds"
+HUNTER_NAMES_KEY = "leaderboard:hunter_names"
+GUILD_NAMES_KEY = "leaderboard:guild_names"
+# hunter id -> guild id, so a hunter's old contribution can be moved atomically
+HUNTER_GUILDS_KEY = "leaderboard:hunter_guilds"
+
+# KEYS: hunters, guilds, hunter_guilds, hunter_names
+# ARGV: hunter id, power level ("" removes the hunter), guild id ("" for none), name
+UPDATE_HUNTER_SCRIPT = """
+local old_power = redis.call('ZSCORE', KEYS[1], ARGV[1])
+local old_guild = redis.call('HGET', KEYS[3], ARGV[1])
+if old_power and old_guild then
+    redis.call('ZINCRBY', KEYS[2], -tonumber(old_power), old_guild)
+end
+if ARGV[2] == '' then
+    redis.call('ZREM', KEYS[1], ARGV[1])
+    redis.call('HDEL', KEYS[3], ARGV[1])
+    redis.call('HDEL', KEYS[4], ARGV[1])
+    return
+end
+redis.call('ZADD', KEYS[1], ARGV[2], ARGV[1])
+redis.call('HSET', KEYS[4], ARGV[1], ARGV[4])
+if ARGV[3] == '' then
+    redis.call('HDEL', KEYS[3], ARGV[1])
+else
+    redis.call('ZINCRBY', KEYS[2], ARGV[2], ARGV[3])
+    redis.call('HSET', KEYS[3], ARGV[1], ARGV[3])
+end
+"""
+
+SCOPES = {
+    "hunters": (HUNTERS_KEY, HUNTER_NAMES_KEY),
+    "guilds": (GUILDS_KEY, GUILD_NAMES_KEY),
+}
+
+
+def get_connection():
+    return get_redis_connection("leaderboard")
+
+
+def hunter_display_name(hunter):
+    return hunter.full_name or hunter.username
+
+
+def update_hunters(hunters):
+    """Write the current power level and guild of each hunter to the sorted sets."""
+    redis = get_connection()
+    script = redis.register_script(UPDATE_HUNTER_SCRIPT)
+    keys = [HUNTERS_KEY, GUILDS_KEY, HUNTER_GUILDS_KEY, HUNTER_NAMES_KEY]
+    pipe = redis.pipeline(transaction=False)
+    for hunter in hunters:
+        args = [
+            hunter.pk,
+            hunter.power_level,
+            hunter.guild_id or "",
+            hunter_display_name(hunter),
+        ]
+        script(keys=keys, args=args, client=pipe)
+    pipe.execute()
+
+
+def sync_hunters(queryset):
+    """Reload the given hunters from the database and update the sorted sets."""
+    update_hunters(
+        queryset.only(
+            "pk", "power_level", "guild_id", "first_name", "last_name", "username"
+        )
+    )
+
+
+def remove_hunter(hunter_id):
+    redis = get_connection()
+    script = redis.register_script(UPDATE_HUNTER_SCRIPT)
+    keys = [HUNTERS_KEY, GUILDS_KEY, HUNTER_GUILDS_KEY, HUNTER_NAMES_KEY]
+    script(keys=keys, args=[hunter_id, "", "", ""])
+
+
+def update_guild(guild):
+    pipe = get_connection().pipeline(transaction=False)
+    # NX keeps the aggregate score; a new guild simply starts at zero
+    pipe.zadd(GUILDS_KEY, {guild.pk: 0}, nx=True)
+    pipe.hset(GUILD_NAMES_KEY, guild.pk, guild.name)
+    pipe.execute()
+
+
+def remove_guild(guild_id, member_ids=()):
+    pipe = get_connection().pipeline(transaction=False)
+    pipe.zrem(GUILDS_KEY, guild_id)
+    pipe.hdel(GUILD_NAMES_KEY, guild_id)
+    if member_ids:
+        pipe.hdel(HUNTER_GUILDS_KEY, *member_ids)
+    pipe.execute()
+
+
+def _entries(redis, names_key, members, offset):
+    names = redis.hmget(names_key, [member for member, _ in members]) if members else []
+    return [
+        {
+            "rank": offset + i + 1,
+            "id": int(member),
+            "name": name.decode() if name is not None else None,
+            "power_level": int(score),
+        }
+        for i, ((member, score), name) in enumerate(zip(members, names))
+    ]
+
+
+def top(scope="hunters", limit=10, offset=0):
+    """Entries ranked offset+1 .. offset+limit, highest power first."""
+    key, names_key = SCOPES[scope]
+    redis = get_connection()
+    members = redis.zrevrange(key, offset, offset + limit - 1, withscores=True)
+    return _entries(redis, names_key, members, offset)
+
+
+def rank_of(member_id, scope="hunters"):
+    """1-based rank and power level of a hunter or guild, or None if unranked."""
+    key, names_key = SCOPES[scope]
+    redis = get_connection()
+    pipe = redis.pipeline(transaction=False)
+    pipe.zrevrank(key, member_id)
+    pipe.zscore(key, member_id)
+    pipe.hget(names_key, member_id)
+    position, score, name = pipe.execute()
+    if position is None:
+        return None
+    return {
+        "rank": position + 1,
+        "id": int(member_id),
+        "name": name.decode() if name is not None else None,
+        "power_level": int(score),
+    }
+
+
+def around(member_id, scope="hunters", radius=5):
+    """Entries within ``radius`` places of a hunter or guild, or None if unranked."""
+    key, names_key = SCOPES[scope]
+    redis = get_connection()
+    position = redis.zrevrank(key, member_id)
+    if position is None:
+        return None
+    offset = max(position - radius, 0)
+    members = redis.zrevrange(key, offset, position + radius, withscores=True)
+    return _entries(redis, names_key, members, offset)
+
+
+def rebuild(chunk_size=5000):
+    """
+    Repopulate every leaderboard key from the database.
+
+    The sets are built under temporary keys and renamed into place, so readers
+    never observe a partially built leaderboard.
+    """
+    redis = get_connection()
+    final_keys = [
+        HUNTERS_KEY,
+        GUILDS_KEY,
+        HUNTER_NAMES_KEY,
+        GUILD_NAMES_KEY,
+        HUNTER_GUILDS_KEY,
+    ]
+    tmp = {key: f"{key}:rebuild" for key in final_keys}
+    redis.delete(*tmp.values())
+
+    hunter_count = 0
+    rows = Hunter.objects.values_list(
+        "pk", "power_level", "guild_id", "first_name", "last_name", "username"
+    ).iterator(chunk_size=chunk_size)
+    pipe = redis.pipeline(transaction=False)
+    for pk, power_level, guild_id, first_name, last_name, username in rows:
+        name = f"{first_name} {last_name}".strip() or username
+        pipe.zadd(tmp[HUNTERS_KEY], {pk: power_level})
+        pipe.hset(tmp[HUNTER_NAMES_KEY], pk, name)
+        if guild_id is not None:
+            pipe.hset(tmp[HUNTER_GUILDS_KEY], pk, guild_id)
+        hunter_count += 1
+        if hunter_count % chunk_size == 0:
+            pipe.execute()
+    pipe.execute()
+
+    guild_count = 0
+    guilds = Guild.objects.annotate(total_power=Sum("members__power_level"))
+    for pk, name, total_power in guilds.values_list("pk", "name", "total_power"):
+        pipe.zadd(tmp[GUILDS_KEY], {pk: total_power or 0})
+        pipe.hset(tmp[GUILD_NAMES_KEY], pk, name)
+        guild_count += 1
+    pipe.execute()
+
+    pipe = redis.pipeline(transaction=True)
+    for key in final_keys:
+        if redis.exists(tmp[key]):
+            pipe.rename(tmp[key], key)
+        else:
+            pipe.delete(key)
+    pipe.execute()
+    return hunter_count, guild_count
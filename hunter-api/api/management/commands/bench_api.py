@@ -0,0 +1,303 @@
+import json
+import math
+import platform
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from unittest import mock
+
+import django
+from api.cache import apply_invalidations
+from api.dependencies import LIST_NAMESPACES
+from api.models import Dungeon, Guild, Hunter, Raid, Skill
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from django_redis import get_redis_connection
+from rest_framework.test import APIClient
+from rest_framework.throttling import SimpleRateThrottle
+
+# Router basename -> model and the query strings of its filter, search and
+# ordering variants
+ENDPOINTS = {
+    "hunter": (
+        Hunter,
+        {
+            "filter": {"rank": "S"},
+            "search": {"search": "ma"},
+            "ordering": {"ordering": "-raid_count"},
+        },
+    ),
+    "guild": (
+        Guild,
+        {
+            "filter": {"name__icontains": "and"},
+            "search": {"search": "ltd"},
+            "ordering": {"ordering": "-founded_date"},
+        },
+    ),
+    "raid": (
+        Raid,
+        {
+            "filter": {"date__gte": "2000-01-01"},
+            "search": {"search": "raid 1"},
+            "ordering": {"ordering": "-date"},
+        },
+    ),
+    "skill": (
+        Skill,
+        {
+            "filter": {"element": "Fire"},
+            "search": {"search": "a"},
+            "ordering": {"ordering": "-power"},
+        },
+    ),
+    "dungeon": (
+        Dungeon,
+        {
+            "filter": {"rank__gte": "C"},
+            "search": {"search": "a"},
+            "ordering": {"ordering": "rank"},
+        },
+    ),
+}
+PHASES = ("cold", "warm")
+PROFILING_MIDDLEWARE = "api.middleware.ProfilingMiddleware"
+# Latency changes smaller than this are noise, whatever the threshold
+MIN_REGRESSION_MS = 1.0
+
+
+class QueryTimer:
+    """execute_wrapper counting queries and their time, to the microsecond."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(pct / 100 * len(ordered)) - 1, 0)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the list, detail, filter, search and ordering endpoints, "
+        "cold and warm cache"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument(
+            "--seed-db",
+            action="store_true",
+            help="Replace the data with populate_db's first, deleting the current data",
+        )
+        parser.add_argument(
+            "--noinput",
+            "--no-input",
+            action="store_false",
+            dest="interactive",
+            help="Do not ask before --seed-db deletes the data",
+        )
+        parser.add_argument("--hunters", type=int, default=10000)
+        parser.add_argument("--guilds", type=int, default=100)
+        parser.add_argument("--raids", type=int, default=5000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument(
+            "--only",
+            action="append",
+            default=[],
+            help="Run only scenarios whose name contains this (repeatable)",
+        )
+        parser.add_argument("--output", help="Write the results to this JSON file")
+        parser.add_argument(
+            "--compare", help="Baseline JSON to check the results against"
+        )
+        parser.add_argument(
+            "--threshold",
+            type=float,
+            default=0.2,
+            help="Allowed p95 latency increase over the baseline (default: 0.2)",
+        )
+
+    def handle(self, *args, **options):
+        self.iterations = options["iterations"]
+        if options["seed_db"]:
+            if options["interactive"] and not self.confirm_seed():
+                raise CommandError("Benchmark cancelled.")
+            call_command(
+                "populate_db",
+                hunters=options["hunters"],
+                guilds=options["guilds"],
+                raids=options["raids"],
+                seed=options["seed"],
+                stdout=self.stdout,
+            )
+        admin = Hunter.objects.filter(is_superuser=True).first()
+        if admin is None:
+            raise CommandError("A superuser is needed to call the API.")
+
+        client = APIClient()
+        client.force_authenticate(user=admin)
+        self.redis = get_redis_connection("default")
+        scenarios = [
+            scenario
+            for scenario in self.scenarios()
+            if not options["only"] or any(s in scenario[0] for s in options["only"])
+        ]
+
+        results = {}
+        # Sampled profiling would skew the numbers; throttling would cut the run
+        # short. The throttles read their rates once, at import, so they are
+        # patched rather than overridden: a scope without a rate is not throttled.
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            MIDDLEWARE=[m for m in settings.MIDDLEWARE if m != PROFILING_MIDDLEWARE],
+        ), mock.patch.object(
+            SimpleRateThrottle, "THROTTLE_RATES", defaultdict(lambda: None)
+        ):
+            for name, url in scenarios:
+                results[name] = {
+                    phase: self.measure(client, url, phase == "cold")
+                    for phase in PHASES
+                }
+                for phase in PHASES:
+                    self.report(name, phase, results[name][phase])
+
+        report = {"meta": self.meta(), "results": results}
+        if options["output"]:
+            with open(options["output"], "w") as f:
+                json.dump(report, f, indent=2)
+            self.stdout.write(f"Results written to {options['output']}.")
+        if options["compare"]:
+            self.compare(results, options["compare"], options["threshold"])
+
+    def confirm_seed(self):
+        answer = input(
+            f"This will delete all the data of the {connection.settings_dict['NAME']!r} "
+            "database and fill it with populate_db's.\n"
+            "Are you sure you want to do this?\n\n"
+            "    Type 'yes' to continue, or 'no' to cancel: "
+        )
+        return answer == "yes"
+
+    def scenarios(self):
+        for basename, (model, variants) in ENDPOINTS.items():
+            list_url = reverse(f"{basename}-list")
+            yield f"{basename}.list", list_url
+            pk = model.objects.order_by("pk").values_list("pk", flat=True).first()
+            if pk is not None:
+                yield f"{basename}.detail", reverse(f"{basename}-detail", args=[pk])
+            for variant, params in variants.items():
+                query = "&".join(f"{k}={v}" for k, v in params.items())
+                yield f"{basename}.{variant}", f"{list_url}?{query}"
+
+    def reset_cache(self):
+        apply_invalidations(sorted(LIST_NAMESPACES))
+        cache.delete_pattern("detail:*")
+
+    def redis_stats(self):
+        stats = self.redis.info("stats")
+        return stats["keyspace_hits"], stats["keyspace_misses"]
+
+    def measure(self, client, url, cold):
+        if not cold:
+            self.reset_cache()
+            client.get(url)
+
+        latencies, queries, sql_ms, hits, misses = [], [], [], 0, 0
+        for _ in range(self.iterations):
+            if cold:
+                self.reset_cache()
+            hits_before, misses_before = self.redis_stats()
+            timer = QueryTimer()
+            with connection.execute_wrapper(timer):
+                started = time.perf_counter()
+                response = client.get(url)
+                latencies.append((time.perf_counter() - started) * 1000)
+            hits_after, misses_after = self.redis_stats()
+            if response.status_code != 200:
+                raise CommandError(f"GET {url} returned {response.status_code}")
+            queries.append(timer.count)
+            sql_ms.append(timer.seconds * 1000)
+            hits += hits_after - hits_before
+            misses += misses_after - misses_before
+
+        return {
+            "url": url,
+            "p50_ms": round(percentile(latencies, 50), 2),
+            "p95_ms": round(percentile(latencies, 95), 2),
+            "p99_ms": round(percentile(latencies, 99), 2),
+            "queries": round(sum(queries) / len(queries), 2),
+            "sql_ms": round(sum(sql_ms) / len(sql_ms), 2),
+            "cache_hits": hits,
+            "cache_misses": misses,
+            "bytes": len(response.content),
+        }
+
+    def report(self, name, phase, result):
+        self.stdout.write(
+            f"{name:<18} {phase:<5} "
+            f"p50 {result['p50_ms']:>8.2f}ms  p95 {result['p95_ms']:>8.2f}ms  "
+            f"p99 {result['p99_ms']:>8.2f}ms  queries {result['queries']:>5.1f}  "
+            f"sql {result['sql_ms']:>7.2f}ms  hits {result['cache_hits']:>4}  "
+            f"misses {result['cache_misses']:>4}  {result['bytes']:>7}B"
+        )
+
+    def meta(self):
+        return {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "iterations": self.iterations,
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "dataset": {
+                model._meta.model_name: model.objects.count()
+                for model, _ in ENDPOINTS.values()
+            },
+        }
+
+    def compare(self, results, path, threshold):
+        with open(path) as f:
+            baseline = json.load(f)["results"]
+
+        regressions = []
+        for name, phases in results.items():
+            for phase, result in phases.items():
+                base = baseline.get(name, {}).get(phase)
+                if base is None:
+                    continue
+                limit = max(
+                    base["p95_ms"] * (1 + threshold),
+                    base["p95_ms"] + MIN_REGRESSION_MS,
+                )
+                if result["p95_ms"] > limit:
+                    regressions.append(
+                        f"{name} {phase}: p95 {base['p95_ms']}ms -> "
+                        f"{result['p95_ms']}ms"
+                    )
+                if result["queries"] > base["queries"]:
+                    regressions.append(
+                        f"{name} {phase}: queries {base['queries']} -> "
+                        f"{result['queries']}"
+                    )
+
+        if regressions:
+            for regression in regressions:
+                self.stderr.write(f"REGRESSION {regression}")
+            raise CommandError(f"{len(regressions)} regressions against {path}.")
+        self.stdout.write(self.style.SUCCESS(f"No regressions against {path}."))
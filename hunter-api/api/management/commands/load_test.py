@@ -0,0 +1,114 @@
+import http.client
+import threading
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+from api.management.commands.bench_api import percentile
+from api.models import Hunter
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure the requests/sec a running server sustains, with concurrent "
+        "keep-alive clients"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url", help="Server to load, e.g. http://127.0.0.1:8000")
+        parser.add_argument(
+            "--path",
+            action="append",
+            default=[],
+            help="Path to request, in turn (repeatable, default: the leaderboard "
+            "and a hunter's detail)",
+        )
+        parser.add_argument("--concurrency", type=int, default=8)
+        parser.add_argument("--duration", type=float, default=10.0, help="Seconds")
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        if url.scheme != "http" or not url.hostname:
+            raise CommandError("url must look like http://host:port")
+        admin = Hunter.objects.filter(is_superuser=True).first()
+        if admin is None:
+            raise CommandError("A superuser is needed to call the API.")
+
+        self.host, self.port = url.hostname, url.port or 80
+        self.paths = options["path"] or [
+            reverse("leaderboard"),
+            reverse("hunter-detail", args=[admin.pk]),
+        ]
+        self.headers = {"Authorization": f"Bearer {AccessToken.for_user(admin)}"}
+        self.deadline = time.perf_counter() + options["duration"]
+        self.lock = threading.Lock()
+        self.latencies, self.statuses = [], Counter()
+        self.errors = self.reconnects = 0
+
+        started = time.perf_counter()
+        clients = [
+            threading.Thread(target=self.client, args=(i,))
+            for i in range(options["concurrency"])
+        ]
+        for client in clients:
+            client.start()
+        for client in clients:
+            client.join()
+        elapsed = time.perf_counter() - started
+
+        if not self.latencies:
+            raise CommandError(f"No request to {options['url']} succeeded.")
+        self.stdout.write(
+            f"{len(self.latencies)} requests in {elapsed:.1f}s, "
+            f"{len(self.latencies) / elapsed:.1f} req/s, "
+            f"concurrency {options['concurrency']}"
+        )
+        self.stdout.write(
+            f"latency p50 {percentile(self.latencies, 50):.2f}ms  "
+            f"p95 {percentile(self.latencies, 95):.2f}ms  "
+            f"p99 {percentile(self.latencies, 99):.2f}ms"
+        )
+        statuses = ", ".join(f"{s}: {n}" for s, n in sorted(self.statuses.items()))
+        self.stdout.write(
+            f"status {statuses}  errors {self.errors}  reconnects {self.reconnects}"
+        )
+
+    def get(self, connection, path):
+        connection.request("GET", path, headers=self.headers)
+        response = connection.getresponse()
+        response.read()
+        return response.status
+
+    def client(self, offset):
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        latencies, statuses, errors, reconnects = [], Counter(), 0, 0
+        i = offset
+        while time.perf_counter() < self.deadline:
+            path = self.paths[i % len(self.paths)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                try:
+                    status = self.get(connection, path)
+                except (http.client.RemoteDisconnected, ConnectionResetError):
+                    # The server closed the kept-alive connection, e.g. a worker
+                    # restarting; retry once on a new one, as HTTP clients do
+                    reconnects += 1
+                    connection.close()
+                    status = self.get(connection, path)
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                connection.close()
+                continue
+            latencies.append((time.perf_counter() - started) * 1000)
+            statuses[status] += 1
+        connection.close()
+
+        with self.lock:
+            self.latencies.extend(latencies)
+            self.statuses.update(statuses)
+            self.errors += errors
+            self.reconnects += reconnects
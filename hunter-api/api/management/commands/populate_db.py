@@ -1,114 +1,282 @@
 import random
+import time
+from bisect import bisect_left
 from datetime import date, timedelta
+from itertools import accumulate
 
-from api.models import Dungeon, Guild, Raid, RaidParticipation, Skill
-from django.contrib.auth import get_user_model
+from api import leaderboard
+from api.cache import apply_invalidations
+from api.dependencies import LIST_NAMESPACES
+from api.models import (
+    RANK_BASE_POWER,
+    Dungeon,
+    Guild,
+    Hunter,
+    Raid,
+    RaidParticipation,
+    Skill,
+    Tombstone,
+)
+from api.signals import muted
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management import call_command
 from django.core.management.base import BaseCommand
+from django.db import transaction
+from faker import Faker
 
-Hunter = get_user_model()
+# Share of hunters per rank, most hunters are low ranked
+RANK_WEIGHTS = {"E": 40, "D": 25, "C": 17, "B": 10, "A": 6, "S": 2}
+ROLE_WEIGHTS = {"DPS": 45, "Tank": 20, "Healer": 20, "Support": 15}
+# Raid success chance by dungeon rank
+SUCCESS_RATE = {"E": 0.95, "D": 0.9, "C": 0.8, "B": 0.65, "A": 0.5, "S": 0.3}
+GUILD_MEMBER_SHARE = 0.7
+MAX_SKILLS_PER_HUNTER = 5
+TEAM_SIZE = (2, 8)
+RAID_HISTORY_DAYS = 730
+NAME_POOL_SIZE = 2000
+PASSWORD = "test"
+
+
+def zipf_weights(n, exponent=1.1):
+    """Cumulative weights where item i is picked in proportion to 1 / (i + 1)^s."""
+    return list(accumulate(1 / (i + 1) ** exponent for i in range(n)))
 
 
 class Command(BaseCommand):
-    help = "Populate the database with demo data"
+    help = "Replace the database contents with a generated, skewed dataset"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hunters", type=int, default=200)
+        parser.add_argument("--guilds", type=int, default=10)
+        parser.add_argument("--skills", type=int, default=50)
+        parser.add_argument("--dungeons", type=int, default=20)
+        parser.add_argument("--raids", type=int, default=100)
+        parser.add_argument(
+            "--seed", type=int, default=None, help="Seed for a reproducible dataset"
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows per INSERT (default: 5000)",
+        )
+
+    def handle(self, *args, **options):
+        self.batch_size = options["batch_size"]
+        self.random = random.Random(options["seed"])
+        self.fake = Faker()
+        self.fake.seed_instance(options["seed"])
+        started = time.perf_counter()
+
+        # Receivers would update stats, tombstones, the leaderboard and caches
+        # once per row; all of that is rebuilt set-based at the end instead.
+        with muted(), transaction.atomic():
+            self.stdout.write("Clearing old data...")
+            self.clear()
+            self.stdout.write("Creating skills and dungeons...")
+            skills = self.create_skills(options["skills"])
+            dungeons = self.create_dungeons(options["dungeons"])
+            self.stdout.write("Creating guilds and hunters...")
+            guild_ids = self.create_guilds(options["guilds"])
+            hunter_ids = self.create_hunters(options["hunters"], guild_ids, skills)
+            self.stdout.write("Creating raids...")
+            self.create_raids(options["raids"], dungeons, hunter_ids)
+
+        call_command("recompute_hunter_stats", stdout=self.stdout)
+        call_command("rebuild_leaderboard", stdout=self.stdout)
+        cache.delete_pattern("detail:*")
+        apply_invalidations(sorted(LIST_NAMESPACES))
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Database populated in {time.perf_counter() - started:.1f}s."
+            )
+        )
 
-    def handle(self, *args, **kwargs):
-        self.stdout.write("Clearing old data...")
+    def clear(self):
+        # Children first, so no delete has to collect cascades row by row
         RaidParticipation.objects.all().delete()
+        Hunter.skills.through.objects.all().delete()
         Raid.objects.all().delete()
         Dungeon.objects.all().delete()
+        Hunter.objects.update(guild=None)
         Guild.objects.all().delete()
         Skill.objects.all().delete()
         Hunter.objects.all().delete()
-
-        self.stdout.write("Creating skills...")
-        skills = [
-            Skill.objects.create(name="Fireball", element="Fire", power=50),
-            Skill.objects.create(name="Ice Blast", element="Water", power=40),
-            Skill.objects.create(name="Earthquake", element="Earth", power=70),
-            Skill.objects.create(name="Shadow Strike", element="Shadow", power=60),
-            Skill.objects.create(name="Holy Light", element="Light", power=80),
-        ]
-
-        self.stdout.write("Creating hunters (users)...")
-        admin = Hunter.objects.create_superuser(
-            username="admin", email="admin@example.com", password="test", rank="S"
+        Tombstone.objects.all().delete()
+        leaderboard.get_connection().delete(
+            leaderboard.HUNTERS_KEY,
+            leaderboard.GUILDS_KEY,
+            leaderboard.HUNTER_NAMES_KEY,
+            leaderboard.GUILD_NAMES_KEY,
+            leaderboard.HUNTER_GUILDS_KEY,
         )
 
-        hunters = [
-            Hunter.objects.create_user(
-                username="jinwoo",
-                first_name="Jin",
-                last_name="Woo",
-                email="jinwoo@example.com",
-                password="test",
-                rank="E",
-            ),
-            Hunter.objects.create_user(
-                username="david",
-                first_name="David",
-                last_name="Porras",
-                email="david@example.com",
-                password="test",
-                rank="D",
-            ),
-            Hunter.objects.create_user(
-                username="cj",
-                first_name="CJ",
-                last_name="Pingal",
-                email="cj@example.com",
-                password="test",
-                rank="C",
-            ),
-            Hunter.objects.create_user(
-                username="sung",
-                first_name="Sung",
-                last_name="Jin",
-                email="sung@example.com",
-                password="test",
-                rank="B",
-            ),
-        ]
-
-        # Assign random skills
-        for h in hunters:
-            h.skills.add(random.choice(skills))
-
-        self.stdout.write("Creating guilds...")
-        guild1 = Guild.objects.create(name="Hunters Guild", leader=hunters[0])
-        guild2 = Guild.objects.create(name="Shadow Wolves", leader=hunters[1])
-
-        hunters[0].guild = guild1
-        hunters[0].save()
-        hunters[1].guild = guild2
-        hunters[1].save()
-
-        self.stdout.write("Creating dungeons...")
-        dungeon1 = Dungeon.objects.create(
-            name="Goblin Cave", location="Seoul", rank="E", is_open=True
+    def bulk_create(self, model, objects):
+        return model.objects.bulk_create(objects, batch_size=self.batch_size)
+
+    def create_skills(self, count):
+        elements = Skill.ElementChoices.values
+        skills = self.bulk_create(
+            Skill,
+            [
+                Skill(
+                    name=f"{self.fake.word().title()} {self.fake.word().title()}",
+                    element=self.random.choice(elements),
+                    # Mostly weak skills with a long tail of strong ones
+                    power=min(int(self.random.lognormvariate(3.5, 0.6)) + 1, 500),
+                )
+                for _ in range(count)
+            ],
         )
-        dungeon2 = Dungeon.objects.create(
-            name="Orc Fortress", location="Busan", rank="C", is_open=True
+        return [skill.pk for skill in skills]
+
+    def create_dungeons(self, count):
+        ranks = list(RANK_WEIGHTS)
+        weights = list(RANK_WEIGHTS.values())
+        dungeons = self.bulk_create(
+            Dungeon,
+            [
+                Dungeon(
+                    name=f"{self.fake.last_name()} {self.fake.word().title()}",
+                    rank=self.random.choices(ranks, weights)[0],
+                    location=self.fake.city(),
+                    is_open=self.random.random() < 0.9,
+                )
+                for _ in range(count)
+            ],
         )
-        dungeon3 = Dungeon.objects.create(
-            name="Dragon Lair", location="Jeju", rank="S", is_open=False
+        return [(dungeon.pk, dungeon.rank) for dungeon in dungeons]
+
+    def create_guilds(self, count):
+        guilds = self.bulk_create(
+            Guild, [Guild(name=self.fake.unique.company()) for _ in range(count)]
         )
+        return [guild.pk for guild in guilds]
 
-        self.stdout.write("Creating raids...")
-        raid1 = Raid.objects.create(
-            name="Goblin Hunt",
-            dungeon=dungeon1,
-            date=date.today(),
-            success=True,
+    def create_hunters(self, count, guild_ids, skill_ids):
+        password = make_password(PASSWORD)
+        first_names = [self.fake.first_name() for _ in range(NAME_POOL_SIZE)]
+        last_names = [self.fake.last_name() for _ in range(NAME_POOL_SIZE)]
+        domains = [self.fake.free_email_domain() for _ in range(20)]
+        ranks = list(RANK_WEIGHTS)
+        rank_weights = list(accumulate(RANK_WEIGHTS.values()))
+        # A few big guilds and popular skills, and a long tail of small ones
+        guild_weights = zipf_weights(len(guild_ids))
+        skill_weights = zipf_weights(len(skill_ids))
+        Through = Hunter.skills.through
+
+        admin = Hunter(
+            username="admin",
+            email="admin@example.com",
+            password=password,
+            rank="S",
+            power_level=RANK_BASE_POWER["S"],
+            is_staff=True,
+            is_superuser=True,
         )
-        raid2 = Raid.objects.create(
-            name="Dragon Hunt",
-            dungeon=dungeon3,
-            date=date.today() - timedelta(days=7),
-            success=False,
+        admin.save()
+        hunter_ids = []
+        leaders = {}
+        for start in range(0, count, self.batch_size):
+            hunters, hunter_skills = [], []
+            for i in range(start, min(start + self.batch_size, count)):
+                first_name = self.random.choice(first_names)
+                last_name = self.random.choice(last_names)
+                username = f"{first_name}.{last_name}.{i}".lower()
+                rank = self.random.choices(ranks, cum_weights=rank_weights)[0]
+                guild_id = None
+                if guild_ids and self.random.random() < GUILD_MEMBER_SHARE:
+                    guild_id = self.random.choices(
+                        guild_ids, cum_weights=guild_weights
+                    )[0]
+                hunters.append(
+                    Hunter(
+                        username=username,
+                        first_name=first_name,
+                        last_name=last_name,
+                        email=f"{username}@{self.random.choice(domains)}",
+                        password=password,
+                        rank=rank,
+                        guild_id=guild_id,
+                        power_level=RANK_BASE_POWER[rank],
+                    )
+                )
+                k = min(self.random.randint(0, MAX_SKILLS_PER_HUNTER), len(skill_ids))
+                chosen = set()
+                while len(chosen) < k:
+                    chosen.add(
+                        self.random.choices(skill_ids, cum_weights=skill_weights)[0]
+                    )
+                hunter_skills.append(chosen)
+
+            self.bulk_create(Hunter, hunters)
+            self.bulk_create(
+                Through,
+                [
+                    Through(hunter_id=hunter.pk, skill_id=skill_id)
+                    for hunter, chosen in zip(hunters, hunter_skills)
+                    for skill_id in chosen
+                ],
+            )
+            for hunter in hunters:
+                hunter_ids.append(hunter.pk)
+                if hunter.guild_id is not None:
+                    leaders.setdefault(hunter.guild_id, hunter.pk)
+            self.stdout.write(f"Created {len(hunter_ids)} hunters...")
+
+        Guild.objects.bulk_update(
+            [Guild(pk=guild_id, leader_id=pk) for guild_id, pk in leaders.items()],
+            ["leader"],
+            batch_size=self.batch_size,
         )
+        return hunter_ids
+
+    def create_raids(self, count, dungeons, hunter_ids):
+        if not dungeons or not hunter_ids:
+            return
+        today = date.today()
+        roles = list(ROLE_WEIGHTS)
+        role_weights = list(accumulate(ROLE_WEIGHTS.values()))
+        dungeon_weights = zipf_weights(len(dungeons))
+        # A core of very active hunters takes part in most raids
+        hunter_weights = zipf_weights(len(hunter_ids), exponent=0.8)
+        total = hunter_weights[-1]
 
-        RaidParticipation.objects.create(raid=raid1, hunter=hunters[0], role="Tank")
-        RaidParticipation.objects.create(raid=raid1, hunter=hunters[1], role="DPS")
-        RaidParticipation.objects.create(raid=raid2, hunter=hunters[2], role="Healer")
+        for start in range(0, count, self.batch_size):
+            raids, teams = [], []
+            for i in range(start, min(start + self.batch_size, count)):
+                dungeon_id, rank = self.random.choices(
+                    dungeons, cum_weights=dungeon_weights
+                )[0]
+                raids.append(
+                    Raid(
+                        name=f"{self.fake.word().title()} Raid {i + 1}",
+                        dungeon_id=dungeon_id,
+                        date=today
+                        - timedelta(days=self.random.randrange(RAID_HISTORY_DAYS)),
+                        success=self.random.random() < SUCCESS_RATE[rank],
+                    )
+                )
+                size = min(self.random.randint(*TEAM_SIZE), len(hunter_ids))
+                team = set()
+                while len(team) < size:
+                    position = bisect_left(hunter_weights, self.random.random() * total)
+                    team.add(hunter_ids[min(position, len(hunter_ids) - 1)])
+                teams.append(team)
 
-        self.stdout.write(self.style.SUCCESS("Database populated successfully!"))
+            self.bulk_create(Raid, raids)
+            self.bulk_create(
+                RaidParticipation,
+                [
+                    RaidParticipation(
+                        raid_id=raid.pk,
+                        hunter_id=hunter_id,
+                        role=self.random.choices(roles, cum_weights=role_weights)[0],
+                    )
+                    for raid, team in zip(raids, teams)
+                    for hunter_id in team
+                ],
+            )
+            self.stdout.write(f"Created {start + len(raids)} raids...")
@@ -0,0 +1,26 @@
+from datetime import timedelta
+
+from api.sync import TOMBSTONE_RETENTION, prune_tombstones
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = "Delete tombstones older than the delta-sync retention window"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=TOMBSTONE_RETENTION.days,
+            help=(
+                f"Keep tombstones this many days, at least "
+                f"{TOMBSTONE_RETENTION.days} (the default)"
+            ),
+        )
+
+    def handle(self, *args, **options):
+        try:
+            deleted = prune_tombstones(timedelta(days=options["days"]))
+        except ValueError as exc:
+            raise CommandError(exc)
+        self.stdout.write(self.style.SUCCESS(f"Pruned {deleted} tombstones."))
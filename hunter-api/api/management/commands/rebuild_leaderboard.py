@@ -0,0 +1,21 @@
+from api import leaderboard
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = "Repopulate the Redis hunter and guild leaderboards from the database"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Number of hunters read and written per batch (default: 5000)",
+        )
+
+    def handle(self, *args, **options):
+        self.stdout.write("Rebuilding leaderboards...")
+        hunters, guilds = leaderboard.rebuild(chunk_size=options["chunk_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Ranked {hunters} hunters and {guilds} guilds.")
+        )
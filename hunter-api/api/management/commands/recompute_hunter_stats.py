@@ -0,0 +1,37 @@
+from api.models import Hunter
+from api.stats import recompute_hunter_stats
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max, Min
+
+
+class Command(BaseCommand):
+    help = "Rebuild the denormalized power_level and raid_count of every hunter"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=5000,
+            help="Number of hunter ids updated per transaction (default: 5000)",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        bounds = Hunter.objects.aggregate(first=Min("pk"), last=Max("pk"))
+        if bounds["first"] is None:
+            self.stdout.write("No hunters to update.")
+            return
+
+        updated = 0
+        # Walk primary key ranges so each UPDATE stays small and index-driven
+        for start in range(bounds["first"], bounds["last"] + 1, chunk_size):
+            with transaction.atomic():
+                updated += recompute_hunter_stats(
+                    Hunter.objects.filter(pk__gte=start, pk__lt=start + chunk_size)
+                )
+            self.stdout.write(f"Updated {updated} hunters...")
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Recomputed stats, {updated} hunters corrected.")
+        )
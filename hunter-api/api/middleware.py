@@ -0,0 +1,138 @@
+from api import db, instrumentation, profiling
+from api.cache import adeferred_invalidation, deferred_invalidation
+from asgiref.sync import (
+    async_to_sync,
+    iscoroutinefunction,
+    markcoroutinefunction,
+    sync_to_async,
+)
+from rest_framework.permissions import SAFE_METHODS
+from silk.middleware import SilkyMiddleware
+
+
+class AsyncCapableMiddleware:
+    """
+    Base for middleware that runs in sync and async mode, so an async view
+    under ASGI is not pushed onto a thread. Subclasses implement handle() for
+    sync mode and ahandle() for async mode.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.ahandle(request)
+        return self.handle(request)
+
+
+class ServerTimingMiddleware(AsyncCapableMiddleware):
+    """
+    Add Server-Timing (db, cache, serialize, render, total) and X-DB-Queries
+    headers to every response. Installed first, so total covers the whole
+    middleware stack.
+    """
+
+    def handle(self, request):
+        with instrumentation.collect() as metrics:
+            response = self.get_response(request)
+            return self.add_headers(response, metrics)
+
+    async def ahandle(self, request):
+        with instrumentation.collect() as metrics:
+            response = await self.get_response(request)
+            return self.add_headers(response, metrics)
+
+    def add_headers(self, response, metrics):
+        response["Server-Timing"] = metrics.server_timing()
+        response["X-DB-Queries"] = metrics.queries
+        return response
+
+
+class PrimaryReplicaMiddleware(AsyncCapableMiddleware):
+    """
+    Route the reads of a request (see api.db.PrimaryReplicaRouter). An unsafe
+    request reads from the primary throughout; if it succeeds, its user reads
+    from the primary for a while after, so they see their own writes.
+    """
+
+    def handle(self, request):
+        if request.method in SAFE_METHODS:
+            with db.routing(request):
+                return self.get_response(request)
+        with db.use_primary():
+            response = self.get_response(request)
+            if response.status_code < 400:
+                db.stick_to_primary(getattr(request, "user", None))
+            return response
+
+    async def ahandle(self, request):
+        if request.method in SAFE_METHODS:
+            with db.routing(request):
+                return await self.get_response(request)
+        with db.use_primary():
+            response = await self.get_response(request)
+            if response.status_code < 400:
+                # The user may still be a lazy session lookup
+                await sync_to_async(db.stick_to_primary)(getattr(request, "user", None))
+            return response
+
+
+class DeferredInvalidationMiddleware(AsyncCapableMiddleware):
+    """Apply the cache invalidations a request commits once, after the view."""
+
+    def handle(self, request):
+        with deferred_invalidation():
+            return self.get_response(request)
+
+    async def ahandle(self, request):
+        async with adeferred_invalidation():
+            return await self.get_response(request)
+
+
+class ProfilingMiddleware(AsyncCapableMiddleware):
+    """
+    Record a sample of requests with silk instead of every one.
+
+    PROFILING_SAMPLE_RATE of requests are recorded with their SQL. A request
+    that asks for it with X-Profile (see api.profiling.wants_deep_profile) is
+    always recorded, with a cProfile call stack as well. Every other request
+    bypasses silk entirely.
+    """
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        # Silk is sync only; in async mode it runs in a thread
+        if self.async_mode:
+            self.silk = SilkyMiddleware(async_to_sync(get_response))
+        else:
+            self.silk = SilkyMiddleware(get_response)
+
+    def handle(self, request):
+        request.deep_profile = profiling.wants_deep_profile(request)
+        if not request.deep_profile and not profiling.sampled():
+            return self.get_response(request)
+        return self.record(request)
+
+    async def ahandle(self, request):
+        # Checking the header may load the session user, a query
+        request.deep_profile = False
+        if profiling.PROFILE_HEADER in request.headers:
+            request.deep_profile = await sync_to_async(profiling.wants_deep_profile)(
+                request
+            )
+        if not request.deep_profile and not profiling.sampled():
+            return await self.get_response(request)
+        # Silk's collector is thread-local: it must be started, stopped and
+        # cleared on one thread. The view's own sync work runs there too.
+        return await sync_to_async(self.record, thread_sensitive=True)(request)
+
+    def record(self, request):
+        with profiling.recording():
+            return self.silk(request)
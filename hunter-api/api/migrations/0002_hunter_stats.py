@@ -0,0 +1,56 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:38
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def backfill_hunter_stats(apps, schema_editor):
+    from api.models import rank_base_power
+
+    Hunter = apps.get_model("api", "Hunter")
+    RaidParticipation = apps.get_model("api", "RaidParticipation")
+    skill_power = (
+        Hunter.skills.through.objects.filter(hunter=OuterRef("pk"))
+        .values("hunter")
+        .annotate(total=Sum("skill__power"))
+        .values("total")
+    )
+    raid_count = (
+        RaidParticipation.objects.filter(hunter=OuterRef("pk"))
+        .values("hunter")
+        .annotate(total=Count("raid", distinct=True))
+        .values("total")
+    )
+    Hunter.objects.update(
+        power_level=rank_base_power() + Coalesce(Subquery(skill_power), Value(0)),
+        raid_count=Coalesce(Subquery(raid_count), Value(0)),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0001_initial"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="hunter",
+            name="power_level",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="hunter",
+            name="raid_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name="hunter",
+            index=models.Index(
+                fields=["-power_level", "id"], name="hunter_power_level_idx"
+            ),
+        ),
+        migrations.RunPython(backfill_hunter_stats, migrations.RunPython.noop),
+    ]
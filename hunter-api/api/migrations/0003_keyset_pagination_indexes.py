@@ -0,0 +1,31 @@
+# Generated by Django 5.2.5 on 2026-10-18 08:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_hunter_stats"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="dungeon",
+            index=models.Index(fields=["name", "id"], name="dungeon_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="guild",
+            index=models.Index(
+                fields=["founded_date", "name", "id"], name="guild_founded_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="raid",
+            index=models.Index(fields=["date", "id"], name="raid_date_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="skill",
+            index=models.Index(fields=["name", "id"], name="skill_name_idx"),
+        ),
+    ]
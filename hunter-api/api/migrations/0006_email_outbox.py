@@ -0,0 +1,61 @@
+# Generated by Django 5.2.5 on 2026-10-18 09:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0005_tombstone"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EmailOutbox",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("recipient", models.EmailField(max_length=254)),
+                ("template", models.CharField(max_length=50)),
+                ("object_id", models.PositiveBigIntegerField(blank=True, null=True)),
+                ("subject", models.CharField(max_length=255)),
+                ("body", models.TextField()),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("Pending", "Pending"),
+                            ("Sent", "Sent"),
+                            ("Duplicate", "Duplicate"),
+                            ("Failed", "Failed"),
+                        ],
+                        default="Pending",
+                        max_length=10,
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0)),
+                ("last_error", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("sent_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "verbose_name_plural": "Email outbox",
+                "indexes": [
+                    models.Index(
+                        fields=["status", "created_at"], name="outbox_status_idx"
+                    ),
+                    models.Index(
+                        fields=["recipient", "template", "object_id", "sent_at"],
+                        name="outbox_dedupe_idx",
+                    ),
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.5 on 2026-10-18 10:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_email_outbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="emailoutbox",
+            name="claimed_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="emailoutbox",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("Pending", "Pending"),
+                    ("Sending", "Sending"),
+                    ("Sent", "Sent"),
+                    ("Duplicate", "Duplicate"),
+                    ("Failed", "Failed"),
+                ],
+                default="Pending",
+                max_length=10,
+            ),
+        ),
+    ]
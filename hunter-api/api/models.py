@@ -1,9 +1,73 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import Case, IntegerField, Value, When
+
+# Base power granted by each hunter rank, before skills are added
+RANK_BASE_POWER = {"E": 10, "D": 30, "C": 50, "B": 80, "A": 120, "S": 200}
+
+
+def rank_base_power(field="rank"):
+    """SQL expression mapping the rank stored in ``field`` to its base power."""
+    return Case(
+        *(When(**{field: k}, then=Value(v)) for k, v in RANK_BASE_POWER.items()),
+        output_field=IntegerField(),
+    )
+
+
+class TrackChangesMixin:
+    """
+    Remembers the values an instance was loaded or last saved with, so
+    api.signals can tell which fields a save actually changed.
+    """
+
+    _loaded_values = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._remember_values()
+        return instance
+
+    def _remember_values(self, fields=None):
+        loaded = dict(self._loaded_values or {})
+        for field in self._meta.concrete_fields:
+            if field.attname in self.__dict__ and (
+                fields is None or field.name in fields or field.attname in fields
+            ):
+                loaded[field.attname] = self.__dict__[field.attname]
+        self._loaded_values = loaded
+
+    def loaded_value(self, attname, default=None):
+        return (self._loaded_values or {}).get(attname, default)
+
+    def changed_fields(self):
+        """
+        Names of the fields whose value differs from the loaded one, or None
+        for an instance that was never loaded from the database.
+        """
+        if self._loaded_values is None:
+            return None
+        missing = object()
+        return {
+            field.name
+            for field in self._meta.concrete_fields
+            if field.attname in self.__dict__
+            and self._loaded_values.get(field.attname, missing)
+            != self.__dict__[field.attname]
+        }
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # After every post_save receiver, which still sees the old values
+        self._remember_values(kwargs.get("update_fields"))
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using, fields, from_queryset)
+        self._remember_values(fields)
 
 
 # Create your models here.
-class Hunter(AbstractUser):
+class Hunter(TrackChangesMixin, AbstractUser):
     class RankChoices(models.TextChoices):
         E = "E", "E-Rank"
         D = "D", "D-Rank"
@@ -25,10 +89,30 @@ class Hunter(AbstractUser):
     completed_raids = models.ManyToManyField(
         "Raid", through="RaidParticipation", related_name="completed_by"
     )
+    # Denormalized stats, maintained by api.signals and api.stats
+    power_level = models.PositiveIntegerField(default=0, editable=False)
+    raid_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    STAT_FIELDS = ("power_level", "raid_count")
 
     class Meta:
         verbose_name = "Hunter"
         verbose_name_plural = "Hunters"
+        indexes = [
+            models.Index(fields=["-power_level", "id"], name="hunter_power_level_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        # Stats are updated set-based elsewhere; a full save of a stale instance
+        # must not write them back over newer values.
+        if not self._state.adding and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                f.name
+                for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.STAT_FIELDS
+            ]
+        super().save(*args, **kwargs)
 
     @property
     def full_name(self):
@@ -38,20 +122,11 @@ class Hunter(AbstractUser):
     def rank_display(self):
         return self.get_rank_display()
 
-    @property
-    def power_level(self):
-        base_power = {"E": 10, "D": 30, "C": 50, "B": 80, "A": 120, "S": 200}
-        return base_power[self.rank] + sum(skill.power for skill in self.skills.all())
-
-    @property
-    def raid_count(self):
-        return self.completed_raids.count()
-
     def __str__(self):
         return f"{self.full_name} ({self.rank_display})"
 
 
-class Guild(models.Model):
+class Guild(TrackChangesMixin, models.Model):
     name = models.CharField(max_length=100)
     founded_date = models.DateField(auto_now_add=True)
     leader = models.OneToOneField(
@@ -61,6 +136,14 @@ class Guild(models.Model):
         blank=True,
         related_name="led_guild",
     )
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["founded_date", "name", "id"], name="guild_founded_idx"
+            ),
+        ]
 
     @property
     def member_count(self):
@@ -70,7 +153,7 @@ class Guild(models.Model):
         return self.name
 
 
-class Skill(models.Model):
+class Skill(TrackChangesMixin, models.Model):
     class ElementChoices(models.TextChoices):
         Fire = "Fire"
         Water = "Water"
@@ -81,18 +164,26 @@ class Skill(models.Model):
     name = models.CharField(max_length=100)
     element = models.CharField(max_length=10, choices=ElementChoices.choices)
     power = models.PositiveIntegerField()
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["name", "id"], name="skill_name_idx")]
 
     def __str__(self):
         return f"{self.name} ({self.element})"
 
 
-class Dungeon(models.Model):
+class Dungeon(TrackChangesMixin, models.Model):
     RANK_CHOICES = Hunter.RankChoices.choices
 
     name = models.CharField(max_length=100)
     rank = models.CharField(max_length=1, choices=RANK_CHOICES)
     location = models.CharField(max_length=200)
     is_open = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["name", "id"], name="dungeon_name_idx")]
 
     @property
     def rank_display(self):
@@ -102,21 +193,26 @@ class Dungeon(models.Model):
         return f"{self.name} ({self.rank_display})"
 
 
-class Raid(models.Model):
+class Raid(TrackChangesMixin, models.Model):
     name = models.CharField(max_length=100)
     dungeon = models.ForeignKey(Dungeon, on_delete=models.CASCADE, related_name="raids")
     date = models.DateField()
     success = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["date", "id"], name="raid_date_idx")]
 
     @property
     def team_strength(self):
+        # Fallback for instances not loaded through RaidViewSet.get_queryset
         return sum(p.hunter.power_level for p in self.participations.all())
 
     def __str__(self):
         return f"{self.name} - {self.dungeon.name}"
 
 
-class RaidParticipation(models.Model):
+class RaidParticipation(TrackChangesMixin, models.Model):
     class RoleChoices(models.TextChoices):
         Tank = "Tank"
         DPS = "DPS"
@@ -130,7 +226,66 @@ class RaidParticipation(models.Model):
         Hunter, on_delete=models.CASCADE, related_name="participations"
     )
     role = models.CharField(max_length=10, choices=RoleChoices.choices)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
 
     def __str__(self):
         full_name = f"{self.hunter.first_name} {self.hunter.last_name}".strip()
         return f"{full_name} in {self.raid.name} as {self.role}"
+
+
+class Tombstone(models.Model):
+    """Id of a deleted object, kept so delta-sync clients can drop it too."""
+
+    model = models.CharField(max_length=50)
+    object_id = models.PositiveBigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["model", "deleted_at"], name="tombstone_model_idx")
+        ]
+
+    def __str__(self):
+        return f"{self.model} {self.object_id} deleted at {self.deleted_at}"
+
+
+class EmailOutbox(models.Model):
+    """
+    Email written in the same transaction as the change that triggers it and
+    delivered later by api.outbox.drain().
+    """
+
+    class StatusChoices(models.TextChoices):
+        Pending = "Pending"
+        Sending = "Sending"
+        Sent = "Sent"
+        Duplicate = "Duplicate"
+        Failed = "Failed"
+
+    recipient = models.EmailField()
+    template = models.CharField(max_length=50)
+    object_id = models.PositiveBigIntegerField(null=True, blank=True)
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    status = models.CharField(
+        max_length=10, choices=StatusChoices.choices, default=StatusChoices.Pending
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # When a drain claimed the message for sending
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        verbose_name_plural = "Email outbox"
+        indexes = [
+            models.Index(fields=["status", "created_at"], name="outbox_status_idx"),
+            models.Index(
+                fields=["recipient", "template", "object_id", "sent_at"],
+                name="outbox_dedupe_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.template} to {self.recipient} ({self.status})"
@@ -0,0 +1,262 @@
+import logging
+import time
+from datetime import timedelta
+
+from api.models import EmailOutbox, RaidParticipation
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import transaction
+from django.db.models import Count, Min, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Messages claimed per drain
+BATCH_SIZE = 500
+
+# Messages per chunk task of drain_email_outbox; each chunk shares one SMTP
+# connection
+CHUNK_SIZE = 50
+
+# A (recipient, template, object) already sent this recently is not resent
+DEDUPE_WINDOW = timedelta(hours=1)
+
+MAX_ATTEMPTS = 5
+
+# Messages still Sending this long after being claimed belong to a drain that
+# died; much longer than a batch takes to send
+CLAIM_TIMEOUT = timedelta(minutes=15)
+
+Status = EmailOutbox.StatusChoices
+
+
+def _message(recipient, template, object_id, subject, body):
+    return EmailOutbox(
+        recipient=recipient,
+        template=template,
+        object_id=object_id,
+        subject=subject,
+        body=body,
+    )
+
+
+def welcome(hunters):
+    """Queue the welcome email for newly registered hunters."""
+    return EmailOutbox.objects.bulk_create(
+        _message(
+            hunter.email,
+            "welcome",
+            hunter.pk,
+            "Welcome to the Hunter Network",
+            f"Hi {hunter.first_name},\n\nWelcome to the Hunter Network! "
+            "Start exploring dungeons, joining raids, and leveling up your skills.",
+        )
+        for hunter in hunters
+        if hunter.email
+    )
+
+
+def guild_invite(hunter, guild):
+    return EmailOutbox.objects.create(
+        recipient=hunter.email,
+        template="guild_invite",
+        object_id=guild.pk,
+        subject=f"You are invited to join the guild {guild.name}",
+        body=f'Hi {hunter.first_name},\n\nYou have been invited to join the guild "{guild.name}".',
+    )
+
+
+def guild_created(guild):
+    leader = guild.leader
+    if not leader or not leader.email:
+        return None
+    return EmailOutbox.objects.create(
+        recipient=leader.email,
+        template="guild_created",
+        object_id=guild.pk,
+        subject=f"Guild Created: {guild.name}",
+        body=f'Hi {leader.first_name},\n\nYour guild "{guild.name}" has been created.',
+    )
+
+
+def raid_notification(raid):
+    """Queue the raid notification for every participant, loaded in one query."""
+    hunters = {
+        p.hunter.email: p.hunter
+        for p in RaidParticipation.objects.filter(raid=raid)
+        .select_related("hunter")
+        .only("hunter__first_name", "hunter__email")
+        if p.hunter.email
+    }
+    return EmailOutbox.objects.bulk_create(
+        _message(
+            email,
+            "raid_notification",
+            raid.pk,
+            f"Raid Notification: {raid.name}",
+            f'Hi {hunter.first_name},\n\nYou are participating in the raid "{raid.name}" '
+            f"on {raid.date}. Be prepared!",
+        )
+        for email, hunter in hunters.items()
+    )
+
+
+def drain(batch_size=BATCH_SIZE):
+    """
+    Send up to ``batch_size`` pending messages over one SMTP connection.
+
+    Messages are claimed in a short transaction: rows are locked with
+    SELECT ... FOR UPDATE SKIP LOCKED, so several drainers can run at once,
+    marked Sending and committed. They are then sent outside any
+    transaction, and each result is written as soon as its send returns, so
+    a crash or a failed write never sends a message that was already sent.
+    A message whose (recipient, template, object) was already sent within
+    DEDUPE_WINDOW, is being sent, or appears earlier in the batch, is marked
+    Duplicate instead. Failed sends go back to Pending until MAX_ATTEMPTS.
+    Returns throughput and lag metrics for the run.
+
+    The drain_email_outbox task sends a batch in parallel chunks instead.
+    """
+    started = time.monotonic()
+    release_stale_claims()
+    batch, outgoing = claim(batch_size)
+    results = [send(outgoing)] if outgoing else []
+    return report(
+        len(batch), len(batch) - len(outgoing), results, time.monotonic() - started
+    )
+
+
+def claim(batch_size):
+    """
+    Claim up to ``batch_size`` pending messages: duplicates are marked as
+    such, the rest Sending. Returns the batch and the messages to send.
+    """
+    with transaction.atomic():
+        batch = list(
+            EmailOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status=Status.Pending)
+            .order_by("created_at", "id")[:batch_size]
+        )
+        seen = set(
+            EmailOutbox.objects.filter(
+                Q(status=Status.Sent, sent_at__gte=timezone.now() - DEDUPE_WINDOW)
+                | Q(status=Status.Sending),
+                recipient__in={message.recipient for message in batch},
+            ).values_list("recipient", "template", "object_id")
+        )
+        claimed_at = timezone.now()
+        outgoing = []
+        for message in batch:
+            key = (message.recipient, message.template, message.object_id)
+            if key in seen:
+                message.status = Status.Duplicate
+            else:
+                seen.add(key)
+                message.status = Status.Sending
+                message.claimed_at = claimed_at
+                message.attempts += 1
+                outgoing.append(message)
+        EmailOutbox.objects.bulk_update(batch, ["status", "claimed_at", "attempts"])
+    return batch, outgoing
+
+
+def send(messages):
+    """
+    Send claimed messages over one SMTP connection, one at a time so a bad
+    recipient fails alone, and write each result as soon as its send returns.
+
+    Returns how many were sent, the recipients that failed and the longest
+    time from enqueue to delivery, in seconds.
+    """
+    sent, failed, max_lag = 0, [], 0.0
+    with get_connection() as connection:
+        for message in messages:
+            email = EmailMessage(
+                message.subject,
+                message.body,
+                settings.DEFAULT_FROM_EMAIL,
+                [message.recipient],
+            )
+            try:
+                connection.send_messages([email])
+            except Exception as exc:
+                logger.warning("Outbox message %s failed: %s", message.pk, exc)
+                status = Status.Pending
+                if message.attempts >= MAX_ATTEMPTS:
+                    status = Status.Failed
+                EmailOutbox.objects.filter(pk=message.pk).update(
+                    status=status, last_error=str(exc), claimed_at=None
+                )
+                failed.append(message.recipient)
+            else:
+                sent_at = timezone.now()
+                EmailOutbox.objects.filter(pk=message.pk).update(
+                    status=Status.Sent, sent_at=sent_at
+                )
+                sent += 1
+                max_lag = max(max_lag, (sent_at - message.created_at).total_seconds())
+    return {"sent": sent, "failed": failed, "max_lag_seconds": max_lag}
+
+
+def send_claimed(ids):
+    """send() the messages with these ids that are still claimed."""
+    return send(
+        EmailOutbox.objects.filter(pk__in=ids, status=Status.Sending).order_by("id")
+    )
+
+
+def report(claimed, duplicates, results, seconds):
+    """
+    Metrics of a drain from the send() results of its chunks; failed
+    recipients are logged as a warning.
+    """
+    sent = sum(result["sent"] for result in results)
+    failed = [recipient for result in results for recipient in result["failed"]]
+    metrics = {
+        "claimed": claimed,
+        "sent": sent,
+        "duplicates": duplicates,
+        "failed": len(failed),
+        "seconds": round(seconds, 3),
+        "per_second": round(sent / seconds, 1) if seconds else 0.0,
+        # Time from enqueue to delivery for the oldest message sent this run
+        "max_lag_seconds": max(
+            (result["max_lag_seconds"] for result in results), default=0.0
+        ),
+        **backlog(),
+    }
+    if claimed:
+        logger.info("Outbox drain: %s", metrics)
+    if failed:
+        logger.warning(
+            "Outbox drain: %s sent, %s failed: %s", sent, len(failed), ", ".join(failed)
+        )
+    return metrics
+
+
+def release_stale_claims(timeout=CLAIM_TIMEOUT):
+    """
+    Return messages claimed more than ``timeout`` ago, by a drain that died
+    before recording their result, to Pending. Only the message in flight
+    when it died may have gone out already.
+    """
+    released = EmailOutbox.objects.filter(
+        status=Status.Sending, claimed_at__lt=timezone.now() - timeout
+    ).update(status=Status.Pending, claimed_at=None)
+    if released:
+        logger.warning("Outbox released %s stale claims", released)
+    return released
+
+
+def backlog():
+    """Pending message count and the age of the oldest one, in seconds."""
+    pending = EmailOutbox.objects.filter(status=Status.Pending).aggregate(
+        count=Count("id"), oldest=Min("created_at")
+    )
+    oldest = pending["oldest"]
+    return {
+        "pending": pending["count"],
+        "oldest_pending_seconds": (
+            (timezone.now() - oldest).total_seconds() if oldest else 0.0
+        ),
+    }
@@ -0,0 +1,162 @@
+import json
+from base64 import b64decode, b64encode
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination keyed on the full ordering tuple.
+
+    DRF's CursorPagination positions on the first ordering field only and
+    falls back to OFFSET for ties. Here the cursor stores the value of every
+    ordering field and pages with a composite ``(a, b, id) > (x, y, z)``
+    filter, so every page costs the same index range scan. ``id`` is appended
+    to the ordering when missing to keep the key unique. Ordering fields must
+    be non-null.
+    """
+
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    ordering = ("id",)
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """paginate_queryset() through the async ORM."""
+        queryset = self.page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        chunk_size = self.page_size + 1
+        return self.set_page([obj async for obj in queryset.aiterator(chunk_size)])
+
+    def page_queryset(self, queryset, request, view=None):
+        """The slice of ``queryset`` holding the requested page and one more row."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        if not any(field.lstrip("-") in ("id", "pk") for field in self.ordering):
+            self.ordering = (*self.ordering, "id")
+
+        self.reverse, self.position = self.decode_cursor(request) or (False, None)
+        ordering = self.ordering
+        if self.reverse:
+            ordering = tuple(_flip(field) for field in ordering)
+
+        queryset = queryset.order_by(*ordering)
+        if self.position is not None:
+            self.position = self.parse_position(queryset, self.position)
+            queryset = queryset.filter(_after(ordering, self.position))
+        return queryset[: self.page_size + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.page_size
+        self.page = results[: self.page_size]
+        if self.reverse:
+            self.page.reverse()
+            self.has_next = self.position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.position is not None
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return self._link(False, self._position(self.page[-1]))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            # Stepped past the end; the previous page starts from the end again
+            return self._link(True, None)
+        return self._link(True, self._position(self.page[0]))
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        try:
+            data = json.loads(b64decode(encoded.encode("ascii")).decode("utf-8"))
+            reverse, position = bool(data["r"]), data["p"]
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if position is not None and (
+            not isinstance(position, list) or len(position) != len(self.ordering)
+        ):
+            raise NotFound(self.invalid_cursor_message)
+        return reverse, position
+
+    def parse_position(self, queryset, position):
+        """
+        The cursor's position converted to the Python values of the ordering
+        fields, so a tampered cursor is a 404 rather than a failing query.
+        """
+        try:
+            values = [
+                _ordering_field(queryset, field.lstrip("-")).to_python(value)
+                for field, value in zip(self.ordering, position)
+            ]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        # Ordering fields are non-null
+        if None in values:
+            raise NotFound(self.invalid_cursor_message)
+        return values
+
+    def encode_cursor(self, cursor):
+        reverse, position = cursor
+        data = json.dumps({"r": reverse, "p": position}, cls=DjangoJSONEncoder)
+        encoded = b64encode(data.encode("utf-8")).decode("ascii")
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _link(self, reverse, position):
+        if position is None and not reverse:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor((reverse, position))
+
+    def _position(self, instance):
+        # Round-trip through JSON so dates and datetimes become plain strings
+        values = [getattr(instance, field.lstrip("-")) for field in self.ordering]
+        return json.loads(json.dumps(values, cls=DjangoJSONEncoder))
+
+
+def _flip(field):
+    return field[1:] if field.startswith("-") else f"-{field}"
+
+
+def _ordering_field(queryset, name):
+    annotation = queryset.query.annotations.get(name)
+    if annotation is not None:
+        return annotation.output_field
+    if name == "pk":
+        return queryset.model._meta.pk
+    return queryset.model._meta.get_field(name)
+
+
+def _after(ordering, position):
+    """Rows strictly after ``position`` in ``ordering``, as an OR of prefixes."""
+    condition = Q()
+    for i, field in enumerate(ordering):
+        name = field.lstrip("-")
+        lookup = "lt" if field.startswith("-") else "gt"
+        clause = Q(**{f"{name}__{lookup}": position[i]})
+        for prev_field, value in zip(ordering[:i], position[:i]):
+            clause &= Q(**{prev_field.lstrip("-"): value})
+        condition |= clause
+    return condition
@@ -0,0 +1,58 @@
+import random
+import threading
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db.models.sql.compiler import SQLCompiler
+from django.utils.crypto import constant_time_compare
+from silk.collector import DataCollector
+
+PROFILE_HEADER = "X-Profile"
+
+_lock = threading.Lock()
+_recording = 0
+
+
+def sampled():
+    return random.random() < settings.PROFILING_SAMPLE_RATE
+
+
+def wants_deep_profile(request):
+    """
+    A request asks for a deep profile with the X-Profile header. It is only
+    honoured from a staff session, or when the header carries PROFILING_TOKEN
+    (for clients authenticating with JWT, which middleware cannot see).
+    """
+    value = request.headers.get(PROFILE_HEADER)
+    if not value:
+        return False
+    user = getattr(request, "user", None)
+    if user is not None and user.is_staff:
+        return True
+    token = settings.PROFILING_TOKEN
+    return bool(token) and constant_time_compare(value, token)
+
+
+@contextmanager
+def recording():
+    """
+    Mark a request as recorded by silk for the duration of the block.
+
+    Silk patches SQLCompiler.execute_sql on the first request it records and
+    never removes the patch, so every later query pays for a stack trace.
+    Once the last recording in the process ends the original is put back,
+    and the thread's collector is cleared so later, unrecorded requests on
+    it are not attributed to this one.
+    """
+    global _recording
+    with _lock:
+        _recording += 1
+    try:
+        yield
+    finally:
+        DataCollector().clear()
+        with _lock:
+            _recording -= 1
+            if not _recording and hasattr(SQLCompiler, "_execute_sql"):
+                SQLCompiler.execute_sql = SQLCompiler._execute_sql
+                del SQLCompiler._execute_sql
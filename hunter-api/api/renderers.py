@@ -0,0 +1,18 @@
+from api.instrumentation import timed
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+
+class TimedRenderMixin:
+    """Reports rendering time as the "render" Server-Timing metric."""
+
+    def render(self, *args, **kwargs):
+        with timed("render"):
+            return super().render(*args, **kwargs)
+
+
+class TimedJSONRenderer(TimedRenderMixin, JSONRenderer):
+    pass
+
+
+class TimedBrowsableAPIRenderer(TimedRenderMixin, BrowsableAPIRenderer):
+    pass
@@ -0,0 +1,54 @@
+from collections import defaultdict
+
+from rest_framework import serializers
+
+
+class PreloadedPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    PrimaryKeyRelatedField that resolves ids from objects a list serializer
+    loaded up front with preload_related(), instead of one query per item.
+    Without preloaded objects it behaves like the parent class.
+    """
+
+    def to_internal_value(self, data):
+        preloaded = self.context.get("preloaded", {})
+        model = self.get_queryset().model
+        if model not in preloaded:
+            return super().to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        try:
+            return preloaded[model][int(data)]
+        except (TypeError, ValueError):
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        except KeyError:
+            self.fail("does_not_exist", pk_value=data)
+
+
+def _ids(value):
+    for item in value if isinstance(value, list) else [value]:
+        try:
+            if not isinstance(item, bool):
+                yield int(item)
+        except (TypeError, ValueError):
+            pass
+
+
+def preload_related(list_serializer, data, field_names):
+    """
+    Load every object the named relation fields reference across a list
+    payload, with one IN query per model, into the serializer context.
+    """
+    fields = list_serializer.child.fields
+    querysets = {}
+    ids = defaultdict(set)
+    for name in field_names:
+        relation = getattr(fields[name], "child_relation", fields[name])
+        queryset = relation.get_queryset()
+        querysets[queryset.model] = queryset
+        for item in data if isinstance(data, list) else []:
+            if isinstance(item, dict):
+                ids[queryset.model].update(_ids(item.get(name)))
+    list_serializer._context["preloaded"] = {
+        model: queryset.in_bulk(ids[model]) for model, queryset in querysets.items()
+    }
@@ -1,14 +1,93 @@
-from api.models import Guild, Hunter, Skill
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from api.models import RANK_BASE_POWER, Guild, Hunter, Skill
+from api.serializers.fields import PreloadedPrimaryKeyRelatedField, preload_related
+from api.signals import post_bulk_create
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import prefetch_related_objects
 from rest_framework import serializers
+from rest_framework.validators import UniqueValidator
 
 from .skill import SkillSerializer
 
+# PBKDF2 releases the GIL, so threads hash passwords in parallel
+PASSWORD_HASH_WORKERS = min(8, os.cpu_count() or 1)
+
+
+class HunterListSerializer(serializers.ListSerializer):
+    """
+    Bulk hunter creation: related ids and usernames are checked with one
+    query each, rows are inserted with bulk_create and skill links with one
+    through-table bulk_create.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Checked for the whole batch in to_internal_value instead
+        username = self.child.fields["username"]
+        username.validators = [
+            v for v in username.validators if not isinstance(v, UniqueValidator)
+        ]
+
+    def to_internal_value(self, data):
+        preload_related(self, data, ["guild", "skills"])
+        validated = super().to_internal_value(data)
+
+        usernames = [item["username"] for item in validated]
+        taken = set(
+            Hunter.objects.filter(username__in=usernames).values_list(
+                "username", flat=True
+            )
+        )
+        seen = set()
+        errors = []
+        for username in usernames:
+            if username in taken or username in seen:
+                errors.append(
+                    {"username": ["A user with that username already exists."]}
+                )
+            else:
+                errors.append({})
+            seen.add(username)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return validated
+
+    def create(self, validated_data):
+        with ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS) as pool:
+            hashes = list(
+                pool.map(make_password, [item["password"] for item in validated_data])
+            )
+
+        hunters, skills = [], []
+        for item, password in zip(validated_data, hashes):
+            item = dict(item, password=password)
+            skills.append(item.pop("skills", []))
+            hunter = Hunter(**item)
+            hunter.power_level = RANK_BASE_POWER.get(hunter.rank, 0)
+            hunters.append(hunter)
+
+        Through = Hunter.skills.through
+        with transaction.atomic():
+            Hunter.objects.bulk_create(hunters)
+            Through.objects.bulk_create(
+                Through(hunter_id=hunter.pk, skill_id=skill.pk)
+                for hunter, hunter_skills in zip(hunters, skills)
+                for skill in hunter_skills
+            )
+            post_bulk_create.send(sender=Hunter, instances=hunters)
+
+        prefetch_related_objects(hunters, "skills")
+        return hunters
+
 
 class HunterSerializer(serializers.ModelSerializer):
-    skills = serializers.PrimaryKeyRelatedField(
+    skills = PreloadedPrimaryKeyRelatedField(
         many=True, queryset=Skill.objects.all(), required=False
     )
-    guild = serializers.PrimaryKeyRelatedField(
+    guild = PreloadedPrimaryKeyRelatedField(
         queryset=Guild.objects.all(), required=False, allow_null=True
     )
     guild_name = serializers.CharField(source="guild.name", read_only=True)
@@ -41,6 +120,7 @@ class HunterSerializer(serializers.ModelSerializer):
             "power_level",
             "raid_count",
         ]
+        list_serializer_class = HunterListSerializer
         extra_kwargs = {
             "password": {
                 "write_only": True,
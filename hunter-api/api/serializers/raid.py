@@ -4,6 +4,9 @@ from api.serializers.raid_participation import (
     RaidParticipationNestedSerializer,
     RaidParticipationSerializer,
 )
+from api.signals import post_bulk_create
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
 from rest_framework import serializers
 
 
@@ -13,6 +16,10 @@ class RaidSerializer(serializers.ModelSerializer):
     )
     dungeon_info = DungeonBriefSerializer(source="dungeon", read_only=True)
     participations_info = serializers.SerializerMethodField()
+    participations_create = RaidParticipationNestedSerializer(
+        many=True, write_only=True, required=False
+    )
+    team_strength = serializers.SerializerMethodField()
 
     class Meta:
         model = Raid
@@ -25,7 +32,7 @@ class RaidSerializer(serializers.ModelSerializer):
             "success",
             "team_strength",
             "participations_info",
-            # "participations_create",
+            "participations_create",
         ]
         read_only_fields = [
             "id",
@@ -34,6 +41,12 @@ class RaidSerializer(serializers.ModelSerializer):
             "participations_info",
         ]
 
+    def get_team_strength(self, obj):
+        # Annotated by RaidViewSet.get_queryset; the model property is the fallback
+        if hasattr(obj, "team_strength_annotated"):
+            return obj.team_strength_annotated
+        return obj.team_strength
+
     def get_participations_info(self, obj):
         # Use the same serializer but only keep clean fields
         serializer = RaidParticipationSerializer(
@@ -43,15 +56,46 @@ class RaidSerializer(serializers.ModelSerializer):
         )
         return serializer.data
 
+    def validate_participations_create(self, value):
+        # update() would drop them; the roster has its own endpoints
+        if self.instance is not None:
+            raise serializers.ValidationError(
+                "Only accepted when creating a raid; change its participations "
+                "through the raid participation endpoints."
+            )
+        # Every hunter id checked with one IN query
+        hunters = Hunter.objects.in_bulk({item["hunter_id"] for item in value})
+        errors = [
+            (
+                {}
+                if item["hunter_id"] in hunters
+                else {"hunter_id": ["Hunter does not exist."]}
+            )
+            for item in value
+        ]
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return [dict(item, hunter=hunters[item["hunter_id"]]) for item in value]
+
     def create(self, validated_data):
         participations_data = validated_data.pop("participations_create", [])
-        raid = Raid.objects.create(**validated_data)
-
-        # Use validated data directly
-        for part_data in participations_data:
-            hunter_id = part_data["hunter_id"]
-            role = part_data["role"]
-            hunter = Hunter.objects.get(pk=hunter_id)
-            RaidParticipation.objects.create(raid=raid, hunter=hunter, role=role)
+        with transaction.atomic():
+            raid = Raid.objects.create(**validated_data)
+            participations = RaidParticipation.objects.bulk_create(
+                RaidParticipation(raid=raid, hunter=item["hunter"], role=item["role"])
+                for item in participations_data
+            )
+            if participations:
+                post_bulk_create.send(
+                    sender=RaidParticipation, instances=participations
+                )
 
+        # Load the roster the response shows in one query
+        prefetch_related_objects(
+            [raid],
+            Prefetch(
+                "participations",
+                queryset=RaidParticipation.objects.select_related("hunter"),
+            ),
+        )
         return raid
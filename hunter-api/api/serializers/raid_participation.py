@@ -1,8 +1,12 @@
 from api.models import Hunter, Raid, RaidParticipation
+from api.serializers.fields import PreloadedPrimaryKeyRelatedField, preload_related
+from api.signals import post_bulk_create
+from django.db import transaction
 from rest_framework import serializers
 
 
-# For better nested creation inside raid serializer
+# For better nested creation inside raid serializer. Hunter ids are checked
+# by RaidSerializer for the whole roster at once.
 class RaidParticipationNestedSerializer(serializers.ModelSerializer):
     hunter_id = serializers.IntegerField()
 
@@ -10,11 +14,6 @@ class RaidParticipationNestedSerializer(serializers.ModelSerializer):
         model = RaidParticipation
         fields = ["hunter_id", "role"]
 
-    def validate_hunter_id(self, value):
-        if not Hunter.objects.filter(pk=value).exists():
-            raise serializers.ValidationError("Hunter does not exist.")
-        return value
-
     def validate_role(self, value):
         valid_roles = [r[0] for r in RaidParticipation.RoleChoices.choices]
         if value not in valid_roles:
@@ -22,6 +21,19 @@ class RaidParticipationNestedSerializer(serializers.ModelSerializer):
         return value
 
 
+class RaidParticipationListSerializer(serializers.ListSerializer):
+    def to_internal_value(self, data):
+        preload_related(self, data, ["raid", "hunter"])
+        return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        participations = [RaidParticipation(**item) for item in validated_data]
+        with transaction.atomic():
+            RaidParticipation.objects.bulk_create(participations)
+            post_bulk_create.send(sender=RaidParticipation, instances=participations)
+        return participations
+
+
 class RaidParticipationSerializer(serializers.ModelSerializer):
     # Read-only fields
     raid_id = serializers.IntegerField(source="raid.id", read_only=True)
@@ -30,10 +42,8 @@ class RaidParticipationSerializer(serializers.ModelSerializer):
     hunter_rank = serializers.CharField(source="hunter.rank_display", read_only=True)
 
     # Write-only fields (for input)
-    raid = serializers.PrimaryKeyRelatedField(
-        queryset=Raid.objects.all(), write_only=True
-    )
-    hunter = serializers.PrimaryKeyRelatedField(
+    raid = PreloadedPrimaryKeyRelatedField(queryset=Raid.objects.all(), write_only=True)
+    hunter = PreloadedPrimaryKeyRelatedField(
         queryset=Hunter.objects.all(), write_only=True
     )
 
@@ -49,6 +59,7 @@ class RaidParticipationSerializer(serializers.ModelSerializer):
             "hunter_rank",
             "role",
         ]
+        list_serializer_class = RaidParticipationListSerializer
 
     def __init__(self, *args, **kwargs):
         fields = kwargs.pop("fields", None)  # 👈 allow dynamic fields
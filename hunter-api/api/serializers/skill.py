@@ -1,11 +1,23 @@
 from api.models import Skill
+from api.signals import post_bulk_create
+from django.db import transaction
 from rest_framework import serializers
 
 
+class SkillListSerializer(serializers.ListSerializer):
+    def create(self, validated_data):
+        skills = [Skill(**item) for item in validated_data]
+        with transaction.atomic():
+            Skill.objects.bulk_create(skills)
+            post_bulk_create.send(sender=Skill, instances=skills)
+        return skills
+
+
 class SkillSerializer(serializers.ModelSerializer):
     class Meta:
         model = Skill
         fields = ["id", "name", "element", "power"]
+        list_serializer_class = SkillListSerializer
 
     def validate_name(self, value):
         if not value.strip():
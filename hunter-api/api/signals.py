@@ -1,57 +1,375 @@
-from api.models import Dungeon, Guild, Hunter, Raid, RaidParticipation, Skill
-from django.core.cache import cache
-from django.db.models.signals import post_delete, post_save
-from django.dispatch import receiver
+from contextlib import contextmanager
+from functools import partial
 
+from api import leaderboard
+from api.cache import invalidate_cache, invalidate_detail
+from api.dependencies import LIST_NAMESPACES, affected_namespaces
+from api.models import (
+    RANK_BASE_POWER,
+    Dungeon,
+    Guild,
+    Hunter,
+    Raid,
+    RaidParticipation,
+    Skill,
+    Tombstone,
+)
+from api.stats import refresh_power_levels, refresh_raid_counts
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import Signal, receiver
+from django.utils import timezone
 
-def clear_cache(pattern: str):
-    cache.delete_pattern(pattern)
-    print(f"Cache cleared for pattern: {pattern}")
+# Hunter fields that appear on the leaderboard
+LEADERBOARD_FIELDS = {"rank", "guild", "first_name", "last_name", "username"}
+
+# Hunter fields a change of skills affects
+SKILL_CHANGE_FIELDS = {"skills", "power_level"}
+
+# Models whose deletions are logged for delta sync
+SYNCED_MODELS = (Hunter, Guild, Skill, Dungeon, Raid)
+
+# Sent by the bulk serializers with the created ``instances``, in place of
+# the post_save that bulk_create skips. Receivers handle a whole batch at once.
+post_bulk_create = Signal()
+
+
+def after_commit(func, *args):
+    """
+    Call ``func(*args)`` once the current transaction commits, and never if it
+    rolls back. For the leaderboard, which lives outside the database.
+    """
+    transaction.on_commit(partial(func, *args))
+
+
+@contextmanager
+def muted():
+    """
+    Disconnect every model signal receiver inside the block.
+
+    For bulk loads that rebuild stats, the leaderboard and caches themselves
+    once they are done, instead of per row.
+    """
+    signals = (pre_save, post_save, pre_delete, post_delete, m2m_changed)
+    saved = [(signal, signal.receivers) for signal in (*signals, post_bulk_create)]
+    try:
+        for signal, _ in saved:
+            signal.receivers = []
+            signal.sender_receivers_cache.clear()
+        yield
+    finally:
+        for signal, receivers in saved:
+            signal.receivers = receivers
+            signal.sender_receivers_cache.clear()
+
+
+def touch(model, pks):
+    """
+    Bump updated_at on rows whose payload changed through a related object,
+    so delta-sync clients pick them up. One UPDATE, no signals.
+
+    Stamped with the Python clock, like auto_now and the sync cursors: the
+    database's may lag it, which would date a change before a cursor already
+    handed out.
+    """
+    pks = set(pks) - {None}
+    if pks:
+        model.objects.filter(pk__in=pks).update(updated_at=timezone.now())
+
+
+def saved_fields(instance, signal=None, created=False, update_fields=None, **kwargs):
+    """
+    Fields a save changed: the dirty ones, narrowed to ``update_fields`` when
+    given. None stands for every field, when the object was created, deleted
+    or never loaded from the database.
+    """
+    if created or signal is post_delete:
+        return None
+    fields = instance.changed_fields()
+    if update_fields is not None:
+        update_fields = {instance._meta.get_field(name).name for name in update_fields}
+        fields = update_fields if fields is None else fields & update_fields
+    return fields
+
+
+def invalidate_lists(model, fields=None):
+    """Invalidate the list namespaces that read ``fields`` of ``model``."""
+    affected = affected_namespaces(model, fields)
+    invalidate_cache(*sorted(affected & LIST_NAMESPACES))
+    return affected
+
+
+def invalidate_hunters(hunter_ids, fields=None, guild_ids=()):
+    """
+    Invalidate what reads ``fields`` of the given hunters: list namespaces,
+    the hunters' own payloads, and the guilds and raids that include them.
+    """
+    affected = invalidate_lists(Hunter, fields)
+    hunter_ids = list(hunter_ids)
+    if not hunter_ids:
+        return
+    if "hunter" in affected:
+        invalidate_detail("hunter", *hunter_ids)
+    if "guild" in affected:
+        guild_ids = set(guild_ids) - {None}
+        invalidate_detail("guild", *guild_ids)
+        touch(Guild, guild_ids)
+    if "raid" in affected:
+        raid_ids = list(
+            RaidParticipation.objects.filter(hunter_id__in=hunter_ids)
+            .values_list("raid_id", flat=True)
+            .distinct()
+        )
+        invalidate_detail("raid", *raid_ids)
+        touch(Raid, raid_ids)
+
+
+# Keep the denormalized Hunter.power_level and Hunter.raid_count current,
+# together with the Redis leaderboard built from them
+@receiver(pre_save, sender=Hunter)
+def set_initial_power_level(sender, instance, **kwargs):
+    if instance._state.adding:
+        instance.power_level = RANK_BASE_POWER.get(instance.rank, 0)
+
+
+@receiver(post_save, sender=Hunter)
+def update_power_level_on_rank_change(sender, instance, created, **kwargs):
+    fields = saved_fields(instance, created=created, **kwargs)
+    if not created and (fields is None or "rank" in fields):
+        refresh_power_levels([instance.pk])
+        instance.refresh_from_db(fields=["power_level"])
+
+    if fields is None or LEADERBOARD_FIELDS.intersection(fields):
+        after_commit(leaderboard.update_hunters, [instance])
+
+
+@receiver(post_delete, sender=Hunter)
+def remove_hunter_from_leaderboard(sender, instance, **kwargs):
+    after_commit(leaderboard.remove_hunter, instance.pk)
+
+
+@receiver(m2m_changed, sender=Hunter.skills.through)
+def update_power_level_on_skills_change(
+    sender, instance, action, reverse, pk_set, **kwargs
+):
+    if action == "pre_clear" and reverse:
+        # The cleared hunters are no longer reachable once the rows are gone
+        instance._cleared_hunter_ids = list(
+            instance.hunters.values_list("pk", flat=True)
+        )
+    elif action in ("post_add", "post_remove", "post_clear"):
+        if not reverse:
+            refresh_power_levels([instance.pk])
+            instance.refresh_from_db(fields=["power_level"])
+            after_commit(leaderboard.update_hunters, [instance])
+            invalidate_hunters([instance.pk], SKILL_CHANGE_FIELDS)
+            return
+        if action == "post_clear":
+            hunter_ids = instance.__dict__.pop("_cleared_hunter_ids", [])
+        else:
+            hunter_ids = pk_set or []
+        if hunter_ids:
+            refresh_power_levels(hunter_ids)
+            after_commit(
+                leaderboard.sync_hunters, Hunter.objects.filter(pk__in=hunter_ids)
+            )
+            invalidate_hunters(hunter_ids, SKILL_CHANGE_FIELDS)
+
+
+@receiver(post_save, sender=Skill)
+def update_power_levels_on_skill_change(sender, instance, created, **kwargs):
+    fields = saved_fields(instance, created=created, **kwargs)
+    if not created and (fields is None or "power" in fields):
+        hunter_ids = list(instance.hunters.values_list("pk", flat=True))
+        refresh_power_levels(hunter_ids)
+        after_commit(leaderboard.sync_hunters, Hunter.objects.filter(pk__in=hunter_ids))
+        invalidate_hunters(hunter_ids, {"power_level"})
+
+
+@receiver(pre_delete, sender=Skill)
+def remember_skill_hunters(sender, instance, **kwargs):
+    instance._hunter_ids = list(instance.hunters.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Skill)
+def update_power_levels_on_skill_delete(sender, instance, **kwargs):
+    hunter_ids = getattr(instance, "_hunter_ids", [])
+    if hunter_ids:
+        refresh_power_levels(hunter_ids)
+        after_commit(leaderboard.sync_hunters, Hunter.objects.filter(pk__in=hunter_ids))
+        invalidate_hunters(hunter_ids, SKILL_CHANGE_FIELDS)
+
+
+def _has_other_participation(participation):
+    return (
+        RaidParticipation.objects.filter(
+            hunter_id=participation.hunter_id, raid_id=participation.raid_id
+        )
+        .exclude(pk=participation.pk)
+        .exists()
+    )
+
+
+@receiver(post_save, sender=RaidParticipation)
+def update_raid_count_on_participation_save(sender, instance, created, **kwargs):
+    if created:
+        if not _has_other_participation(instance):
+            Hunter.objects.filter(pk=instance.hunter_id).update(
+                raid_count=F("raid_count") + 1, updated_at=timezone.now()
+            )
+            invalidate_hunters([instance.hunter_id], {"raid_count"})
+    else:
+        loaded = (
+            instance.loaded_value("hunter_id", instance.hunter_id),
+            instance.loaded_value("raid_id", instance.raid_id),
+        )
+        if loaded != (instance.hunter_id, instance.raid_id):
+            hunter_ids = {loaded[0], instance.hunter_id}
+            refresh_raid_counts(hunter_ids)
+            invalidate_hunters(hunter_ids, {"raid_count"})
+
+
+@receiver(post_delete, sender=RaidParticipation)
+def update_raid_count_on_participation_delete(sender, instance, **kwargs):
+    if not _has_other_participation(instance):
+        Hunter.objects.filter(pk=instance.hunter_id, raid_count__gt=0).update(
+            raid_count=F("raid_count") - 1, updated_at=timezone.now()
+        )
+        invalidate_hunters([instance.hunter_id], {"raid_count"})
 
 
 @receiver([post_save, post_delete], sender=Hunter)
 def invalidate_hunter_cache(sender, instance, **kwargs):
-    clear_cache("*hunter_list*")
-    clear_cache("*participation_list*")
-    clear_cache("*guild_list*")
-    clear_cache("*raid_list*")
-    clear_cache("*skill_list*")
+    fields = saved_fields(instance, **kwargs)
+    if fields is not None and "rank" in fields:
+        # Refreshed from the rank by update_power_level_on_rank_change
+        fields.add("power_level")
+    guild_ids = {instance.guild_id, instance.loaded_value("guild_id")}
+    invalidate_hunters([instance.pk], fields, guild_ids)
 
 
 @receiver([post_save, post_delete], sender=Guild)
 def invalidate_guild_cache(sender, instance, **kwargs):
-    clear_cache("*guild_list*")
-    clear_cache("*hunter_list*")
+    affected = invalidate_lists(Guild, saved_fields(instance, **kwargs))
+    if "guild" in affected:
+        invalidate_detail("guild", instance.pk)
+    if "hunter" in affected:
+        # guild_name is part of every member's payload
+        if "_member_ids" in instance.__dict__:
+            member_ids = instance._member_ids
+        else:
+            member_ids = list(instance.members.values_list("pk", flat=True))
+        invalidate_detail("hunter", *member_ids)
+        touch(Hunter, member_ids)
 
 
 @receiver([post_save, post_delete], sender=Dungeon)
 def invalidate_dungeon_cache(sender, instance, **kwargs):
-    clear_cache("*dungeon_list*")
-    clear_cache("*raid_list*")
+    affected = invalidate_lists(Dungeon, saved_fields(instance, **kwargs))
+    if "dungeon" in affected:
+        invalidate_detail("dungeon", instance.pk)
+    if "raid" in affected:
+        raid_ids = list(instance.raids.values_list("pk", flat=True))
+        invalidate_detail("raid", *raid_ids)
+        touch(Raid, raid_ids)
 
 
 @receiver([post_save, post_delete], sender=Raid)
 def invalidate_raid_cache(sender, instance, **kwargs):
-    clear_cache("*raid_list*")
-    clear_cache("*participation_list*")
-    clear_cache("*hunter_list*")
+    affected = invalidate_lists(Raid, saved_fields(instance, **kwargs))
+    if "raid" in affected:
+        invalidate_detail("raid", instance.pk)
 
 
 @receiver([post_save, post_delete], sender=RaidParticipation)
 def invalidate_raid_participation_cache(sender, instance, **kwargs):
-    clear_cache("*participation_list*")
-    clear_cache("*raid_list*")
-    clear_cache("*hunter_list*")
+    affected = invalidate_lists(RaidParticipation, saved_fields(instance, **kwargs))
+    if "raid" in affected:
+        raid_ids = {instance.raid_id, instance.loaded_value("raid_id")}
+        invalidate_detail("raid", *(raid_ids - {None}))
+        touch(Raid, raid_ids)
 
 
 @receiver([post_save, post_delete], sender=Skill)
 def invalidate_skill_cache(sender, instance, **kwargs):
-    clear_cache("*skill_list*")
-    clear_cache("*hunter_list*")
+    affected = invalidate_lists(Skill, saved_fields(instance, **kwargs))
+    if "skill" in affected:
+        invalidate_detail("skill", instance.pk)
 
 
 # Add the leader as a member when a guild is created
 @receiver(post_save, sender=Guild)
 def add_leader_as_member(sender, instance, created, **kwargs):
     if created and instance.leader:
+        previous_guild_id = instance.leader.guild_id
         instance.members.add(instance.leader)
+        # members.add() is a bulk UPDATE, so Hunter signals don't see it
+        after_commit(leaderboard.update_hunters, [instance.leader])
+        invalidate_hunters(
+            [instance.leader.pk], {"guild"}, {instance.pk, previous_guild_id}
+        )
+        touch(Hunter, [instance.leader.pk])
+
+
+@receiver(post_save, sender=Guild)
+def update_guild_leaderboard(sender, instance, **kwargs):
+    after_commit(leaderboard.update_guild, instance)
+
+
+@receiver(pre_delete, sender=Guild)
+def remember_guild_members(sender, instance, **kwargs):
+    instance._member_ids = list(instance.members.values_list("pk", flat=True))
+
+
+@receiver(post_delete, sender=Guild)
+def remove_guild_from_leaderboard(sender, instance, **kwargs):
+    after_commit(
+        leaderboard.remove_guild, instance.pk, getattr(instance, "_member_ids", [])
+    )
+
+
+def record_tombstone(sender, instance, **kwargs):
+    Tombstone.objects.create(model=sender._meta.model_name, object_id=instance.pk)
+
+
+for model in SYNCED_MODELS:
+    post_delete.connect(
+        record_tombstone, sender=model, dispatch_uid=f"tombstone_{model.__name__}"
+    )
+
+
+@receiver(post_bulk_create, sender=Hunter)
+def hunters_bulk_created(sender, instances, **kwargs):
+    # Skill links were bulk-inserted as well, so add their power in one UPDATE
+    hunter_ids = [hunter.pk for hunter in instances]
+    refresh_power_levels(hunter_ids)
+    power_levels = dict(
+        Hunter.objects.filter(pk__in=hunter_ids).values_list("pk", "power_level")
+    )
+    for hunter in instances:
+        hunter.power_level = power_levels[hunter.pk]
+    after_commit(leaderboard.update_hunters, instances)
+    invalidate_hunters(hunter_ids, guild_ids={hunter.guild_id for hunter in instances})
+
+
+@receiver(post_bulk_create, sender=Skill)
+def skills_bulk_created(sender, instances, **kwargs):
+    invalidate_lists(Skill)
+
+
+@receiver(post_bulk_create, sender=RaidParticipation)
+def participations_bulk_created(sender, instances, **kwargs):
+    hunter_ids = {p.hunter_id for p in instances}
+    raid_ids = {p.raid_id for p in instances}
+    refresh_raid_counts(hunter_ids)
+    invalidate_hunters(hunter_ids, {"raid_count"})
+    invalidate_lists(RaidParticipation)
+    invalidate_detail("raid", *raid_ids)
+    touch(Raid, raid_ids)
@@ -0,0 +1,56 @@
+from api.models import Hunter, RaidParticipation, rank_base_power
+from django.db.models import Count, F, OuterRef, QuerySet, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+
+def power_level_expression():
+    """Rank base power plus the power of every skill, for the outer hunter."""
+    skill_power = (
+        Hunter.skills.through.objects.filter(hunter=OuterRef("pk"))
+        .values("hunter")
+        .annotate(total=Sum("skill__power"))
+        .values("total")
+    )
+    return rank_base_power() + Coalesce(Subquery(skill_power), Value(0))
+
+
+def raid_count_expression():
+    """Number of distinct raids the outer hunter took part in."""
+    raid_count = (
+        RaidParticipation.objects.filter(hunter=OuterRef("pk"))
+        .values("hunter")
+        .annotate(total=Count("raid", distinct=True))
+        .values("total")
+    )
+    return Coalesce(Subquery(raid_count), Value(0))
+
+
+def refresh_power_levels(hunters):
+    """Recompute power_level for a queryset or iterable of hunter ids in one UPDATE."""
+    if not isinstance(hunters, QuerySet):
+        hunters = Hunter.objects.filter(pk__in=list(hunters))
+    return hunters.update(
+        power_level=power_level_expression(), updated_at=timezone.now()
+    )
+
+
+def refresh_raid_counts(hunters):
+    """Recompute raid_count for a queryset or iterable of hunter ids in one UPDATE."""
+    if not isinstance(hunters, QuerySet):
+        hunters = Hunter.objects.filter(pk__in=list(hunters))
+    return hunters.update(raid_count=raid_count_expression(), updated_at=timezone.now())
+
+
+def recompute_hunter_stats(hunters):
+    """Rebuild every denormalized stat for the given hunters."""
+    # Only rows whose stats actually drifted get a new updated_at
+    drifted = hunters.alias(
+        new_power_level=power_level_expression(),
+        new_raid_count=raid_count_expression(),
+    ).exclude(power_level=F("new_power_level"), raid_count=F("new_raid_count"))
+    return drifted.update(
+        power_level=power_level_expression(),
+        raid_count=raid_count_expression(),
+        updated_at=timezone.now(),
+    )
@@ -0,0 +1,94 @@
+import json
+from base64 import b64decode, b64encode
+from datetime import datetime, timedelta
+
+from api.models import Tombstone
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+
+# Rows are stamped when saved, not when their transaction commits. Cursors
+# trail the clock by this much so a late commit is sent twice, never missed.
+SYNC_LAG = timedelta(seconds=5)
+
+# Tombstones older than this are pruned; older cursors need a full resync
+TOMBSTONE_RETENTION = timedelta(days=30)
+
+
+class SyncCursorExpired(APIException):
+    status_code = status.HTTP_410_GONE
+    default_detail = "changed_since is older than the deletion log; resync fully."
+    default_code = "sync_cursor_expired"
+
+
+def encode_cursor(timestamp, last_id=0):
+    data = json.dumps({"t": timestamp.isoformat(), "id": last_id})
+    return b64encode(data.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(value):
+    """
+    ``(timestamp, last_id)`` from an ISO 8601 timestamp or a cursor returned
+    by a previous sync.
+    """
+    try:
+        timestamp, last_id = parse_datetime(value), 0
+        if timestamp is None:
+            data = json.loads(b64decode(value.encode("ascii")).decode("utf-8"))
+            timestamp, last_id = datetime.fromisoformat(data["t"]), int(data["id"])
+    except (TypeError, ValueError, KeyError):
+        raise ValidationError(
+            {"changed_since": "Expected an ISO 8601 timestamp or a sync cursor."}
+        )
+    if timezone.is_naive(timestamp):
+        timestamp = timezone.make_aware(timestamp)
+    if timestamp < timezone.now() - TOMBSTONE_RETENTION:
+        raise SyncCursorExpired()
+    return timestamp, last_id
+
+
+def prune_tombstones(retention=TOMBSTONE_RETENTION):
+    """
+    Delete the tombstones older than ``retention``, never less than
+    TOMBSTONE_RETENTION: decode_cursor() accepts cursors that old, and their
+    clients would miss the deletions. Returns how many were deleted.
+    """
+    if retention < TOMBSTONE_RETENTION:
+        raise ValueError(
+            f"Tombstones must be kept at least {TOMBSTONE_RETENTION.days} days."
+        )
+    deleted, _ = Tombstone.objects.filter(
+        deleted_at__lt=timezone.now() - retention
+    ).delete()
+    return deleted
+
+
+def changes_since(queryset, timestamp, last_id=0, limit=100):
+    """
+    Rows of ``queryset`` changed after ``(timestamp, last_id)`` and the ids of
+    its model deleted since ``timestamp``.
+
+    Returns ``(changed, deleted, cursor, has_more)``. Rows come in
+    ``(updated_at, id)`` order, at most ``limit`` of them; when there are
+    more, the cursor continues right after the last row returned.
+    """
+    started = timezone.now()
+    changed = list(
+        queryset.filter(
+            Q(updated_at__gt=timestamp) | Q(updated_at=timestamp, pk__gt=last_id)
+        ).order_by("updated_at", "pk")[: limit + 1]
+    )
+    has_more = len(changed) > limit
+    tombstones = Tombstone.objects.filter(
+        model=queryset.model._meta.model_name, deleted_at__gt=timestamp
+    )
+    if has_more:
+        changed = changed[:limit]
+        position = (changed[-1].updated_at, changed[-1].pk)
+        tombstones = tombstones.filter(deleted_at__lte=position[0])
+    else:
+        position = max((timestamp, last_id), (started - SYNC_LAG, 0))
+    deleted = sorted(set(tombstones.values_list("object_id", flat=True)))
+    return changed, deleted, encode_cursor(*position), has_more
@@ -1,61 +1,121 @@
+import time
+
+from api import cache, db, outbox, sync
 from api.models import Guild, Hunter, Raid
-from celery import shared_task
-from django.conf import settings
-from django.core.mail import send_mail
+from celery import chord, shared_task
+
+# The send_* tasks only queue messages in the outbox; drain_email_outbox
+# delivers them. Views write to the outbox directly, inside their own
+# transaction, so these remain for callers outside a request.
+#
+# Tasks read from the primary: they are queued right after the writes they
+# act on, which a replica may not have yet.
 
 
 @shared_task
+@db.use_primary()
 def send_hunter_welcome_email(hunter_id):
     try:
         hunter = Hunter.objects.get(pk=hunter_id)
-        subject = "Welcome to the Hunter Network"
-        message = (
-            f"Hi {hunter.first_name},\n\nWelcome to the Hunter Network! "
-            "Start exploring dungeons, joining raids, and leveling up your skills."
-        )
-        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [hunter.email])
-        return f"Welcome email sent to {hunter.email}"
+        outbox.welcome([hunter])
+        return f"Welcome email queued for {hunter.email}"
     except Hunter.DoesNotExist:
         return f"Hunter with id {hunter_id} does not exist."
 
 
 @shared_task
+@db.use_primary()
 def send_guild_invite_email(hunter_id, guild_id):
     try:
         hunter = Hunter.objects.get(pk=hunter_id)
         guild = Guild.objects.get(pk=guild_id)
-        subject = f"You are invited to join the guild {guild.name}"
-        message = f'Hi {hunter.first_name},\n\nYou have been invited to join the guild "{guild.name}".'
-        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [hunter.email])
-        return f"Guild invite sent to {hunter.email}"
+        outbox.guild_invite(hunter, guild)
+        return f"Guild invite queued for {hunter.email}"
     except (Hunter.DoesNotExist, Guild.DoesNotExist):
         return f"Hunter or Guild does not exist."
 
 
 @shared_task
+@db.use_primary()
 def send_raid_notification_email(raid_id):
     try:
         raid = Raid.objects.get(pk=raid_id)
-        hunters = [p.hunter for p in raid.participations.all()]
-        subject = f"Raid Notification: {raid.name}"
-        for hunter in hunters:
-            message = (
-                f'Hi {hunter.first_name},\n\nYou are participating in the raid "{raid.name}" '
-                f"on {raid.date}. Be prepared!"
-            )
-            send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [hunter.email])
-        return f"Raid notifications sent to {len(hunters)} hunters."
+        messages = outbox.raid_notification(raid)
+        # Start the fan-out now rather than at the next beat
+        drain_email_outbox.delay()
+        return f"Raid notifications queued for {len(messages)} hunters."
     except Raid.DoesNotExist:
         return f"Raid with id {raid_id} does not exist."
 
 
 @shared_task
+@db.use_primary()
 def send_guild_creation_email(guild_id):
     try:
-        guild = Guild.objects.get(pk=guild_id)
-        subject = f"Guild Created: {guild.name}"
-        message = f'Hi {guild.leader.first_name},\n\nYour guild "{guild.name}" has been created.'
-        send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [guild.leader.email])
-        return f"Guild creation email sent to {guild.leader.email}"
+        guild = Guild.objects.select_related("leader").get(pk=guild_id)
+        message = outbox.guild_created(guild)
+        if message is None:
+            return f"Guild with id {guild_id} has no leader to notify."
+        return f"Guild creation email queued for {message.recipient}"
     except Guild.DoesNotExist:
         return f"Guild with id {guild_id} does not exist."
+
+
+@shared_task
+@db.use_primary()
+def drain_email_outbox(batch_size=outbox.BATCH_SIZE, chunk_size=outbox.CHUNK_SIZE):
+    """
+    Claim a batch of the outbox and send it in parallel: a chord of
+    send_email_chunk tasks, each over one SMTP connection, whose callback
+    summarize_email_drain reports what was sent and what failed.
+    """
+    started = time.time()
+    outbox.release_stale_claims()
+    batch, outgoing = outbox.claim(batch_size)
+    ids = [message.pk for message in outgoing]
+    chunks = [ids[i : i + chunk_size] for i in range(0, len(ids), chunk_size)]
+    claimed = {
+        "claimed": len(batch),
+        "duplicates": len(batch) - len(outgoing),
+        "chunks": len(chunks),
+    }
+    if not chunks:
+        _drain_more(claimed, batch_size, chunk_size)
+        return claimed
+    summary = chord(send_email_chunk.s(chunk) for chunk in chunks)(
+        summarize_email_drain.s(claimed, started, batch_size, chunk_size)
+    )
+    return {**claimed, "summary_id": summary.id}
+
+
+@shared_task
+@db.use_primary()
+def send_email_chunk(ids):
+    return outbox.send_claimed(ids)
+
+
+@shared_task
+@db.use_primary()
+def summarize_email_drain(results, claimed, started, batch_size, chunk_size):
+    metrics = outbox.report(
+        claimed["claimed"], claimed["duplicates"], results, time.time() - started
+    )
+    _drain_more(claimed, batch_size, chunk_size)
+    return metrics
+
+
+def _drain_more(claimed, batch_size, chunk_size):
+    # A full batch means more is waiting; keep going instead of waiting for beat.
+    # Only once the batch is sent, so claims never pile up in the queue.
+    if claimed["claimed"] == batch_size:
+        drain_email_outbox.delay(batch_size, chunk_size)
+
+
+@shared_task
+def prune_tombstones():
+    return sync.prune_tombstones()
+
+
+@shared_task
+def apply_cache_invalidations(namespaces, details):
+    cache.apply_invalidations(namespaces, details)
@@ -0,0 +1,124 @@
+from api.models import Dungeon, Guild, Raid, RaidParticipation, Skill
+from api.views import (
+    DungeonViewSet,
+    GuildViewSet,
+    HunterViewSet,
+    RaidViewSet,
+    SkillViewSet,
+)
+from asgiref.sync import iscoroutinefunction
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import include, path, resolve, reverse
+from rest_framework import status
+from rest_framework.routers import DefaultRouter
+from rest_framework.test import APITestCase
+
+User = get_user_model()
+
+# The same routes as api.urls, built with async reads on
+with override_settings(ASYNC_READS=True):
+    router = DefaultRouter()
+    router.register("hunters", HunterViewSet)
+    router.register("guilds", GuildViewSet)
+    router.register("skills", SkillViewSet)
+    router.register("dungeons", DungeonViewSet)
+    router.register("raids", RaidViewSet)
+    urlpatterns = [path("api/", include(router.urls))]
+
+
+class AsyncReadTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            username="admin", password="test", email="admin@example.com", rank="S"
+        )
+        self.hunter = User.objects.create_user(
+            username="jinwoo", password="test", email="jinwoo@example.com", rank="E"
+        )
+        self.guild = Guild.objects.create(name="Ahjin Guild", leader=self.admin)
+        skill = Skill.objects.create(name="Stealth", element="Dark", power=80)
+        self.admin.skills.add(skill)
+        Skill.objects.create(name="Fire Blast", element="Fire", power=100)
+        dungeon = Dungeon.objects.create(name="Ant Cave", location="Jeju", rank="S")
+        self.raid = Raid.objects.create(
+            name="Raid 1", dungeon=dungeon, date="2025-08-21"
+        )
+        RaidParticipation.objects.create(raid=self.raid, hunter=self.admin, role="DPS")
+        self.client.force_authenticate(user=self.admin)
+
+    def compare(self, url, params=None):
+        """GET ``url`` from the sync and the async views; return the latter."""
+        expected = self.client.get(url, params)
+        cache.clear()
+        with override_settings(ROOT_URLCONF=__name__):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.json(), expected.json())
+        return response
+
+    def test_reads_are_served_by_async_views(self):
+        with override_settings(ROOT_URLCONF=__name__):
+            list_view = resolve(reverse("hunter-list")).func
+            detail_view = resolve(reverse("hunter-detail", args=[1])).func
+        self.assertTrue(iscoroutinefunction(list_view))
+        self.assertTrue(iscoroutinefunction(detail_view))
+        self.assertFalse(iscoroutinefunction(resolve(reverse("hunter-list")).func))
+
+    def test_list_and_detail_match_sync_views(self):
+        cases = [
+            ("hunter", self.admin.pk, {"rank": "S", "ordering": "username"}),
+            ("guild", self.guild.pk, {"leader": self.admin.pk}),
+            ("skill", self.admin.skills.get().pk, {"search": "fire"}),
+            ("dungeon", self.raid.dungeon_id, {"ordering": "-rank"}),
+            ("raid", self.raid.pk, {"date__gte": "2025-01-01"}),
+        ]
+        for basename, pk, params in cases:
+            with self.subTest(basename):
+                self.compare(reverse(f"{basename}-list"))
+                self.compare(reverse(f"{basename}-list"), params)
+                self.compare(reverse(f"{basename}-detail", args=[pk]))
+
+    def test_pages_and_errors_match_sync_views(self):
+        first = self.compare(reverse("hunter-list"), {"page_size": 1}).json()
+        self.compare(first["next"])
+        self.compare(reverse("guild-list"), {"leader": "nope"})
+        self.compare(reverse("hunter-detail", args=[999]))
+        self.compare(reverse("hunter-detail", args=["007"]))
+
+    def test_permissions_match_sync_views(self):
+        self.client.force_authenticate(user=None)
+        response = self.compare(reverse("guild-list"))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.compare(reverse("skill-list"))
+
+    def test_other_actions_use_sync_views(self):
+        with override_settings(ROOT_URLCONF=__name__):
+            response = self.client.patch(
+                reverse("skill-detail", args=[self.admin.skills.get().pk]),
+                {"power": 90},
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            response = self.client.get(
+                reverse("hunter-list"), {"ids": f"{self.hunter.pk},{self.admin.pk}"}
+            )
+        self.assertEqual(
+            [h["id"] for h in response.json()], [self.hunter.pk, self.admin.pk]
+        )
+
+    @override_settings(ROOT_URLCONF=__name__)
+    async def test_async_stack_reports_queries(self):
+        await self.async_client.aforce_login(self.admin)
+        url = reverse("raid-detail", args=[self.raid.pk])
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["name"], "Raid 1")
+        queries = int(response["X-DB-Queries"])
+
+        # Served from the detail cache through the async Redis client; the
+        # queries left are the session's
+        response = await self.async_client.get(url)
+        self.assertEqual(response.json()["name"], "Raid 1")
+        self.assertLess(int(response["X-DB-Queries"]), queries)
+        self.assertNotIn('desc="0 calls"', response["Server-Timing"])
@@ -0,0 +1,80 @@
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+from unittest import mock
+
+from api.models import Skill
+from django.contrib.auth import get_user_model
+from django.core.management import CommandError, call_command
+from django.test import LiveServerTestCase
+from rest_framework.test import APITestCase
+from rest_framework.throttling import SimpleRateThrottle
+
+User = get_user_model()
+
+
+class BenchApiTests(APITestCase):
+    def setUp(self):
+        User.objects.create_superuser(
+            username="admin", password="test", email="admin@example.com", rank="S"
+        )
+        Skill.objects.create(name="Sword Dance", element="Light", power=120)
+        self.output = Path(tempfile.mkdtemp()) / "bench.json"
+
+    def bench(self, **options):
+        call_command(
+            "bench_api",
+            iterations=1,
+            only=["skill.detail"],
+            stdout=StringIO(),
+            stderr=StringIO(),
+            **options,
+        )
+
+    def test_results_are_written_and_compared(self):
+        self.bench(output=self.output)
+        report = json.loads(self.output.read_text())
+        cold = report["results"]["skill.detail"]["cold"]
+        warm = report["results"]["skill.detail"]["warm"]
+        self.assertEqual(report["meta"]["dataset"]["skill"], 1)
+        self.assertGreater(cold["queries"], 0)
+        self.assertEqual(warm["queries"], 0)
+        self.assertGreater(warm["cache_hits"], 0)
+
+        self.bench(compare=self.output, threshold=100)
+
+        report["results"]["skill.detail"]["cold"]["queries"] = 0
+        self.output.write_text(json.dumps(report))
+        with self.assertRaisesMessage(CommandError, "1 regressions"):
+            self.bench(compare=self.output, threshold=100)
+
+    def test_throttling_is_disabled(self):
+        rates = {"anon": "1/min", "user": "1/min"}
+        with mock.patch.object(SimpleRateThrottle, "THROTTLE_RATES", rates):
+            self.bench()
+
+    def test_seeding_asks_first(self):
+        with mock.patch("builtins.input", return_value="no") as prompt:
+            with self.assertRaisesMessage(CommandError, "cancelled"):
+                self.bench(seed_db=True)
+        prompt.assert_called_once()
+        self.assertEqual(Skill.objects.count(), 1)
+
+
+class LoadTestTests(LiveServerTestCase):
+    def test_load_test_reports_throughput(self):
+        User.objects.create_superuser(
+            username="admin", password="test", email="admin@example.com", rank="S"
+        )
+        out = StringIO()
+        call_command(
+            "load_test",
+            self.live_server_url,
+            path=["/api/leaderboard/"],
+            concurrency=2,
+            duration=0.5,
+            stdout=out,
+        )
+        self.assertIn("req/s", out.getvalue())
+        self.assertRegex(out.getvalue(), r"status 200: \d+  errors 0")
@@ -0,0 +1,380 @@
+from api.cache import deferred_invalidation, get_generation, invalidate_cache
+from api.dependencies import CACHE_DEPENDENCIES
+from api.models import Dungeon, Raid, RaidParticipation, Skill
+from api.serializers import (
+    DungeonSerializer,
+    GuildSerializer,
+    HunterSerializer,
+    RaidParticipationSerializer,
+    RaidSerializer,
+    SkillSerializer,
+)
+from api.views import SkillViewSet
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import update_last_login
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import modify_settings, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import permissions, status
+from rest_framework.test import (
+    APIRequestFactory,
+    APITestCase,
+    APITransactionTestCase,
+    force_authenticate,
+)
+
+User = get_user_model()
+
+
+# Invalidations apply on commit, so these tests need real transactions
+class ListCacheTests(APITransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            username="admin", password="test", email="admin@example.com", rank="S"
+        )
+        Skill.objects.create(name="Sword Dance", element="Light", power=120)
+        self.client.force_authenticate(user=self.admin)
+
+    def test_invalidate_cache_bumps_generation(self):
+        generation = get_generation("skill_list")
+        invalidate_cache("skill_list")
+        self.assertEqual(get_generation("skill_list"), generation + 1)
+
+    def test_list_is_served_from_cache_until_invalidated(self):
+        url = reverse("skill-list")
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(url)
+        self.assertEqual(second.content, first.content)
+        self.assertFalse([q for q in ctx.captured_queries if "api_skill" in q["sql"]])
+
+        Skill.objects.create(name="Fire Blast", element="Fire", power=100)
+        third = self.client.get(url)
+        self.assertEqual(len(third.json()["results"]), 2)
+
+    def test_list_cache_is_shared_between_users(self):
+        url = reverse("hunter-list")
+        other = User.objects.create_user(username="user1", password="test", rank="D")
+        first = self.client.get(url, HTTP_AUTHORIZATION="Bearer token-a")
+
+        self.client.force_authenticate(user=other)
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(url, HTTP_AUTHORIZATION="Bearer token-b")
+        self.assertEqual(second.content, first.content)
+        self.assertFalse([q for q in ctx.captured_queries if "api_hunter" in q["sql"]])
+
+    @override_settings(ALLOWED_HOSTS=["testserver", "api.example.com"])
+    def test_list_cache_is_per_host_and_scheme(self):
+        Skill.objects.create(name="Fire Blast", element="Fire", power=100)
+        url = reverse("skill-list")
+        first = self.client.get(url, {"page_size": 1})
+        self.assertTrue(first.json()["next"].startswith("http://testserver/"))
+
+        second = self.client.get(
+            url, {"page_size": 1}, HTTP_HOST="api.example.com", secure=True
+        )
+        self.assertTrue(second.json()["next"].startswith("https://api.example.com/"))
+
+    def test_participation_cache_is_per_user(self):
+        url = reverse("raidparticipation-list")
+        dungeon = Dungeon.objects.create(name="Ant Cave", location="Jeju", rank="S")
+        raid = Raid.objects.create(name="Raid 1", dungeon=dungeon, date="2025-08-21")
+        users = [
+            User.objects.create_user(username=f"user{i}", password="test", rank="D")
+            for i in range(2)
+        ]
+        for user in users:
+            RaidParticipation.objects.create(raid=raid, hunter=user, role="DPS")
+
+        for user in users:
+            self.client.force_authenticate(user=user)
+            response = self.client.get(url)
+            self.assertEqual(
+                [p["hunter_id"] for p in response.json()["results"]], [user.id]
+            )
+
+
+class DetailCacheTests(APITransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            username="admin", password="test", email="admin@example.com", rank="S"
+        )
+        self.skill = Skill.objects.create(
+            name="Sword Dance", element="Light", power=120
+        )
+        self.admin.skills.add(self.skill)
+        self.client.force_authenticate(user=self.admin)
+
+    def test_retrieve_is_served_from_cache(self):
+        url = reverse("hunter-detail", args=[self.admin.id])
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.client.get(url)
+        self.assertEqual(second.data, first.data)
+        self.assertFalse([q for q in ctx.captured_queries if "api_" in q["sql"]])
+
+    def test_filters_and_object_permissions_bypass_cache(self):
+        url = reverse("skill-detail", args=[self.skill.id])
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+        # Cached now, but the filter still applies
+        response = self.client.get(url, {"element": "Fire"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        class NoSkills(permissions.BasePermission):
+            def has_object_permission(self, request, view, obj):
+                return False
+
+        view = SkillViewSet.as_view(
+            {"get": "retrieve"}, get_permissions=lambda: [NoSkills()]
+        )
+        request = APIRequestFactory().get(url)
+        force_authenticate(request, user=self.admin)
+        response = view(request, pk=self.skill.id)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_related_changes_invalidate_detail(self):
+        url = reverse("hunter-detail", args=[self.admin.id])
+        dungeon = Dungeon.objects.create(name="Ant Cave", location="Jeju", rank="S")
+        raid = Raid.objects.create(name="Raid 1", dungeon=dungeon, date="2025-08-21")
+        RaidParticipation.objects.create(raid=raid, hunter=self.admin, role="Tank")
+        raid_url = reverse("raid-detail", args=[raid.id])
+        self.assertEqual(self.client.get(url).data["power_level"], 320)
+        self.assertEqual(self.client.get(raid_url).data["team_strength"], 320)
+
+        self.skill.power = 20
+        self.skill.save()
+        self.assertEqual(self.client.get(url).data["power_level"], 220)
+        self.assertEqual(self.client.get(raid_url).data["team_strength"], 220)
+
+        dungeon.name = "Red Gate"
+        dungeon.save()
+        self.assertEqual(
+            self.client.get(raid_url).data["dungeon_info"]["name"], "Red Gate"
+        )
+
+
+@modify_settings(MIDDLEWARE={"remove": "api.middleware.ProfilingMiddleware"})
+class BatchLookupTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            username="admin", password="test", email="admin@example.com", rank="S"
+        )
+        self.skills = [
+            Skill.objects.create(name=f"Skill {i}", element="Fire", power=10 * i)
+            for i in range(3)
+        ]
+        self.client.force_authenticate(user=self.admin)
+
+    def test_batch_lookup_keeps_order_and_skips_unknown_ids(self):
+        ids = [self.skills[2].id, 9999, self.skills[0].id]
+        response = self.client.get(
+            reverse("skill-list"), {"ids": ",".join(map(str, ids))}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [s["id"] for s in response.json()], [self.skills[2].id, self.skills[0].id]
+        )
+
+    def test_batch_lookup_loads_only_misses(self):
+        url = reverse("skill-detail", args=[self.skills[0].id])
+        self.client.get(url)
+        ids = ",".join(str(skill.id) for skill in self.skills)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("skill-list"), {"ids": ids})
+        self.assertEqual(len(response.json()), 3)
+        skill_queries = [
+            q["sql"]
+            for q in ctx.captured_queries
+            if q["sql"].startswith('SELECT "api_skill"')
+        ]
+        self.assertEqual(len(skill_queries), 1)
+        misses = f"IN ({self.skills[1].id}, {self.skills[2].id})"
+        self.assertIn(misses, skill_queries[0])
+
+        # Every object is now cached; a different id order misses the list cache
+        ids = ",".join(str(skill.id) for skill in reversed(self.skills))
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse("skill-list"), {"ids": ids})
+        self.assertFalse([q for q in ctx.captured_queries if "api_skill" in q["sql"]])
+
+    def test_batch_lookup_rejects_bad_ids(self):
+        response = self.client.get(reverse("skill-list"), {"ids": "1,abc"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        too_many = ",".join(str(i) for i in range(1, 102))
+        response = self.client.get(reverse("skill-list"), {"ids": too_many})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConditionalRequestTests(APITransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            username="admin", password="test", email="admin@example.com", rank="S"
+        )
+        self.skill = Skill.objects.create(name="Sword Dance", element="Light", power=1)
+        self.client.force_authenticate(user=self.admin)
+
+    def test_list_etag_returns_304_until_collection_changes(self):
+        url = reverse("skill-list")
+        etag = self.client.get(url)["ETag"]
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response["ETag"], etag)
+        self.assertFalse([q for q in ctx.captured_queries if "api_skill" in q["sql"]])
+
+        Skill.objects.create(name="Fire Blast", element="Fire", power=100)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_list_if_modified_since(self):
+        url = reverse("skill-list")
+        last_modified = self.client.get(url)["Last-Modified"]
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_detail_etag_changes_with_payload(self):
+        url = reverse("skill-detail", args=[self.skill.id])
+        first = self.client.get(url)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"]).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+
+        self.skill.power = 50
+        self.skill.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["power"], 50)
+
+    def test_stat_updates_bump_updated_at(self):
+        updated_at = self.admin.updated_at
+        self.admin.skills.add(self.skill)
+        self.admin.refresh_from_db()
+        self.assertGreater(self.admin.updated_at, updated_at)
+
+
+class DeferredInvalidationTests(APITransactionTestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_rolled_back_transaction_does_not_invalidate(self):
+        generation = get_generation("skill_list")
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Skill.objects.create(name="Fire Blast", element="Fire", power=100)
+            raise RuntimeError
+        self.assertEqual(get_generation("skill_list"), generation)
+
+    def test_rolled_back_invalidations_are_not_flushed_by_next_commit(self):
+        generation = get_generation("dungeon_list")
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Dungeon.objects.create(name="Red Gate", location="Seoul", rank="C")
+            raise RuntimeError
+        Skill.objects.create(name="Fire Blast", element="Fire", power=100)
+        self.assertEqual(get_generation("dungeon_list"), generation)
+
+    def test_rolled_back_savepoint_keeps_outer_invalidations(self):
+        dungeons = get_generation("dungeon_list")
+        skills = get_generation("skill_list")
+        with transaction.atomic():
+            Skill.objects.create(name="Fire Blast", element="Fire", power=100)
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Dungeon.objects.create(name="Red Gate", location="Seoul", rank="C")
+                raise RuntimeError
+            Skill.objects.create(name="Tidal Wave", element="Water", power=90)
+        self.assertEqual(get_generation("dungeon_list"), dungeons)
+        self.assertEqual(get_generation("skill_list"), skills + 1)
+
+    def test_invalidations_are_coalesced_until_commit(self):
+        generation = get_generation("skill_list")
+        with transaction.atomic():
+            for i in range(3):
+                Skill.objects.create(name=f"Skill {i}", element="Fire", power=10)
+            self.assertEqual(get_generation("skill_list"), generation)
+        self.assertEqual(get_generation("skill_list"), generation + 1)
+
+    def test_request_flushes_once(self):
+        generation = get_generation("skill_list")
+        with deferred_invalidation():
+            Skill.objects.create(name="Fire Blast", element="Fire", power=100)
+            Skill.objects.create(name="Tidal Wave", element="Water", power=90)
+            self.assertEqual(get_generation("skill_list"), generation)
+        self.assertEqual(get_generation("skill_list"), generation + 1)
+
+
+class FieldAwareInvalidationTests(APITransactionTestCase):
+    NAMESPACES = [
+        "hunter_list",
+        "guild_list",
+        "raid_list",
+        "participation_list",
+        "skill_list",
+        "dungeon_list",
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.hunter = User.objects.create_user(
+            username="jinwoo", password="test", first_name="Jinwoo", rank="E"
+        )
+        self.hunter = User.objects.get(pk=self.hunter.pk)
+
+    def generations(self):
+        return {ns: get_generation(ns) for ns in self.NAMESPACES}
+
+    def bumped(self, before):
+        after = self.generations()
+        return {ns for ns in self.NAMESPACES if after[ns] != before[ns]}
+
+    def test_login_does_not_invalidate(self):
+        before = self.generations()
+        update_last_login(None, self.hunter)
+        self.hunter.set_password("changed")
+        self.hunter.save()
+        self.assertEqual(self.bumped(before), set())
+
+    def test_only_namespaces_reading_changed_fields_are_invalidated(self):
+        before = self.generations()
+        self.hunter.first_name = "Sung"
+        self.hunter.save()
+        self.assertEqual(
+            self.bumped(before),
+            {"hunter_list", "guild_list", "raid_list", "participation_list"},
+        )
+
+        before = self.generations()
+        self.hunter.email = "jinwoo@example.com"
+        self.hunter.save(update_fields=["email"])
+        self.assertEqual(self.bumped(before), {"hunter_list"})
+
+    def test_dependencies_cover_serialized_fields(self):
+        serializers = {
+            "hunter": HunterSerializer,
+            "guild": GuildSerializer,
+            "skill": SkillSerializer,
+            "dungeon": DungeonSerializer,
+            "raid": RaidSerializer,
+            "participation_list": RaidParticipationSerializer,
+        }
+        for namespace, serializer_class in serializers.items():
+            model = serializer_class.Meta.model
+            fields = [*model._meta.concrete_fields, *model._meta.many_to_many]
+            names = {f.name for f in fields if not f.primary_key}
+            for field in serializer_class().fields.values():
+                source = field.source.split(".")[0]
+                if field.write_only or source not in names:
+                    continue
+                with self.subTest(namespace=namespace, field=source):
+                    self.assertIn(source, CACHE_DEPENDENCIES[namespace][model])
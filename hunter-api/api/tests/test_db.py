@@ -0,0 +1,150 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from api import db
+from api.models import Dungeon, EmailOutbox
+from api.tasks import send_hunter_welcome_email
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+User = get_user_model()
+
+
+class DatabasePoolTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin", password="test", email="admin@example.com", rank="S"
+        )
+        self.hunter = User.objects.create_user(
+            username="jinwoo", password="test", email="jinwoo@example.com", rank="E"
+        )
+
+    def test_pool_stats_are_staff_only(self):
+        self.client.force_authenticate(user=self.hunter)
+        response = self.client.get(reverse("db-pool"))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.get(reverse("db-pool"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {"pid", "pools"})
+        self.assertEqual(response.data["pools"], db.pool_stats())
+
+    @mock.patch.dict(db._saturation_logged, clear=True)
+    def test_saturated_pool_is_logged_once_per_interval(self):
+        stats = {"pool_min": 2, "pool_max": 4, "pool_size": 4, "pool_available": 1}
+        pool = SimpleNamespace(get_stats=lambda: stats)
+        connection = SimpleNamespace(alias="default", pool=pool)
+
+        with self.assertNoLogs("api.db"):
+            db.warn_on_saturation(sender=None, connection=connection)
+
+        stats.update(pool_available=0, requests_waiting=3, requests_errors=1)
+        with self.assertLogs("api.db", "WARNING") as logs:
+            db.warn_on_saturation(sender=None, connection=connection)
+        self.assertIn("4 of 4 connections in use, 3 requests waiting", logs.output[0])
+        with self.assertNoLogs("api.db"):
+            db.warn_on_saturation(sender=None, connection=connection)
+
+
+# "replica" is a second, separate database: nothing written to the primary
+# reaches it, which shows where each read went
+@override_settings(DATABASE_REPLICAS=["replica"])
+class PrimaryReplicaRouterTests(APITestCase):
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            username="admin", password="test", email="admin@example.com", rank="S"
+        )
+        self.hunter = User.objects.create_user(
+            username="jinwoo", password="test", email="jinwoo@example.com", rank="E"
+        )
+        self.dungeon = Dungeon.objects.create(name="Ant Cave", location="Jeju")
+
+    def test_reads_go_to_the_replica(self):
+        with db.routing(RequestFactory().get("/")):
+            self.assertFalse(Dungeon.objects.exists())
+        self.assertEqual(Dungeon.objects.using("replica").count(), 0)
+
+        # Query parameters skip the detail cache
+        self.client.force_authenticate(user=self.hunter)
+        url = reverse("dungeon-detail", args=[self.dungeon.pk])
+        response = self.client.get(url, {"search": "Ant"})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_writes_and_their_reads_go_to_the_primary(self):
+        self.client.force_authenticate(user=self.admin)
+        url = reverse("dungeon-detail", args=[self.dungeon.pk])
+        response = self.client.patch(url, {"name": "Ant Cave", "location": "Seoul"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.dungeon.refresh_from_db(using="default")
+        self.assertEqual(self.dungeon.location, "Seoul")
+
+    def test_writer_reads_from_the_primary_for_a_while(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(
+            reverse("dungeon-list"),
+            {"name": "Red Gate", "location": "Seoul", "rank": "B"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        url = reverse("dungeon-detail", args=[response.data["id"]]) + "?search=Red"
+
+        # Other users read from the replica, which lacks the new dungeon
+        self.client.force_authenticate(user=self.hunter)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+        self.client.force_authenticate(user=self.admin)
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_200_OK)
+
+        cache.delete(db.STICKY_KEY.format(self.admin.pk))
+        cache.delete_pattern("detail:*")
+        self.assertEqual(self.client.get(url).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_cache_misses_read_from_the_primary(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(
+            reverse("dungeon-list"),
+            {"name": "Red Gate", "location": "Seoul", "rank": "B"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        pk = response.data["id"]
+        urls = [
+            reverse("dungeon-list"),
+            reverse("dungeon-detail", args=[pk]),
+            f"{reverse('dungeon-list')}?ids={pk},{self.dungeon.pk}",
+        ]
+
+        # A user who did not write fills the caches, from the primary
+        self.client.force_authenticate(user=self.hunter)
+        filled = [self.client.get(url) for url in urls]
+        for response in filled:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(filled[0].data["results"]), 2)
+        self.assertEqual(filled[1].data["name"], "Red Gate")
+        self.assertEqual(len(filled[2].data), 2)
+
+        with self.assertNumQueries(0), self.assertNumQueries(0, using="replica"):
+            hits = [self.client.get(url) for url in urls]
+        for hit, response in zip(hits, filled):
+            self.assertEqual(hit.json(), response.json())
+
+    def test_failed_writes_do_not_stick(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(reverse("dungeon-list"), {"location": "Seoul"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIsNone(cache.get(db.STICKY_KEY.format(self.admin.pk)))
+
+    def test_reads_outside_requests_go_to_the_primary(self):
+        self.assertTrue(Dungeon.objects.exists())
+        with db.routing(RequestFactory().get("/")), db.use_primary():
+            self.assertTrue(Dungeon.objects.exists())
+
+        result = send_hunter_welcome_email(self.hunter.pk)
+        self.assertEqual(result, "Welcome email queued for jinwoo@example.com")
+        self.assertTrue(EmailOutbox.objects.using("default").exists())
@@ -24,3 +24,17 @@ class DungeonTests(APITestCase):
         }
         response = self.client.post(url, data, format="json")
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_rank_filters_follow_rank_order(self):
+        for rank in ("E", "C", "A", "S"):
+            Dungeon.objects.create(name=f"{rank} Gate", location="Seoul", rank=rank)
+        url = reverse("dungeon-list")
+
+        def ranks(**params):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            return sorted(d["rank"] for d in response.data["results"])
+
+        self.assertEqual(ranks(rank__gte="C"), ["A", "C", "S"])
+        self.assertEqual(ranks(rank__lte="A"), ["A", "C", "E"])
+        self.assertEqual(ranks(rank="S"), ["S"])
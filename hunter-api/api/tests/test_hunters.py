@@ -1,5 +1,13 @@
-from api.models import Skill
+from io import StringIO
+
+from api.models import Dungeon, Guild, Raid, RaidParticipation, Skill
+from api.stats import recompute_hunter_stats
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import modify_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -19,6 +27,7 @@ class HunterTests(APITestCase):
             name="Sword Dance", element="Light", power=120
         )
         self.client.force_authenticate(user=self.admin)
+        cache.clear()
 
     def test_create_hunter(self):
         url = reverse("hunter-list")
@@ -35,6 +44,145 @@ class HunterTests(APITestCase):
         response = self.client.post(url, data, format="json")
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
+    def _hunter_payload(self, i, **extra):
+        return {
+            "first_name": f"Hunter{i}",
+            "last_name": "Bulk",
+            "username": f"bulk{i}",
+            "password": "test",
+            "email": f"bulk{i}@example.com",
+            "rank": "C",
+            **extra,
+        }
+
+    @modify_settings(MIDDLEWARE={"remove": "api.middleware.ProfilingMiddleware"})
+    def test_bulk_create_hunters(self):
+        url = reverse("hunter-list")
+        payload = [self._hunter_payload(i, skills=[self.skill.id]) for i in range(20)]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertLess(len(ctx.captured_queries), 20)
+
+        self.assertEqual(len(response.data), 20)
+        self.assertEqual(response.data[0]["power_level"], 50 + 120)
+        hunter = User.objects.get(username="bulk0")
+        self.assertTrue(hunter.check_password("test"))
+        self.assertEqual(list(hunter.skills.all()), [self.skill])
+
+    def test_bulk_create_validates_every_item(self):
+        url = reverse("hunter-list")
+        payload = [
+            self._hunter_payload(0),
+            self._hunter_payload(1, username="user1"),
+            self._hunter_payload(2, skills=[9999]),
+            self._hunter_payload(0),
+        ]
+        response = self.client.post(url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("skills", response.data[2])
+
+        payload[2]["skills"] = []
+        response = self.client.post(url, payload, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            [bool(errors) for errors in response.data], [False, True, False, True]
+        )
+        self.assertFalse(User.objects.filter(username="bulk0").exists())
+
+    def test_bulk_create_requires_admin(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.post(
+            reverse("hunter-list"), [self._hunter_payload(0)], format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
     def test_assign_skill_to_hunter(self):
         self.user.skills.add(self.skill)
         self.assertIn(self.skill, self.user.skills.all())
+
+    def _count_list_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse("hunter-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries)
+
+    # Silk records its own bookkeeping queries, which would skew the count
+    @modify_settings(MIDDLEWARE={"remove": "api.middleware.ProfilingMiddleware"})
+    def test_list_hunters_query_count_is_constant(self):
+        self.user.skills.add(self.skill)
+        baseline = self._count_list_queries()
+
+        for i in range(10):
+            hunter = User.objects.create_user(
+                username=f"hunter{i}", password="test", rank="C"
+            )
+            hunter.skills.add(self.skill)
+        cache.clear()
+
+        self.assertEqual(self._count_list_queries(), baseline)
+
+    def test_power_level_and_raid_count_in_detail(self):
+        self.user.skills.add(self.skill)
+        dungeon = Dungeon.objects.create(name="Ant Cave", location="Jeju", rank="S")
+        for name in ("Raid 1", "Raid 2"):
+            raid = Raid.objects.create(name=name, dungeon=dungeon, date="2025-08-21")
+            RaidParticipation.objects.create(raid=raid, hunter=self.user, role="DPS")
+
+        response = self.client.get(reverse("hunter-detail", args=[self.user.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["power_level"], 30 + 120)
+        self.assertEqual(response.data["raid_count"], 2)
+
+    def test_stats_follow_rank_skill_and_raid_changes(self):
+        self.user.skills.add(self.skill)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.power_level, 30 + 120)
+
+        self.user.rank = "A"
+        self.user.save()
+        self.skill.power = 150
+        self.skill.save()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.power_level, 120 + 150)
+
+        dungeon = Dungeon.objects.create(name="Ant Cave", location="Jeju", rank="S")
+        raid = Raid.objects.create(name="Raid 1", dungeon=dungeon, date="2025-08-21")
+        participation = RaidParticipation.objects.create(
+            raid=raid, hunter=self.user, role="DPS"
+        )
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.raid_count, 1)
+
+        participation.delete()
+        self.skill.delete()
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.raid_count, 0)
+        self.assertEqual(self.user.power_level, 120)
+
+    def test_recompute_hunter_stats_command(self):
+        self.user.skills.add(self.skill)
+        User.objects.update(power_level=0, raid_count=5)
+
+        call_command("recompute_hunter_stats", chunk_size=1, stdout=StringIO())
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.power_level, 30 + 120)
+        self.assertEqual(self.user.raid_count, 0)
+
+    def test_populate_db_command(self):
+        options = {"hunters": 50, "guilds": 3, "raids": 20, "seed": 7}
+        call_command("populate_db", batch_size=16, stdout=StringIO(), **options)
+
+        self.assertEqual(User.objects.count(), 51)
+        self.assertEqual(Raid.objects.count(), 20)
+        for guild in Guild.objects.select_related("leader"):
+            self.assertEqual(guild.leader.guild_id, guild.pk)
+        # Stats were rebuilt after the signal-free load
+        self.assertEqual(recompute_hunter_stats(User.objects.all()), 0)
+        self.assertTrue(self.client.login(username="admin", password="test"))
+
+        # Receivers are connected again afterwards
+        hunter = User.objects.exclude(username="admin").first()
+        hunter.skills.add(Skill.objects.create(name="Blink", element="Light", power=5))
+        self.assertEqual(recompute_hunter_stats(User.objects.all()), 0)
@@ -0,0 +1,119 @@
+import threading
+from unittest import mock
+
+from api.instrumentation import QueryBudgetExceeded
+from api.models import Skill
+from api.views import SkillViewSet
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models.sql.compiler import SQLCompiler
+from django.test import modify_settings, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from silk.collector import DataCollector
+from silk.config import SilkyConfig
+from silk.models import Request
+
+User = get_user_model()
+
+
+# Silk's own queries would show up in X-DB-Queries
+@modify_settings(MIDDLEWARE={"remove": "api.middleware.ProfilingMiddleware"})
+class ServerTimingTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            username="admin", password="test", email="admin@example.com", rank="S"
+        )
+        Skill.objects.create(name="Sword Dance", element="Light", power=120)
+        self.client.force_authenticate(user=self.admin)
+
+    def test_response_reports_timings_and_queries(self):
+        response = self.client.get(reverse("skill-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        metrics = [m.split(";")[0] for m in response["Server-Timing"].split(", ")]
+        self.assertEqual(metrics, ["db", "cache", "serialize", "render", "total"])
+        self.assertIn('desc="1 queries"', response["Server-Timing"])
+        self.assertEqual(response["X-DB-Queries"], "1")
+
+        # Cached responses skip the database
+        response = self.client.get(reverse("skill-list"))
+        self.assertEqual(response["X-DB-Queries"], "0")
+
+    @mock.patch.object(SkillViewSet, "query_budget", {"list": 0})
+    def test_query_budget_raises_in_tests(self):
+        with self.assertRaisesMessage(QueryBudgetExceeded, "SkillViewSet.list ran 1"):
+            self.client.get(reverse("skill-list"))
+
+    @override_settings(QUERY_BUDGET_RAISE=False)
+    @mock.patch.object(SkillViewSet, "query_budget", {"list": 0})
+    def test_query_budget_is_logged_in_production(self):
+        with self.assertLogs("api.instrumentation", "WARNING"):
+            response = self.client.get(reverse("skill-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+# .prof files are not needed to check that a profile was taken
+@mock.patch.dict(SilkyConfig().attrs, {"SILKY_PYTHON_PROFILER_BINARY": False})
+class ProfilingTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin", password="test", email="admin@example.com", rank="S"
+        )
+        self.user = User.objects.create_user(
+            username="user1", password="test", email="user1@example.com", rank="D"
+        )
+        self.url = reverse("leaderboard")
+
+    def get(self, user, **headers):
+        self.client.force_login(user)
+        return self.client.get(self.url, headers=headers)
+
+    def test_unsampled_requests_bypass_silk(self):
+        self.get(self.admin)
+        self.assertFalse(Request.objects.exists())
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sampled_requests_are_recorded_without_profile(self):
+        self.get(self.user)
+        request = Request.objects.get()
+        self.assertEqual(request.pyprofile, "")
+        # Silk's SQL hook is removed once nothing is being recorded
+        self.assertFalse(hasattr(SQLCompiler, "_execute_sql"))
+
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    async def test_async_requests_are_recorded_on_one_thread(self):
+        threads = []
+        configure, clear = DataCollector.configure, DataCollector.clear
+
+        def track(method):
+            def tracked(collector, *args, **kwargs):
+                threads.append(threading.get_ident())
+                return method(collector, *args, **kwargs)
+
+            return tracked
+
+        with mock.patch.object(
+            DataCollector, "configure", track(configure)
+        ), mock.patch.object(DataCollector, "clear", track(clear)):
+            await self.async_client.aforce_login(self.user)
+            response = await self.async_client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertGreater(len(threads), 1)
+        self.assertEqual(len(set(threads)), 1)
+
+    def test_staff_can_request_a_deep_profile(self):
+        self.get(self.user, X_PROFILE="1")
+        self.assertFalse(Request.objects.exists())
+
+        self.get(self.admin, X_PROFILE="1")
+        self.assertIn("function calls", Request.objects.get().pyprofile)
+
+    @override_settings(PROFILING_TOKEN="s3cret")
+    def test_profiling_token_requests_a_deep_profile(self):
+        self.get(self.user, X_PROFILE="wrong")
+        self.assertFalse(Request.objects.exists())
+
+        self.get(self.user, X_PROFILE="s3cret")
+        self.assertIn("function calls", Request.objects.get().pyprofile)
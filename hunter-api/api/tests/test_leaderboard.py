@@ -0,0 +1,104 @@
+from io import StringIO
+
+from api import leaderboard
+from api.models import Guild, Hunter, Skill
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import transaction
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+User = get_user_model()
+
+
+class LeaderboardTests(APITransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        leaderboard.get_connection().flushdb()
+        self.admin = User.objects.create_superuser(
+            username="admin", password="test", email="admin@example.com", rank="S"
+        )
+        self.user = User.objects.create_user(
+            username="user1", password="test", email="user1@example.com", rank="D"
+        )
+        self.skill = Skill.objects.create(
+            name="Sword Dance", element="Light", power=120
+        )
+        self.user.skills.add(self.skill)
+        self.guild = Guild.objects.create(name="Frost Wolves", leader=self.user)
+        self.client.force_authenticate(user=self.admin)
+
+    def test_top_hunters(self):
+        response = self.client.get(reverse("leaderboard"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(e["id"], e["power_level"]) for e in response.data["results"]],
+            [(self.admin.id, 200), (self.user.id, 150)],
+        )
+
+    def test_rank_follows_skill_power_change(self):
+        self.skill.power = 500
+        self.skill.save()
+
+        response = self.client.get(reverse("leaderboard"), {"rank_of": self.user.id})
+        self.assertEqual(response.data["rank"], 1)
+        self.assertEqual(response.data["power_level"], 530)
+
+        response = self.client.get(
+            reverse("leaderboard"), {"around": self.admin.id, "radius": 1}
+        )
+        self.assertEqual(
+            [e["id"] for e in response.data["results"]], [self.user.id, self.admin.id]
+        )
+
+    def test_guild_aggregate(self):
+        response = self.client.get(reverse("leaderboard"), {"scope": "guilds"})
+        self.assertEqual(
+            response.data["results"],
+            [
+                {
+                    "rank": 1,
+                    "id": self.guild.id,
+                    "name": "Frost Wolves",
+                    "power_level": 150,
+                }
+            ],
+        )
+
+        self.admin.guild = self.guild
+        self.admin.save()
+        response = self.client.get(
+            reverse("leaderboard"), {"scope": "guilds", "rank_of": self.guild.id}
+        )
+        self.assertEqual(response.data["power_level"], 350)
+
+    def test_rolled_back_changes_leave_the_leaderboard_alone(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            Hunter.objects.create_user(username="ghost", password="test", rank="S")
+            self.user.rank = "S"
+            self.user.save()
+            raise RuntimeError
+
+        response = self.client.get(reverse("leaderboard"))
+        self.assertEqual(
+            [(e["id"], e["power_level"]) for e in response.data["results"]],
+            [(self.admin.id, 200), (self.user.id, 150)],
+        )
+
+    def test_clearing_the_cache_keeps_the_leaderboard(self):
+        cache.clear()
+        response = self.client.get(reverse("leaderboard"), {"rank_of": self.user.id})
+        self.assertEqual(response.data["rank"], 2)
+
+    def test_rebuild_leaderboard_command(self):
+        leaderboard.get_connection().flushdb()
+        call_command("rebuild_leaderboard", stdout=StringIO())
+
+        response = self.client.get(reverse("leaderboard"), {"rank_of": self.user.id})
+        self.assertEqual(response.data["rank"], 2)
+        response = self.client.get(
+            reverse("leaderboard"), {"scope": "guilds", "rank_of": self.guild.id}
+        )
+        self.assertEqual(response.data["power_level"], 150)
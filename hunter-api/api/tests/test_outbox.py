@@ -0,0 +1,196 @@
+from datetime import date, timedelta
+from unittest import mock
+
+from api import outbox
+from api.models import Dungeon, EmailOutbox, Guild, Raid, RaidParticipation
+from api.tasks import drain_email_outbox, send_raid_notification_email
+from django.contrib.auth import get_user_model
+from django.core import mail
+from django.core.mail.backends import locmem
+from django.db import transaction
+from django.urls import reverse
+from hunter_api.celery import app as celery_app
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+User = get_user_model()
+
+
+class EmailOutboxTests(APITestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username="admin", password="test", email="admin@example.com", rank="S"
+        )
+        self.client.force_authenticate(user=self.admin)
+
+    def test_created_hunter_is_welcomed_through_outbox(self):
+        data = {
+            "first_name": "Thomas",
+            "last_name": "Andre",
+            "username": "thomasandre",
+            "password": "test",
+            "email": "thomasandre@example.com",
+            "rank": "S",
+        }
+        response = self.client.post(reverse("hunter-list"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(len(mail.outbox), 0)
+
+        metrics = outbox.drain()
+        self.assertEqual(metrics["sent"], 1)
+        self.assertEqual(metrics["pending"], 0)
+        self.assertEqual(mail.outbox[0].to, ["thomasandre@example.com"])
+        self.assertEqual(
+            EmailOutbox.objects.get().status, EmailOutbox.StatusChoices.Sent
+        )
+
+    def test_rolled_back_change_queues_nothing(self):
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            outbox.welcome([self.admin])
+            raise RuntimeError
+        self.assertFalse(EmailOutbox.objects.exists())
+
+    def test_identical_messages_are_sent_once(self):
+        guild = Guild.objects.create(name="Hunters Guild", leader=self.admin)
+        for _ in range(3):
+            response = self.client.post(
+                reverse("guild-invite"),
+                {"hunter_id": self.admin.id, "guild_id": guild.id},
+                format="json",
+            )
+            self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        outbox.drain()
+        outbox.guild_invite(self.admin, guild)
+
+        metrics = outbox.drain()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(metrics["duplicates"], 1)
+        self.assertEqual(
+            EmailOutbox.objects.filter(
+                status=EmailOutbox.StatusChoices.Duplicate
+            ).count(),
+            3,
+        )
+
+    def test_raid_notifications_share_one_batch(self):
+        hunters = [
+            User.objects.create_user(
+                username=f"hunter{i}", password="test", email=f"h{i}@example.com"
+            )
+            for i in range(5)
+        ]
+        dungeon = Dungeon.objects.create(name="Ant Cave", location="Jeju", rank="S")
+        data = {
+            "name": "Dragon Hunt",
+            "dungeon": dungeon.id,
+            "date": date.today(),
+            "participations_create": [
+                {"hunter_id": hunter.id, "role": "DPS"} for hunter in hunters
+            ],
+        }
+        response = self.client.post(reverse("raid-list"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        metrics = outbox.drain(batch_size=3)
+        self.assertEqual((metrics["sent"], metrics["pending"]), (3, 2))
+        outbox.drain(batch_size=3)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertIn("Dragon Hunt", mail.outbox[0].subject)
+
+    def test_crash_mid_batch_does_not_resend(self):
+        hunters = [
+            User.objects.create_user(
+                username=f"hunter{i}", password="test", email=f"h{i}@example.com"
+            )
+            for i in range(3)
+        ]
+        outbox.welcome(hunters)
+
+        class WorkerLost(BaseException):
+            pass
+
+        sends = []
+        send_messages = locmem.EmailBackend.send_messages
+
+        def crash_on_second_send(backend, messages):
+            sends.append(messages)
+            if len(sends) == 2:
+                raise WorkerLost
+            return send_messages(backend, messages)
+
+        with mock.patch.object(
+            locmem.EmailBackend, "send_messages", crash_on_second_send
+        ):
+            with self.assertRaises(WorkerLost):
+                outbox.drain()
+        self.assertEqual([m.to for m in mail.outbox], [["h0@example.com"]])
+        statuses = EmailOutbox.objects.order_by("id").values_list("status", flat=True)
+        self.assertEqual(list(statuses), ["Sent", "Sending", "Sending"])
+
+        # Claimed messages wait for the reaper rather than being sent twice
+        self.assertEqual(outbox.drain()["sent"], 0)
+        with self.assertLogs("api.outbox", "WARNING"):
+            self.assertEqual(outbox.release_stale_claims(timeout=timedelta(0)), 2)
+        self.assertEqual(outbox.drain()["sent"], 2)
+        self.assertEqual(
+            sorted(m.to[0] for m in mail.outbox),
+            ["h0@example.com", "h1@example.com", "h2@example.com"],
+        )
+
+
+class ParallelDrainTests(APITestCase):
+    def setUp(self):
+        self.hunters = [
+            User.objects.create_user(
+                username=f"hunter{i}", password="test", email=f"h{i}@example.com"
+            )
+            for i in range(5)
+        ]
+        celery_app.conf.task_always_eager = True
+        self.addCleanup(setattr, celery_app.conf, "task_always_eager", False)
+
+    def raid(self):
+        dungeon = Dungeon.objects.create(name="Ant Cave", location="Jeju", rank="S")
+        raid = Raid.objects.create(
+            name="Vampire Hunt", dungeon=dungeon, date=date.today()
+        )
+        for hunter in self.hunters:
+            RaidParticipation.objects.create(raid=raid, hunter=hunter, role="DPS")
+        return raid
+
+    def test_batch_is_sent_in_chunks(self):
+        outbox.raid_notification(self.raid())
+        with mock.patch(
+            "api.outbox.get_connection", wraps=outbox.get_connection
+        ) as get_connection:
+            result = drain_email_outbox.apply(kwargs={"chunk_size": 2}).get()
+        self.assertEqual((result["claimed"], result["chunks"]), (5, 3))
+        self.assertEqual(get_connection.call_count, 3)
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertFalse(
+            EmailOutbox.objects.exclude(status=EmailOutbox.StatusChoices.Sent).exists()
+        )
+
+    def test_raid_notification_starts_a_drain(self):
+        send_raid_notification_email.apply(args=[self.raid().pk])
+        self.assertEqual(len(mail.outbox), 5)
+        self.assertIn("Vampire Hunt", mail.outbox[0].subject)
+
+    def test_partial_failures_are_reported(self):
+        outbox.welcome(self.hunters)
+        send_messages = locmem.EmailBackend.send_messages
+
+        def reject_h3(backend, messages):
+            if messages[0].to == ["h3@example.com"]:
+                raise OSError("Mailbox unavailable")
+            return send_messages(backend, messages)
+
+        with mock.patch.object(locmem.EmailBackend, "send_messages", reject_h3):
+            with self.assertLogs("api.outbox", "WARNING") as logs:
+                result = drain_email_outbox.apply(kwargs={"chunk_size": 2}).get()
+        self.assertEqual(result["chunks"], 3)
+        self.assertIn("4 sent, 1 failed: h3@example.com", logs.output[-1])
+        self.assertEqual(len(mail.outbox), 4)
+        failed = EmailOutbox.objects.get(recipient="h3@example.com")
+        self.assertEqual(failed.status, EmailOutbox.StatusChoices.Pending)
+        self.assertEqual(failed.last_error, "Mailbox unavailable")
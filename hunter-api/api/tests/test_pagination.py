@@ -0,0 +1,67 @@
+import json
+from base64 import b64encode
+
+from api.models import Skill
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+User = get_user_model()
+
+
+class KeysetPaginationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            username="admin", password="test", email="admin@example.com", rank="S"
+        )
+        # Duplicate names force the id tie-breaker to do the work
+        for name in ["Blink", "Fireball", "Fireball", "Fireball", "Ice Blast"]:
+            Skill.objects.create(name=name, element="Fire", power=50)
+        self.client.force_authenticate(user=self.admin)
+
+    def _walk(self, url, link):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids.append([item["id"] for item in response.json()["results"]])
+            url = response.json()[link]
+        return ids
+
+    def test_pages_follow_composite_ordering(self):
+        expected = list(
+            Skill.objects.order_by("name", "id").values_list("id", flat=True)
+        )
+
+        pages = self._walk(reverse("skill-list") + "?page_size=2", "next")
+        self.assertEqual(pages, [expected[0:2], expected[2:4], expected[4:5]])
+
+        response = self.client.get(reverse("skill-list") + "?page_size=2")
+        response = self.client.get(response.json()["next"])
+        previous = self._walk(response.json()["next"], "previous")
+        self.assertEqual(previous, [expected[4:5], expected[2:4], expected[0:2]])
+
+    def test_ordering_param_is_paginated(self):
+        expected = list(
+            Skill.objects.order_by("-name", "id").values_list("id", flat=True)
+        )
+        pages = self._walk(
+            reverse("skill-list") + "?page_size=3&ordering=-name", "next"
+        )
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse("skill-list") + "?cursor=garbage")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_tampered_cursor(self):
+        url = reverse("hunter-list")
+        positions = [5, ["abc", 1], [200, "x"], [None, 1], {"a": 1}, [[1], 1]]
+        for position in positions:
+            with self.subTest(position=position):
+                data = json.dumps({"r": False, "p": position}).encode()
+                response = self.client.get(url, {"cursor": b64encode(data).decode()})
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
@@ -1,5 +1,7 @@
 from api.models import Dungeon, Raid, RaidParticipation
 from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
 from rest_framework.test import APITestCase
 
 User = get_user_model()
@@ -28,3 +30,16 @@ class RaidParticipationTests(APITestCase):
         self.assertEqual(participation.role, "Healer")
         self.assertEqual(participation.hunter, self.user)
         self.assertEqual(participation.raid, self.raid)
+
+    def test_bulk_create_raid_participations(self):
+        payload = [
+            {"raid": self.raid.id, "hunter": self.user.id, "role": "Healer"},
+            {"raid": self.raid.id, "hunter": self.admin.id, "role": "Tank"},
+        ]
+        response = self.client.post(
+            reverse("raidparticipation-list"), payload, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(self.raid.participations.count(), 2)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.raid_count, 1)
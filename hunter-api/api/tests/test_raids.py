@@ -1,6 +1,6 @@
 from datetime import date
 
-from api.models import Dungeon, Raid
+from api.models import Dungeon, Raid, RaidParticipation, Skill
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework import status
@@ -36,3 +36,58 @@ class RaidTests(APITestCase):
         }
         response = self.client.post(url, data, format="json")
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        raid = Raid.objects.get(pk=response.data["id"])
+        roles = dict(raid.participations.values_list("hunter_id", "role"))
+        self.assertEqual(roles, {self.admin.id: "Tank", self.user.id: "DPS"})
+        self.assertEqual(len(response.data["participations_info"]), 2)
+        self.assertEqual(response.data["team_strength"], 200 + 30)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.raid_count, 1)
+
+    def test_create_raid_rejects_unknown_hunters(self):
+        data = {
+            "name": "Dragon Hunt",
+            "dungeon": self.dungeon.id,
+            "date": date.today(),
+            "participations_create": [
+                {"hunter_id": self.admin.id, "role": "Tank"},
+                {"hunter_id": 9999, "role": "DPS"},
+            ],
+        }
+        response = self.client.post(reverse("raid-list"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("hunter_id", response.data["participations_create"][1])
+        self.assertFalse(Raid.objects.exists())
+
+    def test_update_rejects_participations(self):
+        raid = Raid.objects.create(
+            name="Vampire Hunt", dungeon=self.dungeon, date="2025-08-21"
+        )
+        url = reverse("raid-detail", args=[raid.id])
+        data = {
+            "name": "Vampire Hunt",
+            "dungeon": self.dungeon.id,
+            "date": "2025-08-21",
+            "participations_create": [{"hunter_id": self.user.id, "role": "DPS"}],
+        }
+        for method in (self.client.patch, self.client.put):
+            response = method(url, data, format="json")
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn("participations_create", response.data)
+        self.assertFalse(raid.participations.exists())
+
+    def test_team_strength_is_annotated(self):
+        skill = Skill.objects.create(name="Sword Dance", element="Light", power=120)
+        self.user.skills.add(skill)
+        raid = Raid.objects.create(
+            name="Vampire Hunt", dungeon=self.dungeon, date="2025-08-21"
+        )
+        RaidParticipation.objects.create(raid=raid, hunter=self.admin, role="Tank")
+        RaidParticipation.objects.create(raid=raid, hunter=self.user, role="DPS")
+
+        response = self.client.get(reverse("raid-detail", args=[raid.id]))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # S-rank (200) + D-rank (30) + skill (120)
+        self.assertEqual(response.data["team_strength"], 350)
+        self.assertEqual(response.data["team_strength"], raid.team_strength)
@@ -28,6 +28,17 @@ class SkillTests(APITestCase):
         response = self.client.post(url, data, format="json")
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
 
+    def test_bulk_create_skills(self):
+        url = reverse("skill-list")
+        data = [
+            {"name": "Fire Blast", "element": "Fire", "power": 100},
+            {"name": "Tidal Wave", "element": "Water", "power": 90},
+        ]
+        response = self.client.post(url, data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(Skill.objects.count(), 3)
+        self.assertEqual(len(self.client.get(url).json()["results"]), 3)
+
     def test_update_skill(self):
         url = reverse("skill-detail", args=[self.skill.id])
         data = {"name": "Sword Dance Plus", "element": "Light", "power": 150}
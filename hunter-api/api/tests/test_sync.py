@@ -0,0 +1,98 @@
+from datetime import timedelta
+from io import StringIO
+
+from api.models import Guild, Skill, Tombstone
+from api.sync import TOMBSTONE_RETENTION
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+User = get_user_model()
+
+
+class DeltaSyncTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            username="admin", password="test", email="admin@example.com", rank="S"
+        )
+        self.skills = [
+            Skill.objects.create(name=f"Skill {i}", element="Fire", power=i)
+            for i in range(3)
+        ]
+        self.client.force_authenticate(user=self.admin)
+        self.url = reverse("skill-list")
+
+    def sync(self, changed_since, **params):
+        response = self.client.get(self.url, {"changed_since": changed_since, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.json()
+
+    def test_first_sync_returns_everything(self):
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        data = self.sync(since)
+        self.assertEqual(
+            [s["id"] for s in data["changed"]], [s.id for s in self.skills]
+        )
+        self.assertEqual(data["deleted"], [])
+        self.assertFalse(data["has_more"])
+
+    def test_changes_and_deletions_since_cursor(self):
+        since = timezone.now()
+        # Rows saved before the cursor are not sent again
+        Skill.objects.update(updated_at=since - timedelta(minutes=1))
+        self.skills[1].power = 99
+        self.skills[1].save()
+        deleted_id = self.skills[2].id
+        self.skills[2].delete()
+
+        data = self.sync(since.isoformat())
+        self.assertEqual([s["id"] for s in data["changed"]], [self.skills[1].id])
+        self.assertEqual(data["deleted"], [deleted_id])
+
+    def test_cursor_pages_through_changes(self):
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        first = self.sync(since, page_size=2)
+        self.assertTrue(first["has_more"])
+        second = self.sync(first["cursor"], page_size=2)
+        self.assertFalse(second["has_more"])
+        ids = [s["id"] for s in first["changed"] + second["changed"]]
+        self.assertEqual(ids, [s.id for s in self.skills])
+
+    def test_related_change_marks_dependents_changed(self):
+        guild = Guild.objects.create(name="Hunters Guild", leader=self.admin)
+        since = timezone.now()
+        User.objects.update(updated_at=since - timedelta(minutes=1))
+
+        guild.name = "Ahjin Guild"
+        guild.save()
+        response = self.client.get(
+            reverse("hunter-list"), {"changed_since": since.isoformat()}
+        )
+        changed = response.json()["changed"]
+        self.assertEqual([h["guild_name"] for h in changed], ["Ahjin Guild"])
+
+    def test_invalid_and_expired_cursors(self):
+        response = self.client.get(self.url, {"changed_since": "not-a-cursor"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        expired = (timezone.now() - timedelta(days=365)).isoformat()
+        response = self.client.get(self.url, {"changed_since": expired})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_prune_keeps_the_retention_window(self):
+        expired_id = self.skills[0].id
+        for skill in self.skills:
+            skill.delete()
+        Tombstone.objects.filter(object_id=expired_id).update(
+            deleted_at=timezone.now() - TOMBSTONE_RETENTION - timedelta(minutes=1)
+        )
+        with self.assertRaisesMessage(CommandError, "at least 30 days"):
+            call_command("prune_tombstones", days=1, stdout=StringIO())
+        self.assertEqual(Tombstone.objects.count(), 3)
+
+        call_command("prune_tombstones", stdout=StringIO())
+        self.assertEqual(Tombstone.objects.count(), 2)
@@ -1,8 +1,10 @@
 from api.views import (
+    DatabasePoolView,
     DungeonViewSet,
     GuildInviteView,
     GuildViewSet,
     HunterViewSet,
+    LeaderboardView,
     RaidParticipationViewSet,
     RaidViewSet,
     SkillViewSet,
@@ -42,4 +44,6 @@ urlpatterns = [
     ),
     path("api/guild-invite/", GuildInviteView.as_view(), name="guild-invite"),
     path("api/verify-password/", VerifyPasswordView.as_view(), name="verify-password"),
+    path("api/leaderboard/", LeaderboardView.as_view(), name="leaderboard"),
+    path("api/metrics/db-pool/", DatabasePoolView.as_view(), name="db-pool"),
 ]
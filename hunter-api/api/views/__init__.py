@@ -1,6 +1,8 @@
 from .dungeon import DungeonViewSet
 from .guild import GuildInviteView, GuildViewSet
 from .hunter import HunterViewSet
+from .leaderboard import LeaderboardView
+from .metrics import DatabasePoolView
 from .raid import RaidViewSet
 from .raid_participation import RaidParticipationViewSet
 from .skill import SkillViewSet
@@ -15,4 +17,6 @@ __all__ = [
     "RaidViewSet",
     "RaidParticipationViewSet",
     "VerifyPasswordView",
+    "LeaderboardView",
+    "DatabasePoolView",
 ]
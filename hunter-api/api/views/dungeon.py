@@ -1,19 +1,31 @@
-import time
-
+from api.cache import cache_response
+from api.filters import DungeonFilter
 from api.models import Dungeon
 from api.serializers import DungeonSerializer
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_headers
+from api.views.mixins import (
+    AsyncReadMixin,
+    BatchLookupMixin,
+    CachedRetrieveMixin,
+    DeltaSyncMixin,
+    InstrumentedViewMixin,
+)
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, viewsets
 from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 
 
-class DungeonViewSet(viewsets.ModelViewSet):
-    queryset = Dungeon.objects.prefetch_related(
-        "raids", "raids__participations", "raids__participations__hunter"
-    ).all()
+class DungeonViewSet(
+    InstrumentedViewMixin,
+    DeltaSyncMixin,
+    BatchLookupMixin,
+    CachedRetrieveMixin,
+    AsyncReadMixin,
+    viewsets.ModelViewSet,
+):
+    # DungeonSerializer has no nested raids, so nothing to prefetch
+    queryset = Dungeon.objects.all()
+    detail_cache_namespace = "dungeon"
+    query_budget = {"list": 4, "retrieve": 3}
     serializer_class = DungeonSerializer
     throttle_classes = [AnonRateThrottle, UserRateThrottle]
     filter_backends = [
@@ -21,16 +33,20 @@ class DungeonViewSet(viewsets.ModelViewSet):
         filters.SearchFilter,
         filters.OrderingFilter,
     ]
+    filterset_class = DungeonFilter
     search_fields = ["name", "location"]
     ordering_fields = ["name", "rank"]
+    ordering = ("name", "id")
 
-    @method_decorator(cache_page(60 * 15, key_prefix="dungeon_list"))
-    @method_decorator(vary_on_headers("Authorization"))
+    @cache_response("dungeon_list")
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @cache_response("dungeon_list")
+    async def alist(self, request, *args, **kwargs):
+        return await super().alist(request, *args, **kwargs)
+
     def get_queryset(self):
-        time.sleep(2)
         qs = super().get_queryset()
         return qs
 
@@ -1,12 +1,16 @@
-import time
-
+from api import outbox
+from api.cache import cache_response
 from api.filters import GuildFilter
-from api.models import Guild
+from api.models import Guild, Hunter
 from api.serializers import GuildInviteSerializer, GuildSerializer
-from api.tasks import send_guild_creation_email, send_guild_invite_email
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_headers
+from api.views.mixins import (
+    AsyncReadMixin,
+    BatchLookupMixin,
+    CachedRetrieveMixin,
+    DeltaSyncMixin,
+    InstrumentedViewMixin,
+)
+from django.db import transaction
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, status, viewsets
 from rest_framework.response import Response
@@ -14,17 +18,18 @@ from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 from rest_framework.views import APIView
 
 
-class GuildViewSet(viewsets.ModelViewSet):
-    queryset = (
-        Guild.objects.select_related("leader")
-        .prefetch_related(
-            "members",
-            "members__skills",
-            "members__participations",
-            "members__participations__raid",
-        )
-        .all()
-    )
+class GuildViewSet(
+    InstrumentedViewMixin,
+    DeltaSyncMixin,
+    BatchLookupMixin,
+    CachedRetrieveMixin,
+    AsyncReadMixin,
+    viewsets.ModelViewSet,
+):
+    # GuildSerializer only shows member names and ranks
+    queryset = Guild.objects.select_related("leader").prefetch_related("members").all()
+    detail_cache_namespace = "guild"
+    query_budget = {"list": 4, "retrieve": 3}
     serializer_class = GuildSerializer
     throttle_classes = [AnonRateThrottle, UserRateThrottle]
     filter_backends = [
@@ -35,19 +40,23 @@ class GuildViewSet(viewsets.ModelViewSet):
     filterset_class = GuildFilter
     search_fields = ["name"]
     ordering_fields = ["name", "founded_date"]
+    ordering = ("founded_date", "name", "id")
 
-    @method_decorator(cache_page(60 * 15, key_prefix="guild_list"))
-    @method_decorator(vary_on_headers("Authorization"))
+    @cache_response("guild_list")
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @cache_response("guild_list")
+    async def alist(self, request, *args, **kwargs):
+        return await super().alist(request, *args, **kwargs)
+
     def perform_create(self, serializer):
-        guild = serializer.save()
-        send_guild_creation_email.delay(guild.pk)
+        with transaction.atomic():
+            guild = serializer.save()
+            outbox.guild_created(guild)
 
     def get_queryset(self):
-        time.sleep(2)
-        qs = super().get_queryset().order_by("founded_date", "name")
+        qs = super().get_queryset()
         return qs
 
     def get_permissions(self):
@@ -77,9 +86,9 @@ class GuildInviteView(APIView):
                 status=status.HTTP_403_FORBIDDEN,
             )
 
-        # Trigger Celery task
-        task = send_guild_invite_email.delay(hunter_id, guild_id)
+        # Delivered by the outbox drainer
+        message = outbox.guild_invite(Hunter.objects.get(pk=hunter_id), guild)
         return Response(
-            {"message": "Guild invite email is being sent.", "task_id": task.id},
+            {"message": "Guild invite email is being sent.", "outbox_id": message.id},
             status=status.HTTP_202_ACCEPTED,
         )
@@ -1,27 +1,35 @@
-import time
-
+from api import outbox
+from api.cache import cache_response
 from api.filters import HunterFilter
 from api.models import Hunter
 from api.serializers import HunterSerializer
-from api.tasks import send_hunter_welcome_email
-from django.db.models import Case, Count, F, IntegerField, Sum, Value, When
-from django.db.models.functions import Coalesce
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_headers
+from api.views.mixins import (
+    AsyncReadMixin,
+    BatchLookupMixin,
+    BulkCreateMixin,
+    CachedRetrieveMixin,
+    DeltaSyncMixin,
+    InstrumentedViewMixin,
+)
+from django.db import transaction
+from django.db.models import F
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, viewsets
 from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 
 
-class HunterViewSet(viewsets.ModelViewSet):
-    queryset = (
-        Hunter.objects.select_related("guild")
-        .prefetch_related(
-            "skills", "completed_raids", "participations", "participations__raid"
-        )
-        .all()
-    )
+class HunterViewSet(
+    InstrumentedViewMixin,
+    BulkCreateMixin,
+    DeltaSyncMixin,
+    BatchLookupMixin,
+    CachedRetrieveMixin,
+    AsyncReadMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Hunter.objects.select_related("guild").prefetch_related("skills").all()
+    detail_cache_namespace = "hunter"
+    query_budget = {"list": 4, "retrieve": 3}
     serializer_class = HunterSerializer
     throttle_classes = [AnonRateThrottle, UserRateThrottle]
     filter_backends = [
@@ -37,42 +45,40 @@ class HunterViewSet(viewsets.ModelViewSet):
         "username",
         "first_name",
         "last_name",
+        "power_level",
+        "raid_count",
         "power_level_annotated",
         "raid_count_annotated",
     ]
+    # Keyset pagination order, backed by hunter_power_level_idx
+    ordering = ("-power_level", "id")
 
-    @method_decorator(cache_page(60 * 15, key_prefix="hunter_list"))
-    @method_decorator(vary_on_headers("Authorization"))
+    @cache_response("hunter_list")
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @cache_response("hunter_list")
+    async def alist(self, request, *args, **kwargs):
+        return await super().alist(request, *args, **kwargs)
+
     def perform_create(self, serializer):
-        hunter = serializer.save()
-        send_hunter_welcome_email.delay(hunter.id)
+        with transaction.atomic():
+            hunter = serializer.save()
+            outbox.welcome([hunter])
+
+    def perform_bulk_create(self, serializer):
+        with transaction.atomic():
+            hunters = serializer.save()
+            outbox.welcome(hunters)
 
     def get_queryset(self):
-        time.sleep(2)
-        base_power = {
-            "E": 10,
-            "D": 30,
-            "C": 50,
-            "B": 80,
-            "A": 120,
-            "S": 200,
-        }
         qs = (
-            super()
-            .get_queryset()
+            super().get_queryset()
+            # Old ordering names, kept for existing clients
             .annotate(
-                raid_count_annotated=Count("completed_raids", distinct=True),
-                skill_power=Coalesce(Sum("skills__power"), Value(0)),
-                base_power=Case(
-                    *(When(rank=k, then=Value(v)) for k, v in base_power.items()),
-                    output_field=IntegerField(),
-                ),
-                power_level_annotated=F("base_power") + F("skill_power"),
+                power_level_annotated=F("power_level"),
+                raid_count_annotated=F("raid_count"),
             )
-            .order_by("-power_level_annotated", "id")
         )
         return qs
 
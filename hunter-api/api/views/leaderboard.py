@@ -0,0 +1,58 @@
+from api import leaderboard
+from api.views.mixins import InstrumentedViewMixin
+from rest_framework import permissions, serializers, status
+from rest_framework.response import Response
+from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
+from rest_framework.views import APIView
+
+
+class LeaderboardQuerySerializer(serializers.Serializer):
+    scope = serializers.ChoiceField(choices=list(leaderboard.SCOPES), default="hunters")
+    limit = serializers.IntegerField(min_value=1, max_value=100, default=10)
+    offset = serializers.IntegerField(min_value=0, default=0)
+    around = serializers.IntegerField(required=False)
+    radius = serializers.IntegerField(min_value=0, max_value=50, default=5)
+    rank_of = serializers.IntegerField(required=False)
+
+
+class LeaderboardView(InstrumentedViewMixin, APIView):
+    """
+    Rankings served straight from the Redis sorted sets in api.leaderboard.
+
+    ?scope=hunters|guilds&limit=&offset=  top-N page
+    ?around=<id>&radius=                  entries around a hunter or guild
+    ?rank_of=<id>                         rank of a single hunter or guild
+    """
+
+    permission_classes = [permissions.IsAuthenticated]
+    # Served from Redis alone
+    query_budget = 0
+    throttle_classes = [AnonRateThrottle, UserRateThrottle]
+
+    def get(self, request, *args, **kwargs):
+        params = LeaderboardQuerySerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        query = params.validated_data
+        scope = query["scope"]
+
+        if "rank_of" in query:
+            entry = leaderboard.rank_of(query["rank_of"], scope=scope)
+            if entry is None:
+                return Response(
+                    {"detail": "Not ranked."}, status=status.HTTP_404_NOT_FOUND
+                )
+            return Response(entry)
+
+        if "around" in query:
+            results = leaderboard.around(
+                query["around"], scope=scope, radius=query["radius"]
+            )
+            if results is None:
+                return Response(
+                    {"detail": "Not ranked."}, status=status.HTTP_404_NOT_FOUND
+                )
+        else:
+            results = leaderboard.top(
+                scope=scope, limit=query["limit"], offset=query["offset"]
+            )
+        return Response({"scope": scope, "results": results})
@@ -0,0 +1,19 @@
+import os
+
+from api.db import pool_stats
+from rest_framework import permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+
+class DatabasePoolView(APIView):
+    """
+    Statistics of the database connection pools (see api.db.pool_stats). Each
+    worker process has its own pools, so this reports the process that
+    served the request.
+    """
+
+    permission_classes = [permissions.IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        return Response({"pid": os.getpid(), "pools": pool_stats()})
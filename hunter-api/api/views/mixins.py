@@ -0,0 +1,359 @@
+from functools import update_wrapper
+
+from api import instrumentation, sync
+from api.cache import (
+    DETAIL_CACHE_TIMEOUT,
+    acache_get,
+    acache_set,
+    detail_cache_entry,
+    detail_cache_key,
+    set_validators,
+)
+from api.db import use_primary
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import quote_etag
+from rest_framework import permissions, status
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+
+
+class InstrumentedViewMixin:
+    """
+    Reports serialization time as the "serialize" Server-Timing metric and
+    checks the queries a request ran against ``query_budget``: a number for
+    every action or a dict by action, e.g. {"list": 3, "retrieve": 2}. Only
+    the handler's queries count: not those of the middleware, nor the session
+    and user lookups of authentication, which depend on how the client logs in.
+    """
+
+    query_budget = None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        metrics = instrumentation.current()
+        self._queries_before = metrics.queries if metrics else None
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        to_representation = serializer.to_representation
+
+        def timed_to_representation(instance):
+            with instrumentation.timed("serialize"):
+                return to_representation(instance)
+
+        serializer.to_representation = timed_to_representation
+        return serializer
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        before = getattr(self, "_queries_before", None)
+        if before is not None:
+            queries = instrumentation.current().queries - before
+            instrumentation.check_query_budget(self, queries)
+        return response
+
+
+class CachedRetrieveMixin:
+    """
+    Read-through cache for retrieve().
+
+    The serialized payload is stored under detail:<namespace>:<pk>, so a hit
+    is a single cache GET without touching get_queryset(). api.signals
+    deletes the key when the instance, or anything its payload shows, changes.
+    Conditional requests are answered from the validators stored alongside
+    the payload, so a 304 costs the same single GET.
+
+    A hit skips get_object(), and with it filter_queryset() and
+    check_object_permissions(). So the cache is only used for requests
+    without query parameters (other than ``format``), on viewsets whose
+    permissions have no object-level check; anything else is a plain
+    retrieve().
+
+    Misses read from the primary, like cache_response(), so a lagging replica
+    never fills the cache.
+    """
+
+    detail_cache_namespace = None
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = self.detail_cache_lookup(request)
+        if lookup is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        key = detail_cache_key(self.detail_cache_namespace, lookup)
+        entry = cache.get(key)
+        if entry is None:
+            with use_primary():
+                instance = self.get_object()
+                entry = detail_cache_entry(self.get_serializer(instance).data)
+            cache.set(key, entry, DETAIL_CACHE_TIMEOUT)
+        return self.detail_response(request, entry)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        lookup = self.detail_cache_lookup(request)
+        if lookup is None:
+            return await super().aretrieve(request, *args, **kwargs)
+
+        key = detail_cache_key(self.detail_cache_namespace, lookup)
+        entry = await acache_get(key)
+        if entry is None:
+            with use_primary():
+                instance = await self.aget_object()
+                entry = detail_cache_entry(self.get_serializer(instance).data)
+            await acache_set(key, entry, DETAIL_CACHE_TIMEOUT)
+        return self.detail_response(request, entry)
+
+    def detail_cache_lookup(self, request):
+        """The id to cache the request's payload under, or None to bypass."""
+        if set(request.query_params) - {api_settings.URL_FORMAT_OVERRIDE}:
+            return None
+        if any(_checks_objects(p) for p in self.get_permissions()):
+            return None
+        lookup = str(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+        # Only canonical ids are cached, so "05" can't shadow the entry for 5
+        if not lookup.isdigit() or str(int(lookup)) != lookup:
+            return None
+        return lookup
+
+    def detail_response(self, request, entry):
+        # One payload backs every renderer, so the format is part of the tag
+        etag = quote_etag(f"{entry['etag']}-{request.accepted_renderer.format}")
+        response = get_conditional_response(
+            request, etag=etag, last_modified=entry["modified"]
+        )
+        if response is None:
+            response = Response(entry["data"])
+        return set_validators(response, etag, entry["modified"])
+
+
+def _checks_objects(permission):
+    # Composed permissions (a | b) define their own has_object_permission;
+    # count them as checking
+    return (
+        type(permission).has_object_permission
+        is not permissions.BasePermission.has_object_permission
+    )
+
+
+class AsyncReadMixin:
+    """
+    Serve list() and retrieve() from an async view when settings.ASYNC_READS
+    is on, as under hunter_api/asgi.py. alist() and aretrieve() await the
+    database through the async ORM and the caches through the async Redis
+    client, so a request waiting on either holds no thread.
+
+    Authentication, permissions and throttling still run in DRF's initial(),
+    off the event loop, as do filter backends, which may validate against the
+    database. Every other action, and the ``?ids=`` and ``?changed_since=``
+    variants of list(), is served by the sync view. Viewsets with a cached
+    list() decorate alist() the same way.
+    """
+
+    sync_list_params = {"ids", "changed_since"}
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if not settings.ASYNC_READS:
+            return view
+        sync_view = sync_to_async(view)
+        action_map = {"head": actions.get("get"), **actions}
+
+        async def async_view(request, *args, **kwargs):
+            action = action_map.get(request.method.lower())
+            if action not in ("list", "retrieve") or (
+                action == "list" and not cls.sync_list_params.isdisjoint(request.GET)
+            ):
+                return await sync_view(request, *args, **kwargs)
+
+            self = cls(**initkwargs)
+            self.action_map = action_map
+            for method, name in action_map.items():
+                if name is not None:
+                    setattr(self, method, getattr(self, name))
+            self.request = request
+            self.args = args
+            self.kwargs = kwargs
+            return await self.adispatch(request, *args, **kwargs)
+
+        # The attributes DRF, the router and csrf_exempt set on the view
+        return update_wrapper(async_view, view)
+
+    async def adispatch(self, request, *args, **kwargs):
+        """APIView.dispatch() calling alist() or aretrieve()."""
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = getattr(self, f"a{self.action}")
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+    async def alist(self, request, *args, **kwargs):
+        queryset = await self.afilter_queryset(self.get_queryset())
+        if self.paginator is not None:
+            page = await self.paginator.apaginate_queryset(queryset, request, self)
+            if page is not None:
+                serializer = self.get_serializer(page, many=True)
+                return self.get_paginated_response(serializer.data)
+
+        objects = [obj async for obj in queryset.aiterator(chunk_size=2000)]
+        return Response(self.get_serializer(objects, many=True).data)
+
+    async def aretrieve(self, request, *args, **kwargs):
+        instance = await self.aget_object()
+        return Response(self.get_serializer(instance).data)
+
+    async def afilter_queryset(self, queryset):
+        return await sync_to_async(self.filter_queryset)(queryset)
+
+    async def aget_object(self):
+        """GenericAPIView.get_object() through the async ORM."""
+        queryset = await self.afilter_queryset(self.get_queryset())
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        filter_kwargs = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        try:
+            obj = await queryset.aget(**filter_kwargs)
+        except (
+            queryset.model.DoesNotExist,
+            TypeError,
+            ValueError,
+            DjangoValidationError,
+        ):
+            raise Http404(
+                f"No {queryset.model._meta.object_name} matches the given query."
+            )
+        self.check_object_permissions(self.request, obj)
+        return obj
+
+
+class BatchLookupMixin:
+    """
+    ``?ids=1,2,3`` on list(): fetch many objects by id in one request.
+
+    Payloads come from the same detail:<namespace>:<pk> entries as
+    CachedRetrieveMixin in one get_many; only the misses are loaded, with a
+    single IN query to the primary, and written back with set_many. Unknown
+    ids are skipped and the response keeps the requested order.
+    """
+
+    detail_cache_namespace = None
+    max_batch_ids = 100
+
+    def list(self, request, *args, **kwargs):
+        if "ids" not in request.query_params:
+            return super().list(request, *args, **kwargs)
+
+        ids = self.parse_batch_ids(request.query_params["ids"])
+        keys = {pk: detail_cache_key(self.detail_cache_namespace, pk) for pk in ids}
+        cached = cache.get_many(list(keys.values()))
+        payloads = {
+            pk: cached[key]["data"] for pk, key in keys.items() if key in cached
+        }
+
+        missing = [pk for pk in ids if pk not in payloads]
+        if missing:
+            with use_primary():
+                instances = list(self.get_queryset().filter(pk__in=missing))
+                data = self.get_serializer(instances, many=True).data
+            fresh = {instance.pk: item for instance, item in zip(instances, data)}
+            cache.set_many(
+                {keys[pk]: detail_cache_entry(item) for pk, item in fresh.items()},
+                DETAIL_CACHE_TIMEOUT,
+            )
+            payloads.update(fresh)
+
+        return Response([payloads[pk] for pk in ids if pk in payloads])
+
+    def parse_batch_ids(self, value):
+        try:
+            ids = [int(part) for part in value.split(",") if part.strip()]
+        except ValueError:
+            raise ValidationError({"ids": "Expected a comma-separated list of ids."})
+        if len(ids) > self.max_batch_ids:
+            raise ValidationError(
+                {"ids": f"At most {self.max_batch_ids} ids per request."}
+            )
+        # Drop duplicates but keep the requested order
+        return list(dict.fromkeys(ids))
+
+
+class DeltaSyncMixin:
+    """
+    ``?changed_since=<timestamp or cursor>`` on list(): incremental sync.
+
+    Responds with the rows changed since the cursor, the ids deleted since
+    then (from the Tombstone log) and the cursor to send next time. Filters
+    and ordering parameters are ignored so clients always see the whole
+    collection's changes.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if "changed_since" not in request.query_params:
+            return super().list(request, *args, **kwargs)
+
+        timestamp, last_id = sync.decode_cursor(request.query_params["changed_since"])
+        changed, deleted, cursor, has_more = sync.changes_since(
+            self.get_queryset(),
+            timestamp,
+            last_id,
+            limit=self.paginator.get_page_size(request),
+        )
+        return Response(
+            {
+                "changed": self.get_serializer(changed, many=True).data,
+                "deleted": deleted,
+                "cursor": cursor,
+                "has_more": has_more,
+            }
+        )
+
+
+class BulkCreateMixin:
+    """
+    POST a JSON list to create up to ``max_bulk_size`` objects in one request.
+
+    The serializer's list_serializer_class validates and inserts the whole
+    batch; perform_bulk_create() is the per-batch counterpart of
+    perform_create(). Bulk requests additionally need
+    ``bulk_permission_classes``.
+    """
+
+    max_bulk_size = 1000
+    bulk_permission_classes = [permissions.IsAdminUser]
+
+    def create(self, request, *args, **kwargs):
+        if not isinstance(request.data, list):
+            return super().create(request, *args, **kwargs)
+
+        for permission in (cls() for cls in self.bulk_permission_classes):
+            if not permission.has_permission(request, self):
+                self.permission_denied(
+                    request, message=getattr(permission, "message", None)
+                )
+        if not 0 < len(request.data) <= self.max_bulk_size:
+            raise ValidationError(
+                f"Expected a list of 1 to {self.max_bulk_size} objects."
+            )
+
+        serializer = self.get_serializer(data=request.data, many=True)
+        serializer.is_valid(raise_exception=True)
+        self.perform_bulk_create(serializer)
+        return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+    def perform_bulk_create(self, serializer):
+        serializer.save()
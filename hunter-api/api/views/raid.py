@@ -1,12 +1,17 @@
-import time
-
+from api import outbox
+from api.cache import cache_response
 from api.filters import RaidFilter
-from api.models import Raid
+from api.models import Raid, RaidParticipation
 from api.serializers import RaidSerializer
-from api.tasks import send_raid_notification_email
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_headers
+from api.views.mixins import (
+    AsyncReadMixin,
+    CachedRetrieveMixin,
+    DeltaSyncMixin,
+    InstrumentedViewMixin,
+)
+from django.db import transaction
+from django.db.models import OuterRef, Prefetch, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, status, viewsets
 from rest_framework.response import Response
@@ -14,14 +19,25 @@ from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 from rest_framework.views import APIView
 
 
-class RaidViewSet(viewsets.ModelViewSet):
+class RaidViewSet(
+    InstrumentedViewMixin,
+    DeltaSyncMixin,
+    CachedRetrieveMixin,
+    AsyncReadMixin,
+    viewsets.ModelViewSet,
+):
     queryset = (
         Raid.objects.select_related("dungeon")
         .prefetch_related(
-            "participations", "participations__hunter", "participations__hunter__skills"
+            Prefetch(
+                "participations",
+                queryset=RaidParticipation.objects.select_related("hunter"),
+            )
         )
         .all()
     )
+    detail_cache_namespace = "raid"
+    query_budget = {"list": 4, "retrieve": 3}
     serializer_class = RaidSerializer
     throttle_classes = [AnonRateThrottle, UserRateThrottle]
     filter_backends = [
@@ -32,19 +48,36 @@ class RaidViewSet(viewsets.ModelViewSet):
     filterset_class = RaidFilter
     search_fields = ["name"]
     ordering_fields = ["date", "name"]
+    ordering = ("date", "id")
 
-    @method_decorator(cache_page(60 * 15, key_prefix="raid_list"))
-    @method_decorator(vary_on_headers("Authorization"))
+    @cache_response("raid_list")
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @cache_response("raid_list")
+    async def alist(self, request, *args, **kwargs):
+        return await super().alist(request, *args, **kwargs)
+
     def perform_create(self, serializer):
-        raid = serializer.save()
-        send_raid_notification_email.delay(raid.id)
+        with transaction.atomic():
+            raid = serializer.save()
+            outbox.raid_notification(raid)
 
     def get_queryset(self):
-        time.sleep(2)
-        qs = super().get_queryset()
+        # Stored hunter power summed over every participation of the raid
+        team_strength = (
+            RaidParticipation.objects.filter(raid=OuterRef("pk"))
+            .values("raid")
+            .annotate(total=Sum("hunter__power_level"))
+            .values("total")
+        )
+        qs = (
+            super()
+            .get_queryset()
+            .annotate(
+                team_strength_annotated=Coalesce(Subquery(team_strength), Value(0))
+            )
+        )
         return qs
 
     def get_permissions(self):
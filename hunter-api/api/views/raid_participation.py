@@ -1,30 +1,35 @@
-import time
-
+from api.cache import cache_response
 from api.filters import RaidParticipationFilter
 from api.models import RaidParticipation
 from api.serializers import RaidParticipationSerializer
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_headers
+from api.views.mixins import BulkCreateMixin, InstrumentedViewMixin
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, viewsets
 from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 
 
-class RaidParticipationViewSet(viewsets.ModelViewSet):
+def participation_cache_scope(request):
+    # Non-staff users only see their own participations
+    return "staff" if request.user.is_staff else f"user:{request.user.pk}"
+
+
+class RaidParticipationViewSet(
+    InstrumentedViewMixin, BulkCreateMixin, viewsets.ModelViewSet
+):
     queryset = RaidParticipation.objects.select_related("raid", "hunter").all()
+    query_budget = {"list": 4, "retrieve": 3}
     serializer_class = RaidParticipationSerializer
     throttle_classes = [AnonRateThrottle, UserRateThrottle]
     filter_backends = [DjangoFilterBackend, filters.OrderingFilter]
     filterset_class = RaidParticipationFilter
+    ordering_fields = ["role"]
+    ordering = ("id",)
 
-    @method_decorator(cache_page(60 * 15, key_prefix="participation_list"))
-    @method_decorator(vary_on_headers("Authorization"))
+    @cache_response("participation_list", scope=participation_cache_scope)
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
     def get_queryset(self):
-        time.sleep(2)
 
         qs = super().get_queryset()
 
@@ -1,18 +1,32 @@
-import time
-
+from api.cache import cache_response
 from api.filters import SkillFilter
 from api.models import Skill
 from api.serializers import SkillSerializer
-from django.utils.decorators import method_decorator
-from django.views.decorators.cache import cache_page
-from django.views.decorators.vary import vary_on_headers
+from api.views.mixins import (
+    AsyncReadMixin,
+    BatchLookupMixin,
+    BulkCreateMixin,
+    CachedRetrieveMixin,
+    DeltaSyncMixin,
+    InstrumentedViewMixin,
+)
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters, permissions, viewsets
 from rest_framework.throttling import AnonRateThrottle, UserRateThrottle
 
 
-class SkillViewSet(viewsets.ModelViewSet):
+class SkillViewSet(
+    InstrumentedViewMixin,
+    BulkCreateMixin,
+    DeltaSyncMixin,
+    BatchLookupMixin,
+    CachedRetrieveMixin,
+    AsyncReadMixin,
+    viewsets.ModelViewSet,
+):
     queryset = Skill.objects.all()
+    detail_cache_namespace = "skill"
+    query_budget = {"list": 4, "retrieve": 3}
     serializer_class = SkillSerializer
     throttle_classes = [AnonRateThrottle, UserRateThrottle]
     filter_backends = [
@@ -23,14 +37,17 @@ class SkillViewSet(viewsets.ModelViewSet):
     filterset_class = SkillFilter
     search_fields = ["name"]
     ordering_fields = ["name", "power"]
+    ordering = ("name", "id")
 
-    @method_decorator(cache_page(60 * 15, key_prefix="skill_list"))
-    @method_decorator(vary_on_headers("Authorization"))
+    @cache_response("skill_list")
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    @cache_response("skill_list")
+    async def alist(self, request, *args, **kwargs):
+        return await super().alist(request, *args, **kwargs)
+
     def get_queryset(self):
-        time.sleep(2)
         qs = super().get_queryset()
         return qs
 
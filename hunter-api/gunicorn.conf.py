@@ -0,0 +1,68 @@
+"""
+Gunicorn configuration for serving hunter_api in production. Gunicorn reads
+./gunicorn.conf.py by default, so from this directory:
+
+    gunicorn hunter_api.wsgi
+
+Each setting can be changed through the environment variable next to it.
+`kill -HUP <master pid>` restarts the workers gracefully: they finish their
+requests while new ones take over. Because the app is preloaded into the
+master, deploying new code needs a new master: `kill -USR2 <master pid>`
+starts one next to the old, then `kill -QUIT <old master pid>`.
+"""
+
+import gc
+import multiprocessing
+import os
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hunter_api.settings_production")
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+
+# One worker per core busy on Python while another waits on the database or
+# Redis, and threads to keep a worker useful while its requests wait on I/O
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count() * 2 + 1))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+
+# Import Django and the app once in the master; forked workers share those
+# pages copy-on-write instead of each importing their own
+preload_app = True
+
+# Keep client connections open between requests. Behind a load balancer this
+# must be longer than the balancer's idle timeout, or it will reuse
+# connections gunicorn has already closed.
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "30"))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+
+# Recycle workers now and then so slow leaks cannot grow without bound; the
+# jitter keeps them from all restarting at once
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "1000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "100"))
+
+# Worker heartbeats go to a file; on a container's overlay filesystem writing
+# it can block the worker
+if os.path.isdir("/dev/shm"):
+    worker_tmp_dir = "/dev/shm"
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def pre_fork(server, worker):
+    # Move the preloaded objects out of the garbage collector's generations:
+    # collecting in a worker would otherwise write to their headers and copy
+    # every page they live on
+    gc.freeze()
+
+
+def post_fork(server, worker):
+    # A connection or pool opened while preloading must not be shared by the
+    # workers. Redis pools notice the fork themselves and reconnect.
+    from api.db import discard_inherited_pools
+    from django.db import connections
+
+    discard_inherited_pools()
+    connections.close_all()
@@ -12,5 +12,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hunter_api.settings")
+# Under ASGI, list and detail reads are served by async views
+os.environ.setdefault("ASYNC_READS", "1")
 
 application = get_asgi_application()
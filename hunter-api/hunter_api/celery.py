@@ -1,6 +1,7 @@
 import os
 
 from celery import Celery
+from celery.signals import worker_process_init
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "hunter_api.settings")
 
@@ -9,3 +10,12 @@ app = Celery("hunter_api")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 
 app.autodiscover_tasks()
+
+
+@worker_process_init.connect
+def reset_database_pools(**kwargs):
+    # Workers use the web's database settings, pool included; each forked
+    # worker process starts its own pool
+    from api.db import discard_inherited_pools
+
+    discard_inherited_pools()
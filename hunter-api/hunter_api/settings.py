@@ -11,8 +11,10 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
 import os
+import sys
 from datetime import timedelta
 from pathlib import Path
+from urllib.parse import urlsplit
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -27,6 +29,8 @@ SECRET_KEY = os.getenv("DJANGO_SECRET_KEY")
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = True
 
+TESTING = "test" in sys.argv
+
 ALLOWED_HOSTS = []
 
 
@@ -49,6 +53,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.middleware.ServerTimingMiddleware",
+    "api.middleware.PrimaryReplicaMiddleware",
     "corsheaders.middleware.CorsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -57,7 +63,8 @@ MIDDLEWARE = [
     "django.contrib.auth.middleware.AuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
-    "silk.middleware.SilkyMiddleware",
+    "api.middleware.ProfilingMiddleware",
+    "api.middleware.DeferredInvalidationMiddleware",
 ]
 
 ROOT_URLCONF = "hunter_api.urls"
@@ -78,6 +85,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "hunter_api.wsgi.application"
+ASGI_APPLICATION = "hunter_api.asgi.application"
 
 
 # Database
@@ -91,9 +99,67 @@ DATABASES = {
         "PASSWORD": os.getenv("POSTGRES_PASSWORD"),
         "HOST": os.getenv("DB_HOST"),
         "PORT": os.getenv("DB_PORT"),
+        # Check a reused connection before handing it out, so one the server
+        # has dropped is replaced instead of failing the request
+        "CONN_HEALTH_CHECKS": True,
     }
 }
 
+# Reuse database connections instead of opening one per request. On
+# PostgreSQL each process (web worker or Celery worker) keeps a psycopg pool;
+# DB_POOL=0 falls back to Django's persistent connections, kept for
+# DB_CONN_MAX_AGE seconds. The two cannot be combined.
+if (
+    DATABASES["default"]["ENGINE"] == "django.db.backends.postgresql"
+    and os.getenv("DB_POOL", "1") == "1"
+):
+    DATABASES["default"]["OPTIONS"] = {
+        "pool": {
+            "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+            "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "8")),
+            # Seconds a request waits for a free connection before failing
+            "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+            # Connections idle this long are closed, down to min_size
+            "max_idle": float(os.getenv("DB_POOL_MAX_IDLE", "300")),
+            # Connections are replaced after this long, which returns the
+            # memory their server process has grown
+            "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "3600")),
+        }
+    }
+else:
+    DATABASES["default"]["CONN_MAX_AGE"] = int(os.getenv("DB_CONN_MAX_AGE", "60"))
+
+# Read replicas of the primary, as a comma-separated DB_REPLICAS: hosts (host
+# or host:port) on PostgreSQL, database files on SQLite. They are added as
+# replica1, replica2... with the primary's other settings, and
+# api.db.PrimaryReplicaRouter sends reads to them.
+DATABASE_REPLICAS = []
+for location in filter(None, os.getenv("DB_REPLICAS", "").split(",")):
+    replica = {**DATABASES["default"]}
+    if replica["ENGINE"] == "django.db.backends.sqlite3":
+        replica["NAME"] = location
+    else:
+        replica["HOST"], _, port = location.partition(":")
+        replica["PORT"] = port or replica["PORT"]
+    DATABASE_REPLICAS.append(f"replica{len(DATABASE_REPLICAS) + 1}")
+    DATABASES[DATABASE_REPLICAS[-1]] = replica
+
+if TESTING:
+    # Tests read from the primary alone, except the router's own, which turn
+    # DATABASE_REPLICAS on with this second database (see api/tests/test_db.py)
+    DATABASE_REPLICAS = []
+    replica_test = {}
+    if DATABASES["default"]["ENGINE"] != "django.db.backends.sqlite3":
+        # SQLite tests use a database in memory; elsewhere it needs a name
+        replica_test["NAME"] = f"test_{DATABASES['default']['NAME']}_replica"
+    DATABASES["replica"] = {**DATABASES["default"], "TEST": replica_test}
+
+DATABASE_ROUTERS = ["api.db.PrimaryReplicaRouter"]
+
+# After a write, how long its user's reads go to the primary rather than a
+# replica that may not have the write yet
+DATABASE_PRIMARY_STICKY_SECONDS = int(os.getenv("DB_PRIMARY_STICKY_SECONDS", "10"))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -143,16 +209,21 @@ REST_FRAMEWORK = {
         "rest_framework.authentication.SessionAuthentication",
     ],
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
+    "DEFAULT_RENDERER_CLASSES": [
+        "api.renderers.TimedJSONRenderer",
+        "api.renderers.TimedBrowsableAPIRenderer",
+    ],
     "DEFAULT_FILTER_BACKENDS": ["django_filters.rest_framework.DjangoFilterBackend"],
-    # "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
-    # "PAGE_SIZE": 5,
+    "DEFAULT_PAGINATION_CLASS": "api.pagination.KeysetPagination",
+    "PAGE_SIZE": 50,
     "DEFAULT_THROTTLE_CLASSES": [
         "rest_framework.throttling.AnonRateThrottle",
         "rest_framework.throttling.UserRateThrottle",
     ],
+    # An empty rate turns throttling off, e.g. for load tests
     "DEFAULT_THROTTLE_RATES": {
-        "anon": "1000/minute",
-        "user": "1000/minute",
+        "anon": os.getenv("THROTTLE_RATE_ANON", "1000/minute") or None,
+        "user": os.getenv("THROTTLE_RATE_USER", "1000/minute") or None,
     },
 }
 
@@ -171,10 +242,63 @@ CACHES = {
         "LOCATION": os.environ["REDIS_URL"],
         "OPTIONS": {
             "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            # Times Redis round trips for the Server-Timing header
+            "CONNECTION_POOL_CLASS": "api.instrumentation.TimedConnectionPool",
         },
-    }
+    },
+    # Not a cache: api.leaderboard's sorted sets, which only
+    # rebuild_leaderboard recreates. In a Redis database of their own (the
+    # cache's URL with database 2 by default), so clearing the cache leaves
+    # them alone.
+    "leaderboard": {
+        "BACKEND": "django_redis.cache.RedisCache",
+        "LOCATION": os.getenv(
+            "LEADERBOARD_REDIS_URL",
+            urlsplit(os.environ["REDIS_URL"])._replace(path="/2").geturl(),
+        ),
+        "OPTIONS": {
+            "CLIENT_CLASS": "django_redis.client.DefaultClient",
+            "CONNECTION_POOL_CLASS": "api.instrumentation.TimedConnectionPool",
+        },
+    },
 }
 
+# Apply committed cache invalidations from a Celery task instead of the
+# request that made them
+CACHE_INVALIDATION_ASYNC = os.getenv("CACHE_INVALIDATION_ASYNC", "0") == "1"
+
+# Serve list and detail reads of the main viewsets from async views (see
+# api.views.mixins.AsyncReadMixin); hunter_api/asgi.py turns this on
+ASYNC_READS = os.getenv("ASYNC_READS", "0") == "1"
+
+# Raise instead of logging a warning when a view runs more queries than its
+# query_budget; on for the test suite
+QUERY_BUDGET_RAISE = os.getenv("QUERY_BUDGET_RAISE", "1" if TESTING else "0") == "1"
+
+# Silk profiling, through api.middleware.ProfilingMiddleware. A sample of
+# requests is recorded; X-Profile from staff (or with PROFILING_TOKEN) records
+# one with a cProfile call stack, saved as a .prof file that snakeviz or
+# speedscope show as a flame graph. Off in tests.
+PROFILING_SAMPLE_RATE = float(
+    os.getenv("PROFILING_SAMPLE_RATE", "0" if TESTING else "0.01")
+)
+PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+# silk_profile checks for this to tell whether silk is installed
+SILKY_MIDDLEWARE_CLASS = "api.middleware.ProfilingMiddleware"
+SILKY_PYTHON_PROFILER_FUNC = lambda request: request.deep_profile  # noqa: E731
+SILKY_PYTHON_PROFILER_BINARY = True
+SILKY_PYTHON_PROFILER_RESULT_PATH = os.getenv(
+    "PROFILING_RESULT_PATH", str(BASE_DIR / "profiles")
+)
+SILKY_DELETE_PROFILES = True
+# Ring buffer: the oldest requests are dropped past this many
+SILKY_MAX_RECORDED_REQUESTS = int(os.getenv("PROFILING_MAX_RECORDED_REQUESTS", "2000"))
+SILKY_MAX_RECORDED_REQUESTS_CHECK_PERCENT = 10
+SILKY_MAX_REQUEST_BODY_SIZE = 16 * 1024
+SILKY_MAX_RESPONSE_BODY_SIZE = 16 * 1024
+SILKY_AUTHENTICATION = True
+SILKY_AUTHORISATION = True
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=60),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),
@@ -184,6 +308,17 @@ CELERY_BROKER_URL = os.environ["REDIS_URL"]
 
 CELERY_RESULT_BACKEND = os.environ["REDIS_URL"]
 
+CELERY_BEAT_SCHEDULE = {
+    "drain-email-outbox": {
+        "task": "api.tasks.drain_email_outbox",
+        "schedule": 10.0,
+    },
+    "prune-tombstones": {
+        "task": "api.tasks.prune_tombstones",
+        "schedule": timedelta(days=1),
+    },
+}
+
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 
 
@@ -0,0 +1,21 @@
+"""
+Settings for serving hunter_api with gunicorn (see gunicorn.conf.py), on top
+of the development settings.
+"""
+
+import os
+
+from hunter_api.settings import *  # noqa: F401,F403
+from hunter_api.settings import BASE_DIR, REST_FRAMEWORK
+
+DEBUG = False
+
+ALLOWED_HOSTS = os.getenv("DJANGO_ALLOWED_HOSTS", "localhost,127.0.0.1").split(",")
+
+STATIC_ROOT = BASE_DIR / "staticfiles"
+
+# JSON only: the browsable API renders a template on every request
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    "DEFAULT_RENDERER_CLASSES": ["api.renderers.TimedJSONRenderer"],
+}